@@ -1,62 +1,157 @@
 """
 Calculates comment density of a given source code.
 
+Every line is classified from one token stream (the shared lexer, see
+lexer): a line holds code, comment text, docstring text, or nothing
+(blank). Code lines are read off the stream's code_view(), which the
+JS/C++ linters build anyway; only comment and literal tokens are
+visited. Python docstrings are located in the AST: the string
+statement opening a module, class or function body, on every line it
+spans.
+
 Return:
- - float between 0 and 1 (ratio of comment lines / total lines)
+ - count_lines(...) -> LineCounts   (code / comment / docstring / blank lines)
+ - get_comment_density(...) -> float between 0 and 1
+   (lines with comment or docstring text / non-blank lines)
 """
 
-import re
+from itertools import compress
+from typing import Dict, Iterator, Optional, Tuple
+import ast
+
+from backend.services.lexer import COMMENT, STRING, TEMPLATE, TokenStream, lex
 
+_CODE, _COMMENT, _DOCSTRING = 1, 2, 4
+# token kind -> 1 for the kinds count_lines looks at one by one
+_VISITED = bytes(kind in (COMMENT, STRING, TEMPLATE) for kind in range(256))
+_SCOPES = frozenset({ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef})
+# statement lists: docstrings can only be found there, expressions are skipped
+_BODIES = ("body", "orelse", "finalbody", "handlers", "cases")
+_bodies_by_class: Dict[type, tuple] = {}
 
-def get_comment_density(code: str) -> float:
+
+class LineCounts:
     """
-    Calculates how much of the code contains comments.
-    Works for Python, JS, and C++ style // /* */ comments as well.
+    Line counts of one source. A line with code and a trailing comment
+    counts as both; a newline ending the source does not start a line.
+    Counts are additive: a file split into chunks at line boundaries is
+    the sum of its chunks.
     """
 
-    if not code.strip():
-        return 0.0
+    __slots__ = ("code", "comment", "docstring", "documented", "blank", "total")
 
-    lines = code.split("\n")
-    total_lines = 0
-    comment_lines = 0
-    in_block_comment = False
-
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            continue  # ignore blank lines
-
-        total_lines += 1
-
-        # Start block comment (/* ... */)
-        if "/*" in stripped and "*/" not in stripped:
-            in_block_comment = True
-            comment_lines += 1
-            continue
-
-        # End block comment
-        if "*/" in stripped and in_block_comment:
-            in_block_comment = False
-            comment_lines += 1
-            continue
-
-        # Inside block comment region
-        if in_block_comment:
-            comment_lines += 1
-            continue
-
-        # Single-line comments (# or //)
-        if stripped.startswith("#") or stripped.startswith("//"):
-            comment_lines += 1
-            continue
-
-        # Python docstring (only count full-line)
-        if re.match(r'^(\'\'\'|""")', stripped) and re.match(r'(\'\'\'|""")$', stripped):
-            comment_lines += 1
-            continue
-
-    if total_lines == 0:
-        return 0.0
+    def __init__(self, code: int = 0, comment: int = 0, docstring: int = 0,
+                 documented: int = 0, blank: int = 0, total: int = 0):
+        self.code = code
+        self.comment = comment
+        self.docstring = docstring
+        self.documented = documented    # comment or docstring
+        self.blank = blank
+        self.total = total
+
+    def __add__(self, other: "LineCounts") -> "LineCounts":
+        return LineCounts(*(getattr(self, f) + getattr(other, f) for f in self.__slots__))
+
+    @property
+    def density(self) -> float:
+        non_blank = self.total - self.blank
+        return self.documented / non_blank if non_blank else 0.0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"code": self.code, "comment": self.comment, "docstring": self.docstring,
+                "blank": self.blank, "total": self.total}
+
+
+def docstring_spans(tree: ast.AST) -> Iterator[Tuple[int, int]]:
+    """(first line, last line) of every module, class and function docstring."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        cls = node.__class__
+        if cls in _SCOPES and node.body:
+            first = node.body[0]
+            if (first.__class__ is ast.Expr and first.value.__class__ is ast.Constant
+                    and isinstance(first.value.value, str)):
+                yield first.lineno, first.end_lineno or first.lineno
+        fields = _bodies_by_class.get(cls)
+        if fields is None:
+            fields = _bodies_by_class[cls] = tuple(f for f in _BODIES if f in cls._fields)
+        for field in fields:
+            stack.extend(getattr(node, field))
+
+
+def count_lines(code: str, tokens: Optional[TokenStream] = None,
+                tree: Optional[ast.AST] = None) -> LineCounts:
+    """
+    Python by default (`tree` gives its docstrings; parsed here if omitted).
+    For JS/C++, pass the lexer's `tokens`.
+    """
+    if tokens is None:
+        tokens = lex(code, "python")
+        if tree is None:
+            tree = ast.parse(code)
+    total = code.count("\n") + (0 if code.endswith("\n") or not code else 1)
+    flags = bytearray(total + 2)
+
+    # a string starting and ending on lines of one docstring is (part of) that docstring
+    in_docstring = bytearray(total + 2)
+    if tree is not None:
+        for first, last in docstring_spans(tree):
+            in_docstring[first:last + 1] = b"\x01" * (last - first + 1)
+
+    # code: anything left on the line once comments and literals are blanked out
+    for number, text in enumerate(tokens.code_view().split("\n"), 1):
+        if text and not text.isspace():
+            flags[number] = _CODE
+
+    line = 1
+    pos = 0
+    # only comments and literals from here on; the mask skips the rest in C
+    visited = tokens.kinds.tobytes().translate(_VISITED)
+    for kind, start, end in compress(tokens, visited):
+        line += code.count("\n", pos, start)
+        pos = end
+        newlines = code.count("\n", start, end)
+        if kind == COMMENT:
+            if not newlines:
+                flags[line] |= _COMMENT
+            else:
+                # a block comment: its blank lines stay blank
+                for offset, piece in enumerate(code[start:end].split("\n")):
+                    if piece.strip():
+                        flags[line + offset] |= _COMMENT
+        else:
+            # a literal covers every line it spans, blank ones included
+            last = line + newlines
+            flag = _DOCSTRING if in_docstring[line] and in_docstring[last] else _CODE
+            for number in range(line, last + 1):
+                flags[number] |= flag
+        line += newlines
+
+    # lines per flag combination (0..7), counted in C
+    lines = bytes(flags[1:total + 1])
+    per_flags = [lines.count(value) for value in range(8)]
+
+    def having(flag: int) -> int:
+        return sum(n for value, n in enumerate(per_flags) if value & flag)
 
-    return comment_lines / total_lines
+    return LineCounts(
+        code=having(_CODE),
+        comment=having(_COMMENT),
+        docstring=having(_DOCSTRING),
+        documented=having(_COMMENT | _DOCSTRING),
+        blank=per_flags[0],
+        total=total,
+    )
+
+
+def get_comment_density(code: str, tokens: Optional[TokenStream] = None,
+                        tree: Optional[ast.AST] = None) -> float:
+    """
+    Calculates how much of the code is documented. Python by default
+    (pass the parsed `tree` when there is one); for JS/C++ pass the
+    lexer's `tokens`.
+    """
+    if not code.strip():
+        return 0.0
+    return count_lines(code, tokens, tree).density
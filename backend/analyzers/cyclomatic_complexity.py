@@ -1,34 +1,84 @@
 import ast
 
-class ComplexityVisitor(ast.NodeVisitor):
+from backend.services.ast_utils import NodeDispatcher
+
+COMPLEXITY_NODES = (
+    ast.If, ast.For, ast.While,
+    ast.And, ast.Or,
+    ast.Try, ast.ExceptHandler,
+    ast.With, ast.FunctionDef,
+    ast.AsyncFunctionDef,
+    ast.BoolOp, ast.Compare
+)
+
+
+class ComplexityVisitor:
+    """
+    Complexity of a whole tree: 1 + one per decision point below it.
+    A traversal listener (add it to a NodeDispatcher next to the other
+    analyzers), or standalone through visit(tree).
+    """
+
     def __init__(self):
         self.complexity = 1
 
-    def generic_visit(self, node):
-        if isinstance(node, (
-            ast.If, ast.For, ast.While,
-            ast.And, ast.Or,
-            ast.Try, ast.ExceptHandler,
-            ast.With, ast.FunctionDef,
-            ast.AsyncFunctionDef,
-            ast.BoolOp, ast.Compare
-        )):
-            self.complexity += 1
+    def visit(self, node) -> int:
+        NodeDispatcher([self]).walk(node)
+        return self.complexity
 
-        super().generic_visit(node)
+    def _count(self, node):
+        self.complexity += 1
 
 
-def get_function_complexity(code: str):
-    tree = ast.parse(code)
-    results = []
+class ComplexityCollector:
+    """
+    Traversal listener computing the complexity of every top-level function.
+    Same counting rules as ComplexityVisitor, without a walk of its own.
+    """
+
+    def __init__(self, tree):
+        self.top_level = {id(node) for node in tree.body
+                          if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        self.results = []
+        self._current = None
+        self._complexity = 0
+
+    def _count(self, node):
+        if self._current is not None:
+            self._complexity += 1
 
-    for node in tree.body:
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            visitor = ComplexityVisitor()
-            visitor.visit(node)
-            results.append({
+    def visit_FunctionDef(self, node):
+        if self._current is None:
+            if id(node) not in self.top_level:
+                return
+            self._current = node
+            self._complexity = 1
+        self._complexity += 1
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def leave_FunctionDef(self, node):
+        if node is self._current:
+            self.results.append({
                 "name": node.name,
-                "complexity": visitor.complexity
+                "complexity": self._complexity
             })
+            self._current = None
+
+    leave_AsyncFunctionDef = leave_FunctionDef
+
 
-    return results
+# One handler per counted class, so the dispatcher's class -> handler table
+# skips every other node without a call.
+for _cls in COMPLEXITY_NODES:
+    setattr(ComplexityVisitor, "visit_" + _cls.__name__, ComplexityVisitor._count)
+    if not hasattr(ComplexityCollector, "visit_" + _cls.__name__):
+        setattr(ComplexityCollector, "visit_" + _cls.__name__, ComplexityCollector._count)
+del _cls
+
+
+def get_function_complexity(code: str):
+    tree = ast.parse(code)
+    collector = ComplexityCollector(tree)
+    NodeDispatcher([collector]).walk(tree)
+    return collector.results
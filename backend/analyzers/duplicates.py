@@ -0,0 +1,263 @@
+"""
+Near-duplicate function detection: AST fingerprints, MinHash and LSH.
+
+Every function is reduced to the preorder sequence of its node types,
+with identifiers, attribute names and literal values abstracted away
+(constants keep only their type), so renamed copies look the same. The
+sequence is cut into overlapping k-token shingles and summarized by a
+MinHash signature whose positions agree with probability equal to the
+Jaccard similarity of the shingle sets.
+
+DuplicateIndex stores signatures in flat arrays (NUM_PERM 32-bit values
+per function) and buckets them by bands of the signature (LSH): a query
+only compares the candidates sharing at least one band, instead of every
+stored function.
+
+Entry:
+ - fingerprint_functions(tree) -> List[Fingerprint]
+ - DuplicateIndex().add(path, fingerprint) -> int
+ - DuplicateIndex.query(signature, threshold) -> List[(function id, similarity)]
+ - DuplicateFinder(threshold).add(path, fingerprints); .issues() -> List[Dict]
+"""
+
+from array import array
+from operator import eq
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import ast
+import zlib
+
+from backend.services.ast_utils import NodeDispatcher
+
+NUM_PERM = 64
+BANDS = 8                       # 8 bands x 8 rows: ~92% recall at 0.85 similarity, ~3% of pairs at 0.5
+SHINGLE = 5                     # tokens per shingle
+MIN_TOKENS = 40                 # smaller functions are too generic to report
+DEFAULT_THRESHOLD = 0.85
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 61) - 1
+# fixed mixing constants: signatures from different processes are comparable
+_MIX_A, _MIX_B = 0x2545F4914F6CDD1D % _PRIME, 0x9E3779B97F4A7C15 % _PRIME
+# bin values keep the top 25 bits, so borrowed ones (+ distance * 2**25) fit 32 bits
+_VALUE_SHIFT = 61 - 25
+_BORROW = 1 << 25
+_EMPTY = (1 << 32) - 1
+
+_token_hashes: Dict[str, int] = {}
+
+
+class Fingerprint(NamedTuple):
+    name: str
+    line: int
+    end_line: int
+    signature: array
+
+
+def _token(node: ast.AST) -> int:
+    name = type(node).__name__
+    if isinstance(node, ast.Constant):
+        name += ":" + type(node.value).__name__
+    h = _token_hashes.get(name)
+    if h is None:
+        h = _token_hashes[name] = zlib.crc32(name.encode())
+    return h
+
+
+def minhash(tokens: List[int]) -> array:
+    """
+    One-permutation MinHash: each shingle is hashed once and lands in one
+    of NUM_PERM bins, each bin keeping its minimum; empty bins borrow from
+    the next filled bin (rotation densification). O(shingles) instead of
+    O(shingles x NUM_PERM), with the same collision property.
+    """
+    # tuples of ints hash the same in every process (no str hash randomization)
+    shingles = {hash(s) & _MASK for s in zip(*(tokens[i:] for i in range(SHINGLE)))}
+    bins = [_EMPTY] * NUM_PERM
+    for x in shingles:
+        v = (x * _MIX_A + _MIX_B) % _PRIME
+        b = v % NUM_PERM
+        v >>= _VALUE_SHIFT
+        if v < bins[b]:
+            bins[b] = v
+    if _EMPTY in bins:
+        filled = [i for i, v in enumerate(bins) if v != _EMPTY]
+        for i in range(NUM_PERM):
+            if bins[i] == _EMPTY:
+                j = next((f for f in filled if f > i), filled[0])
+                bins[i] = bins[j] + _BORROW * ((j - i) % NUM_PERM)
+    return array("I", bins)
+
+
+class FunctionFingerprinter:
+    """
+    Traversal listener: collects the normalized token sequence of every
+    function (nested functions count for their parents too) and turns it
+    into a Fingerprint when the function is left.
+    """
+
+    def __init__(self, min_tokens: int = MIN_TOKENS):
+        self.min_tokens = min_tokens
+        self.results: List[Fingerprint] = []
+        self._open: List[List[int]] = []
+
+    def visit_node(self, node):
+        # the dispatcher does not visit expr_context leaves (Load/Store)
+        if self._open:
+            token = _token(node)
+            for tokens in self._open:
+                tokens.append(token)
+
+    def visit_FunctionDef(self, node):
+        self._open.append([])
+
+    def leave_FunctionDef(self, node):
+        tokens = self._open.pop()
+        if len(tokens) >= self.min_tokens:
+            end = getattr(node, "end_lineno", None) or node.lineno
+            self.results.append(Fingerprint(node.name, node.lineno, end, minhash(tokens)))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+
+def fingerprint_functions(tree: ast.AST, min_tokens: int = MIN_TOKENS) -> List[Fingerprint]:
+    collector = FunctionFingerprinter(min_tokens)
+    NodeDispatcher([collector]).walk(tree)
+    return collector.results
+
+
+# -----------------------------------------------------
+# Index
+# -----------------------------------------------------
+class DuplicateIndex:
+    """
+    Function locations and signatures in parallel arrays; one bucket
+    table per band mapping a band hash to the newest function id, with
+    older ids chained through a per-band `next` array.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures = array("I")
+        self.paths = array("I")
+        self.names = array("I")
+        self.lines = array("I")
+        self.end_lines = array("I")
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._heads: List[Dict[int, int]] = [{} for _ in range(bands)]
+        self._next: List[array] = [array("i") for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def _intern(self, value: str) -> int:
+        sid = self._string_ids.get(value)
+        if sid is None:
+            sid = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return sid
+
+    def _band_keys(self, signature) -> List[int]:
+        r = self.rows
+        return [hash(tuple(signature[b * r:(b + 1) * r])) for b in range(self.bands)]
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    def add(self, path: str, fp: Fingerprint) -> int:
+        fid = len(self.lines)
+        self.signatures.extend(fp.signature)
+        self.paths.append(self._intern(path))
+        self.names.append(self._intern(fp.name))
+        self.lines.append(fp.line)
+        self.end_lines.append(fp.end_line)
+        for band, key in enumerate(self._band_keys(fp.signature)):
+            heads = self._heads[band]
+            self._next[band].append(heads.get(key, -1))
+            heads[key] = fid
+        return fid
+
+    def candidates(self, signature) -> set:
+        found = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            fid = self._heads[band].get(key, -1)
+            chain = self._next[band]
+            while fid >= 0:
+                found.add(fid)
+                fid = chain[fid]
+        return found
+
+    def similarity(self, signature, fid: int) -> float:
+        stored = self.signatures[fid * self.num_perm:(fid + 1) * self.num_perm]
+        return sum(map(eq, signature, stored)) / self.num_perm
+
+    def query(self, signature, threshold: float = DEFAULT_THRESHOLD,
+              exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(function id, estimated Jaccard similarity) of stored near-duplicates, best first."""
+        matches = []
+        for fid in self.candidates(signature):
+            if fid == exclude:
+                continue
+            sim = self.similarity(signature, fid)
+            if sim >= threshold:
+                matches.append((fid, sim))
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches
+
+    def location(self, fid: int) -> Dict[str, object]:
+        return {
+            "path": self._strings[self.paths[fid]],
+            "name": self._strings[self.names[fid]],
+            "line": self.lines[fid],
+            "end_line": self.end_lines[fid],
+        }
+
+
+def duplicate_issue(index: DuplicateIndex, fid: int, matches: List[Tuple[int, float]]) -> Dict:
+    loc = index.location(fid)
+    links = [{**index.location(other), "similarity": round(sim, 2)} for other, sim in matches]
+    where = ", ".join(f"{m['path']}:{m['line']}" for m in links[:3])
+    more = f" and {len(links) - 3} more" if len(links) > 3 else ""
+    return {
+        "type": "Duplicate Code",
+        "path": loc["path"],
+        "line": loc["line"],
+        "detail": f"Function '{loc['name']}' is a near-duplicate of {where}{more}",
+        "severity": "low",
+        "matches": links,
+    }
+
+
+class DuplicateFinder:
+    """
+    Matches functions file by file as they arrive: each new function is
+    queried against everything indexed before it, then added. Every pair
+    is found once; issues() reports it on both functions.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.index = DuplicateIndex()
+        # function id -> [(other id, similarity)]
+        self._matches: Dict[int, List[Tuple[int, float]]] = {}
+
+    def add(self, path: str, fingerprints: List[Fingerprint]) -> None:
+        for fp in fingerprints:
+            found = self.index.query(fp.signature, self.threshold)
+            fid = self.index.add(path, fp)
+            for other, sim in found:
+                self._matches.setdefault(fid, []).append((other, sim))
+                self._matches.setdefault(other, []).append((fid, sim))
+
+    def issues(self) -> List[Dict]:
+        issues = []
+        for fid in sorted(self._matches):
+            matches = sorted(self._matches[fid], key=lambda m: (-m[1], m[0]))
+            issues.append(duplicate_issue(self.index, fid, matches))
+        issues.sort(key=lambda i: (i["path"], i["line"]))
+        return issues
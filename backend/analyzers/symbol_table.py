@@ -0,0 +1,263 @@
+"""
+Per-scope symbol table and def-use index for Python sources.
+
+Built by a single traversal listener (SymbolTableBuilder) that runs in
+the same walk as the other analyzers. Each scope (module, class,
+function, lambda, comprehension) records the names it binds and loads;
+after the walk, one bottom-up pass resolves which names are read in a
+scope or in any nested scope that does not rebind them.
+
+Unused-variable and unused-import checks are then set lookups instead
+of rescans of sibling statements.
+"""
+
+import ast
+from typing import Dict, List, Optional, Set
+
+
+class Scope:
+    __slots__ = ("kind", "name", "node", "parent", "children", "bindings",
+                 "loads", "assignments", "imports", "declared_outer", "used")
+
+    def __init__(self, kind: str, name: str, node: ast.AST, parent: Optional["Scope"]):
+        self.kind = kind
+        self.name = name
+        self.node = node
+        self.parent = parent
+        self.children: List["Scope"] = []
+        self.bindings: Set[str] = set()
+        self.loads: Set[str] = set()
+        # name -> Assign nodes binding it with a plain `name = ...`
+        self.assignments: Dict[str, List[ast.AST]] = {}
+        # bound name -> Import/ImportFrom node
+        self.imports: Dict[str, ast.AST] = {}
+        # names declared `global` / `nonlocal` here
+        self.declared_outer: Set[str] = set()
+        # names read here or by nested scopes that resolve to this scope
+        self.used: Set[str] = set()
+
+
+class SymbolTable:
+    def __init__(self, module: Scope):
+        self.module = module
+        self._resolve(module)
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    def scopes(self):
+        stack = [self.module]
+        while stack:
+            scope = stack.pop()
+            yield scope
+            stack.extend(reversed(scope.children))
+
+    def exported_names(self) -> Set[str]:
+        """Names listed in a literal module-level `__all__`."""
+        names = set()
+        for node in self.module.assignments.get("__all__", []):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                for elt in node.value.elts:
+                    if isinstance(elt, ast.Constant) and isinstance(elt.value, str):
+                        names.add(elt.value)
+        return names
+
+    def unused_assignments(self):
+        """(name, Assign node) pairs for function locals that are never read."""
+        for scope in self.scopes():
+            if scope.kind != "function":
+                continue
+            for name, nodes in scope.assignments.items():
+                if name in scope.used or name in scope.declared_outer:
+                    continue
+                for node in nodes:
+                    yield name, node
+
+    def unused_imports(self) -> List[str]:
+        exported = self.exported_names()
+        unused = []
+        for scope in self.scopes():
+            for name, node in scope.imports.items():
+                if name in scope.used:
+                    continue
+                if scope is self.module and name in exported:
+                    continue
+                if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                    continue
+                unused.append(name)
+        return unused
+
+    # -----------------------------------------------------
+    # Resolution
+    # -----------------------------------------------------
+    def _resolve(self, root: Scope) -> None:
+        """
+        Post-order pass: a scope's `used` set is its own loads plus the
+        free loads of its children. Class bodies don't form a closure, so
+        free names of a class pass through to the enclosing scope.
+        """
+        free: Dict[int, Set[str]] = {}
+        order = []
+        stack = [root]
+        while stack:
+            scope = stack.pop()
+            order.append(scope)
+            stack.extend(scope.children)
+
+        for scope in reversed(order):
+            local = scope.bindings - scope.declared_outer
+            children_free = set()
+            for child in scope.children:
+                children_free |= free[id(child)]
+            scope.used = scope.loads | children_free
+            if scope.kind == "class":
+                free[id(scope)] = (scope.loads - local) | children_free
+            else:
+                free[id(scope)] = scope.used - local
+
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+_NESTED_SCOPES = (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+def _outer_expressions(node: ast.AST) -> List[ast.AST]:
+    """
+    The parts of a scope-opening node that run in the enclosing scope:
+    decorators, defaults, annotations, class bases, and the first
+    iterable of a comprehension.
+    """
+    if isinstance(node, (*_FUNCTIONS, ast.Lambda)):
+        args = node.args
+        roots = args.defaults + [d for d in args.kw_defaults if d is not None]
+        if isinstance(node, _FUNCTIONS):
+            roots += node.decorator_list
+            if node.returns is not None:
+                roots.append(node.returns)
+            for arg in (*args.posonlyargs, *args.args, args.vararg, *args.kwonlyargs, args.kwarg):
+                if arg is not None and arg.annotation is not None:
+                    roots.append(arg.annotation)
+        return roots
+    if isinstance(node, ast.ClassDef):
+        return node.bases + [k.value for k in node.keywords] + node.decorator_list
+    return [node.generators[0].iter]
+
+
+class SymbolTableBuilder:
+    """
+    Traversal listener producing a SymbolTable (see `table` after the walk).
+
+    The walk enters a function (or lambda, class, comprehension) before
+    its children, but its decorators, defaults, annotations, bases and
+    first comprehension iterable are evaluated in the enclosing scope.
+    When a scope opens, the names in those parts (and the scopes nested
+    there) are claimed for the enclosing scope, so `lambda i=i: i` or
+    `def g(b=b)` read `i` / `b` where they are defined.
+    """
+
+    def __init__(self):
+        self.table: Optional[SymbolTable] = None
+        self._stack: List[Scope] = []
+        # id of a Name or scope node -> scope it is evaluated in, when not the current one
+        self._outer: Dict[int, Scope] = {}
+
+    @property
+    def current(self) -> Scope:
+        return self._stack[-1]
+
+    def _push(self, kind: str, name: str, node: ast.AST) -> None:
+        parent = self._stack[-1] if self._stack else None
+        if self._outer:
+            parent = self._outer.pop(id(node), parent)
+        scope = Scope(kind, name, node, parent)
+        if parent is not None:
+            parent.children.append(scope)
+            self._claim(_outer_expressions(node), parent)
+        self._stack.append(scope)
+
+    def _claim(self, roots: List[ast.AST], scope: Scope) -> None:
+        """Attribute the names in `roots` to `scope`; nested scopes open in it."""
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node.__class__ is ast.Name or isinstance(node, _NESTED_SCOPES):
+                # a nested scope claims its own outer parts when it opens
+                self._outer[id(node)] = scope
+            else:
+                stack.extend(ast.iter_child_nodes(node))
+
+    def _bind(self, name: str) -> None:
+        self.current.bindings.add(name)
+
+    # ---- scopes ----
+    def visit_Module(self, node):
+        self._push("module", "<module>", node)
+
+    def leave_Module(self, node):
+        self.table = SymbolTable(self._stack.pop())
+
+    def visit_FunctionDef(self, node):
+        self._bind(node.name)
+        self._push("function", node.name, node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self._push("function", "<lambda>", node)
+
+    def visit_ClassDef(self, node):
+        self._bind(node.name)
+        self._push("class", node.name, node)
+
+    def visit_ListComp(self, node):
+        self._push("comprehension", "<comprehension>", node)
+
+    visit_SetComp = visit_DictComp = visit_GeneratorExp = visit_ListComp
+
+    def _pop(self, node):
+        self._stack.pop()
+
+    leave_FunctionDef = leave_AsyncFunctionDef = leave_Lambda = leave_ClassDef = _pop
+    leave_ListComp = leave_SetComp = leave_DictComp = leave_GeneratorExp = _pop
+
+    # ---- bindings and uses ----
+    def visit_arg(self, node):
+        self._bind(node.arg)
+
+    def visit_Name(self, node):
+        scope = self._outer.pop(id(node), None) if self._outer else None
+        if scope is None:
+            scope = self.current
+        if isinstance(node.ctx, ast.Load):
+            scope.loads.add(node.id)
+        else:
+            scope.bindings.add(node.id)
+
+    def visit_AugAssign(self, node):
+        # `x += 1` reads x as well as rebinding it
+        if isinstance(node.target, ast.Name):
+            self.current.loads.add(node.target.id)
+
+    def visit_Assign(self, node):
+        scope = self.current
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                scope.assignments.setdefault(target.id, []).append(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split('.')[0]
+            self._bind(name)
+            self.current.imports[name] = node
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            name = alias.asname or alias.name
+            self._bind(name)
+            self.current.imports[name] = node
+
+    def visit_Global(self, node):
+        self.current.declared_outer.update(node.names)
+
+    visit_Nonlocal = visit_Global
@@ -1,21 +1,11 @@
 import ast
 
-def detect_unused_imports(code: str):
-    tree = ast.parse(code)
-
-    imported_names = set()
-    used_names = set()
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                imported_names.add(alias.asname or alias.name.split('.')[0])
+from backend.services.ast_utils import NodeDispatcher
+from backend.analyzers.symbol_table import SymbolTableBuilder
 
-        elif isinstance(node, ast.ImportFrom):
-            for alias in node.names:
-                imported_names.add(alias.asname or alias.name)
 
-        elif isinstance(node, ast.Name):
-            used_names.add(node.id)
-
-    return list(imported_names - used_names)
+def detect_unused_imports(code: str):
+    tree = ast.parse(code)
+    symbols = SymbolTableBuilder()
+    NodeDispatcher([symbols]).walk(tree)
+    return symbols.table.unused_imports()
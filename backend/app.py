@@ -1,12 +1,64 @@
-from fastapi import FastAPI
-from backend.routers import analyze, metrics_router, auth_router
+import time
+
+from fastapi import FastAPI, Request
+from backend.routers import (
+    analyze, metrics_router, auth_router, batch_router, sessions_router, jobs_router, history_router,
+)
+from backend.database import dispose_async_engine, init_db
+from backend.services.executor import get_executor
+from backend.services.job_queue import get_job_workers
+from backend.services.instrumentation import get_metrics
+from backend.services.auth.password_handler import get_password_hasher
+from backend.services.history import get_history_recorder
 
 app = FastAPI(title="CodeSense AI Backend")
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (/sessions/{document_id}), not the raw path
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics = get_metrics()
+        metrics.requests.inc(request.method, path, str(status))
+        metrics.request_latency.observe(time.perf_counter() - started, request.method, path)
+
+@app.on_event("startup")
+def start_executor():
+    init_db()
+    # warm start: spawn analysis workers before the first request
+    get_executor().start()
+    # background job workers resume any job left unfinished by a restart
+    get_job_workers().start()
+    # analysis history is written in batches by a background thread
+    get_history_recorder().start()
+
+@app.on_event("shutdown")
+def stop_executor():
+    get_executor().shutdown()
+    get_job_workers().stop()
+    get_password_hasher().shutdown()
+    get_history_recorder().stop()
+
+@app.on_event("shutdown")
+async def close_database():
+    # only does something when an async route opened the async engine
+    await dispose_async_engine()
+
 # Attach routers
 app.include_router(analyze.router)
 app.include_router(metrics_router.router)
 app.include_router(auth_router.router)
+app.include_router(batch_router.router)
+app.include_router(sessions_router.router)
+app.include_router(jobs_router.router)
+app.include_router(history_router.router)
 
 @app.get("/")
 def home():
@@ -0,0 +1,185 @@
+"""
+Command-line entry point: analyze local code without the HTTP API.
+
+Usage:
+    python -m backend.cli scan PATH [--workers N] [--ignore PATTERN ...]
+                                    [--report report.json] [--details results.ndjson]
+                                    [--no-manifest] [--fail-under SCORE] [--duplicates]
+    python -m backend.cli diff REPO BASE HEAD [--report diff.json] [--fail-on-regression]
+    python -m backend.cli index PATH [--dead-code] [--unused-imports] [--report index.json]
+"""
+
+from typing import List, Optional
+import argparse
+import json
+import os
+import sys
+
+from backend.analyzers.duplicates import DEFAULT_THRESHOLD
+from backend.services.diff_analyzer import GitError, analyze_diff
+from backend.services.repo_scanner import scan
+from backend.services.symbol_index import INDEX_NAME, SymbolIndex
+
+
+# -----------------------------------------------------
+# scan
+# -----------------------------------------------------
+def cmd_scan(args) -> int:
+    details = open(args.details, "w") if args.details else None
+
+    def on_result(path, result):
+        if details:
+            details.write(json.dumps({"path": path, **result}, separators=(",", ":")) + "\n")
+
+    try:
+        report = scan(
+            args.path,
+            workers=args.workers,
+            ignore=args.ignore,
+            manifest_path="" if args.no_manifest else args.manifest,
+            use_git=False if args.no_git else None,
+            chunksize=args.chunksize,
+            on_result=on_result,
+            duplicates=args.duplicates,
+            similarity=args.similarity,
+        )
+    finally:
+        if details:
+            details.close()
+
+    data = report.as_dict(top=args.top)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+    summary = data["summary"]
+    print(f"{data['root']}: {summary['files']} files "
+          f"({data['files_analyzed']} analyzed, {data['files_unchanged']} unchanged) "
+          f"in {data['elapsed_seconds']:.2f}s")
+    print(f"issues: {summary['total_issues']}  by severity: {summary['issues_by_severity']}")
+    print(f"average score: {summary['average_score']}  min score: {summary['min_score']}")
+    for err in data["read_errors"]:
+        print(f"unreadable: {err['path']}: {err['error']}", file=sys.stderr)
+    for issue in data.get("duplicates", []):
+        print(f"{issue['path']}:{issue['line']}: {issue['type']}: {issue['detail']}")
+
+    if args.fail_under is not None and summary["files"] and summary["average_score"] < args.fail_under:
+        return 1
+    return 0
+
+
+# -----------------------------------------------------
+# diff
+# -----------------------------------------------------
+def cmd_diff(args) -> int:
+    try:
+        data = analyze_diff(args.repo, args.base, args.head)
+    except GitError as e:
+        print(f"git: {e}", file=sys.stderr)
+        return 2
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+    for f in data["files"]:
+        print(f"{f['path']}: {f['changed_lines']} changed lines, "
+              f"{f['issue_count']} issues, delta {f['delta_score']:+d} "
+              f"({f['issue_delta']:+d} issues)")
+        for issue in f["issues"]:
+            print(f"  {f['path']}:{issue.get('line', '?')}: [{issue.get('severity', '-')}] "
+                  f"{issue['type']}: {issue['detail']}")
+    summary = data["summary"]
+    print(f"{summary['files']} files, {summary['issues']} issues on changed lines, "
+          f"delta score {summary['delta_score']:+d}")
+
+    if args.fail_on_regression and summary["delta_score"] < 0:
+        return 1
+    return 0
+
+
+# -----------------------------------------------------
+# index
+# -----------------------------------------------------
+def cmd_index(args) -> int:
+    path = args.index or os.path.join(args.path, INDEX_NAME)
+    with SymbolIndex(path) as index:
+        data = index.update(args.path, workers=args.workers, ignore=args.ignore,
+                            use_git=False if args.no_git else None)
+        print(f"{data['root']}: {data['files']} modules ({data['indexed']} indexed, "
+              f"{data['unchanged']} unchanged, {data['removed']} removed) in {data['elapsed_seconds']:.2f}s")
+        for err in data["read_errors"]:
+            print(f"unreadable: {err['path']}: {err['error']}", file=sys.stderr)
+
+        if args.dead_code:
+            data["dead_code"] = index.dead_code(include_private=not args.public_only)
+            for item in data["dead_code"]:
+                print(f"{item['path']}:{item['line']}: unused {item['kind']} '{item['name']}'")
+        if args.unused_imports:
+            data["unused_imports"] = []
+            for (module, rel) in index.db.execute("SELECT module, path FROM files ORDER BY path"):
+                for item in index.unused_imports(module):
+                    data["unused_imports"].append({"path": rel, **item})
+                    print(f"{rel}:{item['line']}: '{item['name']}' imported but never used")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="CodeSense local analysis")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scan", help="analyze every supported file under a directory")
+    p.add_argument("path")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("--chunksize", type=int, default=None, help="files per pool task (default: auto)")
+    p.add_argument("--ignore", action="append", default=[], help="fnmatch pattern to skip (repeatable)")
+    p.add_argument("--manifest", default=None, help="manifest path (default: PATH/.codesense-manifest.db)")
+    p.add_argument("--no-manifest", action="store_true", help="analyze every file, keep no manifest")
+    p.add_argument("--no-git", action="store_true", help="walk the directory even in a git checkout")
+    p.add_argument("--report", help="write the aggregate report as JSON")
+    p.add_argument("--details", help="write one JSON result per file (NDJSON)")
+    p.add_argument("--top", type=int, default=20, help="worst files listed in the report")
+    p.add_argument("--fail-under", type=float, default=None, help="exit 1 if the average score is lower")
+    p.add_argument("--duplicates", action="store_true", help="report near-duplicate Python functions")
+    p.add_argument("--similarity", type=float, default=DEFAULT_THRESHOLD,
+                   help="minimum estimated similarity for --duplicates (0-1)")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("diff", help="analyze only the definitions changed between two commits")
+    p.add_argument("repo")
+    p.add_argument("base", help="base ref (e.g. main)")
+    p.add_argument("head", help="head ref (e.g. HEAD)")
+    p.add_argument("--report", help="write the result as JSON")
+    p.add_argument("--fail-on-regression", action="store_true",
+                   help="exit 1 if the change adds issue severity (negative delta)")
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser("index", help="build or update the cross-file symbol index of a Python tree")
+    p.add_argument("path")
+    p.add_argument("--index", default=None, help="index path (default: PATH/.codesense-symbols.db)")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("--ignore", action="append", default=[], help="fnmatch pattern to skip (repeatable)")
+    p.add_argument("--no-git", action="store_true", help="walk the directory even in a git checkout")
+    p.add_argument("--dead-code", action="store_true", help="list module-level functions and classes never used")
+    p.add_argument("--public-only", action="store_true", help="leave _private names out of --dead-code")
+    p.add_argument("--unused-imports", action="store_true", help="list imports no module uses or re-exports")
+    p.add_argument("--report", help="write the result as JSON")
+    p.set_defaults(func=cmd_index)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
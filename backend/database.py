@@ -1,17 +1,105 @@
-from sqlalchemy import create_engine
+"""
+Database engine, sessions and bulk inserts.
+
+The URL comes from the environment, SQLite by default. SQLite files run
+in WAL mode: readers don't block the writer and the writer doesn't block
+readers, and synchronous=NORMAL makes a commit an append to the WAL with
+no fsync of the main file. Writers still take turns on the one write
+lock; busy_timeout makes a writer wait for it instead of failing with
+"database is locked". Any other URL (e.g. postgresql://...) gets a
+pre-pinged, recycled connection pool of the same size.
+
+Entry:
+ - SessionLocal() -> Session                    (sync, routes and workers)
+ - get_db()                                     (FastAPI dependency)
+ - get_async_engine() / get_async_db()          (async routes; needs aiosqlite or asyncpg)
+ - bulk_insert(db, Model, rows) -> int          (chunked executemany INSERT)
+ - pool_stats() -> Dict
+
+Config (environment):
+ - CODESENSE_DATABASE_URL      SQLAlchemy URL (default sqlite:///./codesense.db)
+ - CODESENSE_DB_POOL_SIZE      connections kept open (default 10)
+ - CODESENSE_DB_MAX_OVERFLOW   extra connections under load (default 20)
+ - CODESENSE_DB_POOL_TIMEOUT   seconds to wait for a free connection (default 30)
+ - CODESENSE_DB_BUSY_TIMEOUT   SQLite: ms a writer waits for the write lock (default 30000)
+ - CODESENSE_DB_MMAP_SIZE      SQLite: bytes of the file memory-mapped (default 256 MiB)
+"""
+
+from typing import Any, Dict, Iterable, List
+import os
+import threading
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import StaticPool
+
+DATABASE_URL = os.getenv("CODESENSE_DATABASE_URL", "sqlite:///./codesense.db")
+POOL_SIZE = int(os.getenv("CODESENSE_DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("CODESENSE_DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("CODESENSE_DB_POOL_TIMEOUT", "30"))
+BUSY_TIMEOUT_MS = int(os.getenv("CODESENSE_DB_BUSY_TIMEOUT", "30000"))
+MMAP_SIZE = int(os.getenv("CODESENSE_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+# rows per INSERT statement in bulk_insert (SQLite caps bound parameters per statement)
+BULK_CHUNK = 500
+
+# async drivers for the sync URL schemes we know
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _is_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_options(url) -> Dict[str, Any]:
+    if url.get_backend_name() != "sqlite":
+        return {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT,
+                "pool_pre_ping": True, "pool_recycle": 1800}
+    # connections are shared across the request thread pool
+    options: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+    if _is_memory(url):
+        # one connection, or every checkout would see its own empty database
+        options["poolclass"] = StaticPool
+    else:
+        options["connect_args"]["timeout"] = BUSY_TIMEOUT_MS / 1000
+        options.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # journal_mode is stored in the file; the rest are per connection
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
+def make_engine(database_url: str = DATABASE_URL) -> Engine:
+    """A sync engine with the pool and (SQLite) pragmas configured above."""
+    url = make_url(database_url)
+    new_engine = create_engine(url, **_engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        event.listen(new_engine, "connect", _sqlite_pragmas)
+    return new_engine
 
-DATABASE_URL = "sqlite:///./codesense.db"  # local SQLite DB
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # required for SQLite
-)
+engine = make_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def init_db():
+    """Create missing tables for every model (safe to call at each startup)."""
+    import backend.models.user  # noqa: F401  (register models on Base)
+    import backend.models.job  # noqa: F401
+    import backend.models.history  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+
 # Dependency for FastAPI routes
 def get_db() -> Session:
     db = SessionLocal()
@@ -19,3 +107,90 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+def bulk_insert(db: Session, model, rows: Iterable[Dict[str, Any]], chunk_size: int = BULK_CHUNK) -> int:
+    """
+    INSERT many rows of a mapped class or table as Core executemany
+    batches (no ORM objects, no per-row flush). Runs in the session's
+    transaction: the caller commits. Returns the number of rows.
+    """
+    count = 0
+    chunk: List[Dict[str, Any]] = []
+    statement = insert(model)
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.execute(statement, chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(statement, chunk)
+        count += len(chunk)
+    return count
+
+
+def pool_stats() -> Dict[str, Any]:
+    pool = engine.pool
+    return {
+        "backend": engine.url.get_backend_name(),
+        "size": pool.size() if hasattr(pool, "size") else 1,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else 0,
+    }
+
+
+# -----------------------------------------------------
+# Async engine (optional driver)
+# -----------------------------------------------------
+_async_engine = None
+_async_sessions = None
+_async_lock = threading.Lock()
+
+
+def async_url(database_url: str = DATABASE_URL) -> str:
+    """The URL with its async driver: sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg."""
+    url = make_url(database_url)
+    if "+" not in url.drivername and url.drivername in _ASYNC_DRIVERS:
+        url = url.set(drivername=_ASYNC_DRIVERS[url.drivername])
+    return url.render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    """
+    Process-wide async engine on the same database, pool settings and
+    pragmas as `engine`. Raises RuntimeError when the async driver is
+    not installed.
+    """
+    global _async_engine, _async_sessions
+    with _async_lock:
+        if _async_engine is None:
+            try:
+                from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+                url = make_url(async_url())
+                new_engine = create_async_engine(url, **_engine_options(url))
+            except ImportError as e:
+                raise RuntimeError(
+                    f"Async database access needs the driver for {async_url()} ({e})"
+                ) from e
+            if url.get_backend_name() == "sqlite":
+                event.listen(new_engine.sync_engine, "connect", _sqlite_pragmas)
+            _async_sessions = async_sessionmaker(new_engine, autoflush=False, expire_on_commit=False)
+            _async_engine = new_engine
+        return _async_engine
+
+
+async def get_async_db():
+    """FastAPI dependency yielding an AsyncSession."""
+    get_async_engine()
+    async with _async_sessions() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessions
+    with _async_lock:
+        current, _async_engine, _async_sessions = _async_engine, None, None
+    if current is not None:
+        await current.dispose()
@@ -10,6 +10,9 @@ class MetaModel(BaseModel):
     score: int
     complexity: Any | None = None
     comment_density: float | None = None
+    line_counts: Dict[str, int] | None = None   # code / comment / docstring / blank / total lines
+    profile: Dict[str, Any] | None = None
+    budget: Dict[str, Any] | None = None      # set when status == "budget_exceeded"
 
 class AnalyzeResponse(BaseModel):
     status: str
@@ -0,0 +1,50 @@
+# backend/models/history.py
+from sqlalchemy import Column, Integer, String, Float, Text, Index
+from backend.database import Base
+
+# Rows are append-only. Times are integer epoch seconds, so trend queries bucket with
+# integer division, and every query filters on a leading-column index + created_at range.
+
+class AnalysisRecord(Base):
+    """One analysis run, reduced to the numbers trends are drawn from."""
+    __tablename__ = "analysis_history"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    path = Column(String, nullable=True)
+    language = Column(String, nullable=False)
+    content_hash = Column(String(32), nullable=False)
+    score = Column(Integer, nullable=False)
+    issue_count = Column(Integer, nullable=False)
+    high_issues = Column(Integer, nullable=False, default=0)
+    medium_issues = Column(Integer, nullable=False, default=0)
+    low_issues = Column(Integer, nullable=False, default=0)
+    function_count = Column(Integer, nullable=True)
+    max_complexity = Column(Integer, nullable=True)
+    avg_complexity = Column(Float, nullable=True)
+    issue_types = Column(Text, nullable=True)     # JSON {type: count}, for display only
+
+    __table_args__ = (
+        # trend of one file / one user; score and created_at ride along for index-only scans
+        Index("ix_history_path_time", "path", "created_at", "score"),
+        Index("ix_history_user_time", "user_id", "created_at", "score"),
+        Index("ix_history_time", "created_at"),
+    )
+
+class AnalysisIssueCount(Base):
+    """Issues of one run grouped by (type, severity); aggregated for "top issue types"."""
+    __tablename__ = "analysis_issue_counts"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    issue_type = Column(String, nullable=False)
+    severity = Column(String, nullable=True)
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # covering: a week of GROUP BY issue_type reads the index only
+        Index("ix_issue_counts_time_type", "created_at", "issue_type", "severity", "count"),
+        Index("ix_issue_counts_user_time", "user_id", "created_at", "issue_type", "count"),
+    )
@@ -0,0 +1,51 @@
+# backend/models/job.py
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Index, UniqueConstraint, func
+from backend.database import Base
+
+# Job.status
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# JobFile.status
+PENDING = "pending"
+ANALYZED = "analyzed"
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String, nullable=False, default=QUEUED)
+    total_files = Column(Integer, nullable=False, default=0)
+    done_files = Column(Integer, nullable=False, default=0)
+    # worker currently holding the job and until when (epoch seconds)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(Float, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    summary = Column(Text, nullable=True)      # JSON, set when the job is done
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_status_lease", "status", "lease_expires_at"),
+    )
+
+class JobFile(Base):
+    __tablename__ = "job_files"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String(32), ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    path = Column(String, nullable=False)
+    language = Column(String, nullable=False)
+    code = Column(Text, nullable=True)         # dropped once the file is analyzed
+    status = Column(String, nullable=False, default=PENDING)
+    result = Column(Text, nullable=True)       # JSON analysis result
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "position", name="uq_job_files_position"),
+        Index("ix_job_files_job_status", "job_id", "status", "position"),
+    )
@@ -1,17 +1,30 @@
-from fastapi import APIRouter, HTTPException
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
-from backend.services.code_analyzer import CodeAnalyzerService
+from backend.services.executor import get_executor, ExecutorSaturated, AnalysisTimeout
+from backend.services.instrumentation import get_metrics
+from backend.services.history import get_history_recorder, history_enabled
+from backend.services.auth.dependencies import get_optional_user
+from backend.services.auth.token_cache import UserSnapshot
 from backend.models.analyze_response import AnalyzeResponse
 
 router = APIRouter(tags=["Code Analyzer"])
-analyzer = CodeAnalyzerService()
 
 class AnalyzeRequest(BaseModel):
     code: str
     language: str
+    path: Optional[str] = None     # file the code came from, keys its history trend
 
 @router.post("/", response_model=AnalyzeResponse)
-async def analyze_code(req: AnalyzeRequest):
+async def analyze_code(req: AnalyzeRequest, profile: bool = False,
+                       user: Optional[UserSnapshot] = Depends(get_optional_user)):
+    """
+    `?profile=1` adds a per-stage and per-rule cost breakdown in meta.profile.
+    Each run is recorded in the analysis history (see /history), under the
+    caller's user when a bearer token is sent.
+    """
     code = req.code.strip()
     language = req.language.lower().strip()
 
@@ -20,4 +33,23 @@ async def analyze_code(req: AnalyzeRequest):
     if language not in ["python", "javascript", "cpp", "c++"]:
         raise HTTPException(status_code=400, detail="Invalid language. Use: python, javascript, cpp, c++")
 
-    return analyzer.analyze(code, language)
+    try:
+        result = await get_executor().analyze(code, language, profile=profile)
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Analyzer is busy, retry shortly.", headers={"Retry-After": "1"})
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    # serialize here (instead of letting FastAPI do it) so the cost is measured
+    wall, cpu = time.perf_counter(), time.process_time()
+    body = AnalyzeResponse.model_validate(result).model_dump_json(
+        exclude=None if profile else {"meta": {"profile"}}
+    )
+    metrics = get_metrics()
+    metrics.stage_wall.observe(time.perf_counter() - wall, language, "serialize")
+    metrics.stage_cpu.observe(time.process_time() - cpu, language, "serialize")
+
+    if history_enabled():
+        # buffered; written in batches by the history thread
+        get_history_recorder().record(result, code, language, req.path, user.id if user else None)
+    return Response(body, media_type="application/json")
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from backend.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database import get_async_db
 from backend.models.user import User
-from backend.services.auth.password_handler import hash_password, verify_password
+from backend.services.auth.password_handler import HasherSaturated, get_password_hasher
 from backend.services.auth.jwt_handler import create_access_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -17,21 +18,36 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
+def _busy(e: HasherSaturated) -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many logins in progress, retry shortly.",
+                         headers={"Retry-After": str(e.retry_after)})
+
+# ---- DB steps, awaited on the async engine ----
+async def _find_user(db: AsyncSession, email: str):
+    return await db.scalar(select(User).where(User.email == email))
+
+async def _create_user(db: AsyncSession, email: str, hashed: str, full_name: str | None) -> User:
+    user = User(email=email, hashed_password=hashed, full_name=full_name)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+async def _store_hash(db: AsyncSession, user: User, hashed: str) -> None:
+    user.hashed_password = hashed
+    await db.commit()
+
 @router.post("/register")
-def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def register(data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await _find_user(db, data.email)
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed = hash_password(data.password)
-    new_user = User(
-        email=data.email,
-        hashed_password=hashed,
-        full_name=data.full_name
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        hashed = await get_password_hasher().hash(data.password)
+    except HasherSaturated as e:
+        raise _busy(e)
+    new_user = await _create_user(db, data.email, hashed, data.full_name)
 
     return {
         "status": "success",
@@ -44,13 +60,20 @@ def register(data: RegisterRequest, db: Session = Depends(get_db)):
     }
 
 @router.post("/login")
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await _find_user(db, data.email)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not verify_password(data.password, user.hashed_password):
+    try:
+        valid, new_hash = await get_password_hasher().verify_and_update(data.password, user.hashed_password)
+    except HasherSaturated as e:
+        raise _busy(e)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # stored with an older cost factor: upgrade it now that the password is known
+        await _store_hash(db, user, new_hash)
 
     token = create_access_token(subject=str(user.id))
     return {
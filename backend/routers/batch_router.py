@@ -0,0 +1,60 @@
+from typing import List, Literal
+import json
+import os
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from backend.services.batch_service import analyze_batch, iter_batch
+from backend.services.executor import get_executor
+
+router = APIRouter(prefix="/batch", tags=["Batch Analyzer"])
+
+MAX_BATCH_FILES = int(os.getenv("CODESENSE_BATCH_MAX_FILES", "1000"))
+MAX_STREAM_FILES = int(os.getenv("CODESENSE_STREAM_MAX_FILES", "20000"))
+
+class BatchFile(BaseModel):
+    path: str
+    code: str
+    language: str
+
+class BatchRequest(BaseModel):
+    files: List[BatchFile]
+
+def _validate(req: BatchRequest, max_files: int):
+    if not req.files:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one file.")
+    if len(req.files) > max_files:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {max_files} files.")
+
+@router.post("/")
+async def analyze_files(req: BatchRequest):
+    _validate(req, MAX_BATCH_FILES)
+
+    files = [f.model_dump() for f in req.files]
+    return await analyze_batch(files, get_executor())
+
+@router.post("/stream")
+async def stream_files(req: BatchRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    """
+    Streams one record per file as soon as it is analyzed, then a final
+    {"summary": ...} record. `format=ndjson` (default) writes one JSON
+    object per line; `format=sse` writes server-sent events.
+    """
+    _validate(req, MAX_STREAM_FILES)
+
+    files = ({"path": f.path, "code": f.code, "language": f.language} for f in req.files)
+    records = iter_batch(files, get_executor())
+
+    if format == "sse":
+        return StreamingResponse(_sse(records), media_type="text/event-stream")
+    return StreamingResponse(_ndjson(records), media_type="application/x-ndjson")
+
+async def _ndjson(records):
+    async for record in records:
+        yield json.dumps(record) + "\n"
+
+async def _sse(records):
+    async for record in records:
+        event = "summary" if "summary" in record else "result"
+        yield f"event: {event}\ndata: {json.dumps(record)}\n\n"
@@ -0,0 +1,32 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from backend.services.history import HistoryStore
+from backend.services.auth.dependencies import get_current_user
+from backend.services.auth.token_cache import UserSnapshot
+
+router = APIRouter(prefix="/history", tags=["Analysis History"])
+
+store = HistoryStore()
+
+# Plain `def` handlers: the queries run in FastAPI's thread pool.
+# Every route needs a bearer token and only reads the caller's own runs.
+
+Bucket = Literal["hour", "day", "week"]
+
+@router.get("/me/trend")
+def my_score_trend(path: Optional[str] = None, days: int = Query(90, ge=1, le=3650), bucket: Bucket = "day",
+                   user: UserSnapshot = Depends(get_current_user)):
+    """Score per time bucket over the caller's analyses, for one file (`path`) or all of them."""
+    points = store.score_trend(path=path, user_id=user.id, days=days, bucket=bucket)
+    return {"path": path, "bucket": bucket, "points": points}
+
+@router.get("/me/runs")
+def my_recent_runs(path: Optional[str] = None, limit: int = Query(100, ge=1, le=1000),
+                   user: UserSnapshot = Depends(get_current_user)):
+    return {"path": path, "runs": store.runs(path=path, user_id=user.id, limit=limit)}
+
+@router.get("/me/issues/top")
+def my_top_issue_types(days: int = Query(7, ge=1, le=3650), limit: int = Query(10, ge=1, le=100),
+                       user: UserSnapshot = Depends(get_current_user)):
+    return {"days": days, "issue_types": store.top_issue_types(days=days, limit=limit, user_id=user.id)}
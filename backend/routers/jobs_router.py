@@ -0,0 +1,47 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from backend.routers.batch_router import BatchRequest
+from backend.services.job_queue import JobQueue
+
+router = APIRouter(prefix="/jobs", tags=["Analysis Jobs"])
+
+MAX_JOB_FILES = int(os.getenv("CODESENSE_JOB_MAX_FILES", "20000"))
+
+queue = JobQueue()
+
+# Handlers are plain `def`: FastAPI runs them in its thread pool, so the
+# blocking database calls never stall the event loop.
+
+@router.post("/", status_code=202)
+def submit_job(req: BatchRequest):
+    """Queue the files for background analysis and return the job id right away."""
+    if not req.files:
+        raise HTTPException(status_code=400, detail="Job must contain at least one file.")
+    if len(req.files) > MAX_JOB_FILES:
+        raise HTTPException(status_code=413, detail=f"Job exceeds {MAX_JOB_FILES} files.")
+
+    job_id = queue.submit([f.model_dump() for f in req.files])
+    return {"job_id": job_id, "status": "queued", "total_files": len(req.files)}
+
+@router.get("/{job_id}")
+def job_status(job_id: str):
+    job = queue.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return job
+
+@router.get("/{job_id}/results")
+def job_results(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """Finished files so far, in submit order (page with offset/limit)."""
+    page = queue.results(job_id, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return page
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return job
@@ -1,14 +1,88 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-from backend.services.code_analyzer import CodeAnalyzerService   # ✔ Correct class import
+from backend.services.budget import BudgetExceeded
+from backend.services.result_cache import get_default_cache
+from backend.services.executor import get_executor, ExecutorSaturated, AnalysisTimeout
+from backend.services.instrumentation import Gauge, get_metrics
+from backend.services.auth.token_cache import get_token_cache
+from backend.services.auth.password_handler import get_password_hasher
+from backend.database import pool_stats
+from backend.services.history import get_history_recorder
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
+# ---- values read from the executor and cache at scrape time ----
+def _executor_stat(name):
+    return lambda: {(): get_executor().stats()[name]}
+
+def _cache_counts():
+    stats = get_default_cache().stats()
+    return {("memory",): stats["hits"], ("disk",): stats["disk_hits"]}
+
+registry = get_metrics()
+registry.add(Gauge("codesense_executor_queue_depth", "Analysis jobs queued or running.", _executor_stat("pending")))
+registry.add(Gauge("codesense_executor_max_pending", "Queue capacity before requests get 503.", _executor_stat("max_pending")))
+registry.add(Gauge("codesense_executor_workers", "Analysis worker processes.", _executor_stat("workers")))
+registry.add(Gauge("codesense_executor_pool_replacements_total", "Worker pools killed and replaced after a stuck job.",
+                   _executor_stat("replaced"), kind="counter"))
+registry.add(Gauge("codesense_cache_hits_total", "Result cache hits.", _cache_counts, ("tier",), kind="counter"))
+registry.add(Gauge("codesense_cache_misses_total", "Result cache misses.",
+                   lambda: {(): get_default_cache().stats()["misses"]}, kind="counter"))
+registry.add(Gauge("codesense_cache_bytes", "Bytes held by the in-memory result cache.",
+                   lambda: {(): get_default_cache().stats()["bytes"]}))
+
+def _auth_cache_counts():
+    stats = get_token_cache().stats()
+    return {("hit",): stats["hits"], ("miss",): stats["misses"], ("expired",): stats["expired"]}
+
+registry.add(Gauge("codesense_auth_cache_lookups_total", "Token cache lookups by outcome.",
+                   _auth_cache_counts, ("result",), kind="counter"))
+registry.add(Gauge("codesense_auth_cache_invalidations_total", "Users whose cached tokens were dropped.",
+                   lambda: {(): get_token_cache().stats()["invalidations"]}, kind="counter"))
+registry.add(Gauge("codesense_auth_cache_entries", "Tokens held by the auth cache.",
+                   lambda: {(): get_token_cache().stats()["entries"]}))
+registry.add(Gauge("codesense_db_connections_in_use", "Database connections checked out of the pool.",
+                   lambda: {(): pool_stats()["checked_out"]}))
+def _history_counts():
+    stats = get_history_recorder().stats()
+    return {("written",): stats["written"], ("dropped",): stats["dropped"]}
+
+registry.add(Gauge("codesense_history_pending", "Analysis runs buffered for the history table.",
+                   lambda: {(): get_history_recorder().stats()["pending"]}))
+registry.add(Gauge("codesense_history_runs_total", "Analysis runs written to / dropped from history.",
+                   _history_counts, ("outcome",), kind="counter"))
+registry.add(Gauge("codesense_password_hash_queue_depth", "Password hashes queued or running.",
+                   lambda: {(): get_password_hasher().stats()["pending"]}))
+registry.add(Gauge("codesense_password_hash_rejected_total", "Logins/registrations refused with 429.",
+                   lambda: {(): get_password_hasher().stats()["rejected"]}, kind="counter"))
+
+@router.get("", response_class=PlainTextResponse)
+def exposition():
+    """Prometheus text exposition format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 class CodeRequest(BaseModel):
     code: str
     language: str | None = "python"      # ✔ allow user to choose language
 
 @router.post("/")
-def analyze_metrics(request: CodeRequest):
-    service = CodeAnalyzerService()      # ✔ no argument in constructor
-    return service.analyze(request.code, request.language)   # ✔ call with code + language
+async def analyze_metrics(request: CodeRequest):
+    """
+    Size, complexity, Halstead and maintainability metrics of Python code:
+    for the file, every function and every class (see ode_metrics).
+    Computed in the analysis process pool, under the same budgets.
+    """
+    language = (request.language or "python").lower().strip()
+    if language != "python":
+        raise HTTPException(status_code=400, detail="Metrics are only available for Python.")
+    try:
+        return await get_executor().code_metrics(request.code)
+    except SyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"Syntax error at line {e.lineno}: {e.msg}")
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Analyzer is busy, retry shortly.", headers={"Retry-After": "1"})
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
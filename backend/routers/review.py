@@ -1,11 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from backend.services.code_analyzer import CodeAnalyzerService
+from backend.services.executor import get_executor, ExecutorSaturated, AnalysisTimeout
 from backend.services.review_service import ReviewService
 
 router = APIRouter(tags=["Code Review"])
 
-analyzer = CodeAnalyzerService()
 reviewer = ReviewService()
 
 # ---------------------- Request Model ----------------------
@@ -30,8 +29,13 @@ async def review_code(req: ReviewRequest):
             detail="Invalid language. Use: python, javascript, cpp"
         )
 
-    # 1. Analyze code
-    analysis_result = analyzer.analyze(code, language)
+    # 1. Analyze code (in the worker pool)
+    try:
+        analysis_result = await get_executor().analyze(code, language)
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Analyzer is busy, retry shortly.", headers={"Retry-After": "1"})
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
 
     # 2. Build review on top of analysis
     review_result = reviewer.build_review(analysis_result)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from backend.services.executor import ExecutorSaturated, AnalysisTimeout
+from backend.services.incremental import get_incremental_analyzer
+
+router = APIRouter(prefix="/sessions", tags=["Editor Sessions"])
+
+class SessionUpdate(BaseModel):
+    code: str
+    language: str = "python"
+
+@router.post("/{document_id}")
+async def update_document(document_id: str, req: SessionUpdate):
+    """
+    Re-analyze the latest text of an open document. Only top-level
+    definitions that changed since the previous update are re-analyzed.
+    The code is not stripped, so issue lines match the editor buffer.
+    Changed definitions are analyzed in the analysis process pool.
+    """
+    language = req.language.lower().strip()
+    if language not in ["python", "javascript", "cpp", "c++"]:
+        raise HTTPException(status_code=400, detail="Invalid language. Use: python, javascript, cpp, c++")
+
+    try:
+        return await get_incremental_analyzer().update(document_id, req.code, language)
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Analyzer is busy, retry shortly.", headers={"Retry-After": "1"})
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+@router.delete("/{document_id}")
+async def close_document(document_id: str):
+    if not get_incremental_analyzer().close(document_id):
+        raise HTTPException(status_code=404, detail="Unknown session.")
+    return {"status": "closed", "document_id": document_id}
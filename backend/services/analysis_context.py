@@ -0,0 +1,34 @@
+"""
+Shared per-request analysis state for Python sources.
+
+The source is parsed exactly once; every analyzer reads the same tree
+and line list from here instead of re-parsing the text.
+Nodes get no `parent`: listeners track the scope they need themselves.
+
+Entry:
+ - AnalysisContext.from_code(code: str) -> AnalysisContext
+   (raises SyntaxError like ast.parse)
+"""
+
+import ast
+from typing import List
+
+from backend.services.ast_utils import NodeDispatcher
+
+
+class AnalysisContext:
+    def __init__(self, code: str, tree: ast.AST):
+        self.code = code
+        self.tree = tree
+        self.lines: List[str] = code.split("\n")
+
+    @classmethod
+    def from_code(cls, code: str) -> "AnalysisContext":
+        return cls(code, ast.parse(code))
+
+    def run(self, *listeners, timings=None) -> None:
+        """
+        Dispatch a single traversal of the tree to all listeners.
+        `timings` (optional Timings) gets per-listener handler costs.
+        """
+        NodeDispatcher(listeners, timings=timings).walk(self.tree)
@@ -1,6 +1,94 @@
 import ast
 
-def add_parents(tree):
-    for node in ast.walk(tree):
-        for child in ast.iter_child_nodes(node):
-            child.parent = node
+
+class NodeDispatcher:
+    """
+    Walks an AST once and fans every node out to a set of listeners.
+
+    A listener is any object exposing `visit_<NodeType>(node)` and/or
+    `leave_<NodeType>(node)` methods (plus an optional catch-all
+    `visit_node(node)`). `visit_*` runs before the node's children,
+    `leave_*` after them, so scoped rules can keep their own state.
+
+    The walk is iterative (an explicit stack, same preorder as a recursive
+    visitor), so tree depth is not bounded by the recursion limit. Per
+    node class, the handlers and the fields holding children are looked
+    up once and kept in a table; a class nobody listens to costs one dict
+    lookup. The shared expr_context leaves (the `ctx` of Name, Attribute,
+    ...) are not visited: read `node.ctx` instead.
+
+    Nodes are not annotated with a `parent`; listeners keep the scope
+    they need in visit/leave.
+
+    With `timings` (a Timings collecting rules), every handler call is
+    timed and charged to "<Listener>.<method>".
+    """
+
+    def __init__(self, listeners, timings=None):
+        self.listeners = list(listeners)
+        self.timings = timings if timings is not None and timings.rules_enabled else None
+        # node class -> (enter handlers, leave handlers, child fields)
+        self._handlers = {}
+
+    def _handler(self, listener, method):
+        fn = getattr(listener, method, None)
+        if fn is None or self.timings is None:
+            return fn
+        return self.timings.timed(f"{type(listener).__name__}.{method}", fn)
+
+    def _handlers_for(self, cls):
+        handlers = self._handlers.get(cls)
+        if handlers is None:
+            name = cls.__name__
+            enter, leave = [], []
+            for listener in self.listeners:
+                generic = self._handler(listener, "visit_node")
+                if generic is not None:
+                    enter.append(generic)
+                fn = self._handler(listener, "visit_" + name)
+                if fn is not None:
+                    enter.append(fn)
+                fn = self._handler(listener, "leave_" + name)
+                if fn is not None:
+                    leave.append(fn)
+            fields = tuple(f for f in cls._fields if f != "ctx")
+            handlers = self._handlers[cls] = (tuple(enter), tuple(leave), fields)
+        return handlers
+
+    def walk(self, node):
+        table = self._handlers
+        AST = ast.AST
+        # a node is pushed to be entered; (leave handlers, node) to be left
+        stack = [node]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            node = pop()
+            if node.__class__ is tuple:
+                leave, node = node
+                for fn in leave:
+                    fn(node)
+                continue
+
+            handlers = table.get(node.__class__)
+            if handlers is None:
+                handlers = self._handlers_for(node.__class__)
+            enter, leave, fields = handlers
+            for fn in enter:
+                fn(node)
+            if leave:
+                push((leave, node))
+
+            # children go on the stack last-first, so they come off in source order
+            children = []
+            for field in fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    for item in value:
+                        if isinstance(item, AST):
+                            children.append(item)
+                elif isinstance(value, AST):
+                    children.append(value)
+            if children:
+                children.reverse()
+                stack.extend(children)
@@ -1,28 +1,60 @@
-# backend/auth/dependencies.py
+# backend/services/auth/dependencies.py
+from typing import Optional
+import asyncio
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from backend.auth.jwt_handler import decode_access_token
+from backend.services.auth.jwt_handler import decode_access_token
+from backend.services.auth.token_cache import UserSnapshot, get_token_cache, register_invalidation
 from backend.database import SessionLocal
-from sqlalchemy.orm import Session
 from backend.models.user import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# cached tokens of a user are dropped when the row changes
+register_invalidation(User)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserSnapshot:
+    """
+    The user behind a bearer token. A token seen before is answered from
+    the token cache (no signature check, no query) until its `exp`.
+    """
     token = credentials.credentials
+    cache = get_token_cache()
+    user = cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = decode_access_token(token)
         user_id = int(payload.get("sub"))
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    # a session only on a miss: cache hits never touch the pool
+    with SessionLocal() as db:
+        row = db.query(User).filter(User.id == user_id).first()
+        if not row:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = UserSnapshot.from_user(row)
+
+    cache.put(token, payload.get("exp"), user)
     return user
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Optional[UserSnapshot]:
+    """
+    Like get_current_user for routes open to anonymous callers: None
+    without a token, or with one that is invalid, expired or names a
+    deleted user. Async so anonymous calls skip the thread pool hop.
+    """
+    if credentials is None:
+        return None
+    try:
+        return await asyncio.to_thread(get_current_user, credentials)
+    except HTTPException:
+        return None
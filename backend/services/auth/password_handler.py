@@ -1,9 +1,146 @@
+"""
+Password hashing service (bcrypt through passlib).
+
+A bcrypt hash or verify costs 100-300 ms of CPU. Routes don't run it on
+the event loop or in the shared request thread pool: they await
+PasswordHasher, a small dedicated thread pool (the bcrypt C code
+releases the GIL) with a bounded queue. When the queue is full the
+caller gets HasherSaturated with a Retry-After estimate, and the route
+answers 429 instead of piling up logins in front of analysis requests.
+
+The cost factor is CODESENSE_BCRYPT_ROUNDS. Hashes made with another
+cost still verify. verify_and_update() then returns a re-hash at the
+current cost, and login stores it, so changing the cost needs no
+migration.
+
+Entry:
+ - await get_password_hasher().hash(password) -> str
+ - await get_password_hasher().verify_and_update(password, hashed) -> (bool, Optional[str])
+ - hash_password / verify_password / verify_and_update   (blocking, for scripts)
+
+Config (environment):
+ - CODESENSE_BCRYPT_ROUNDS       bcrypt cost factor (default 12)
+ - CODESENSE_HASH_WORKERS        hashing threads (default 2)
+ - CODESENSE_HASH_MAX_PENDING    queued + running hashes before 429 (default 32)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import math
+import os
+import threading
+import time
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("CODESENSE_BCRYPT_ROUNDS", "12"))
+
+# min = max = default: a hash of any other cost "needs update" and is re-hashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new hash or None). The new hash is set only when the stored one uses an old cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HasherSaturated(Exception):
+    """Raised when the hashing queue is full; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hashing is busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 context: CryptContext = pwd_context):
+        if workers is None:
+            workers = int(os.getenv("CODESENSE_HASH_WORKERS", "2"))
+        if max_pending is None:
+            max_pending = int(os.getenv("CODESENSE_HASH_MAX_PENDING", "32"))
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.context = context
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._lock = threading.Lock()
+        # moving average of one hash, seconds (for Retry-After)
+        self._avg_seconds = 0.25
+
+        self.rejected = 0
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "avg_ms": round(self._avg_seconds * 1000, 1),
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # -----------------------------------------------------
+    # Queue
+    # -----------------------------------------------------
+    def retry_after(self) -> int:
+        """Seconds until the current queue has drained, at the observed hash cost."""
+        return max(1, math.ceil(self._pending * self._avg_seconds / self.workers))
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherSaturated(self.retry_after())
+            self._pending += 1
+        try:
+            return await asyncio.wrap_future(self._pool.submit(self._timed, fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - started)
+
+
+_default_hasher: Optional[PasswordHasher] = None
+_default_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Process-wide hasher configured from the environment."""
+    global _default_hasher
+    with _default_lock:
+        if _default_hasher is None:
+            _default_hasher = PasswordHasher()
+        return _default_hasher
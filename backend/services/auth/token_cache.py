@@ -0,0 +1,160 @@
+"""
+Cache of verified access tokens -> authenticated user.
+
+Authenticated requests used to pay an HMAC verify plus a users-table
+query each. The first request with a token does both and stores a
+detached UserSnapshot; later requests with the same token are a dict
+lookup until the entry expires.
+
+ - an entry lives until the token's `exp` claim or the TTL, whichever
+   comes first, so an expired token is never accepted from the cache
+ - LRU-bounded by entry count
+ - keys are digests of the token, the raw token is not kept
+ - updating or deleting a User through the ORM drops that user's entries
+   (SQLAlchemy mapper events); bulk UPDATE/DELETE statements and other
+   processes are only caught by the TTL
+
+Entry:
+ - get_token_cache().get(token) -> Optional[UserSnapshot]
+ - get_token_cache().put(token, exp, snapshot)
+ - get_token_cache().invalidate_user(user_id)
+
+Config (environment):
+ - CODESENSE_AUTH_CACHE_SIZE   tokens kept (default 10000, 0 disables)
+ - CODESENSE_AUTH_CACHE_TTL    max seconds an entry is trusted (default 300)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set, Tuple
+import hashlib
+import os
+import threading
+import time
+
+
+class UserSnapshot(NamedTuple):
+    """Read-only copy of the User columns a request needs, not bound to a session."""
+    id: int
+    email: str
+    full_name: Optional[str]
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(user.id, user.email, user.full_name)
+
+
+class TokenCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # token digest -> (expires at, unix time; user)
+        self._entries: "OrderedDict[bytes, Tuple[float, UserSnapshot]]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.time():
+                self._drop(key)
+                self.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, exp: Optional[float], user: UserSnapshot) -> None:
+        if self.max_entries <= 0:
+            return
+        expires = time.time() + self.ttl
+        if exp is not None:
+            expires = min(expires, float(exp))
+        key = self._key(token)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, user)
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Drop every cached token of a user; returns how many."""
+        with self._lock:
+            keys = self._by_user.pop(user_id, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.expired
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _drop(self, key: bytes) -> None:
+        _, user = self._entries.pop(key)
+        keys = self._by_user.get(user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user.id]
+
+
+_default_cache: Optional[TokenCache] = None
+_default_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    """Process-wide token cache configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TokenCache(
+                max_entries=int(os.getenv("CODESENSE_AUTH_CACHE_SIZE", "10000")),
+                ttl=float(os.getenv("CODESENSE_AUTH_CACHE_TTL", "300")),
+            )
+        return _default_cache
+
+
+def _invalidate(mapper, connection, target) -> None:
+    get_token_cache().invalidate_user(target.id)
+
+
+def register_invalidation(model) -> None:
+    """Drop cached tokens of a user row when it is updated or deleted through the ORM."""
+    from sqlalchemy import event
+
+    if not event.contains(model, "after_update", _invalidate):
+        event.listen(model, "after_update", _invalidate)
+        event.listen(model, "after_delete", _invalidate)
@@ -0,0 +1,143 @@
+"""
+Batch analysis over many files in one request.
+
+Entry:
+ - analyze_batch(files: List[Dict], executor) -> Dict
+ - iter_batch(files: Iterable[Dict], executor) -> AsyncIterator[Dict]
+
+Each file is {"path", "code", "language"}. Identical (language, code)
+pairs are analyzed once and the result is shared by every path that has
+that content. Unique contents are fanned out across the executor's
+worker pool; the response holds per-file results plus aggregate scores.
+
+iter_batch is the streaming variant: it keeps at most `window` files in
+flight and yields each result as soon as it finishes, so nothing but the
+running summary is held once a result has been yielded.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio
+
+from backend.services.executor import AnalysisExecutor, AnalysisTimeout
+
+
+def normalize_language(language: str) -> str:
+    return (language or "python").lower().strip()
+
+
+async def analyze_batch(files: List[Dict[str, str]], executor: AnalysisExecutor) -> Dict[str, Any]:
+    # ---- dedupe identical contents ----
+    unique: Dict[Tuple[str, str], int] = {}
+    slots: List[int] = []
+    for f in files:
+        content = (normalize_language(f["language"]), f["code"])
+        slots.append(unique.setdefault(content, len(unique)))
+
+    # ---- fan out ----
+    outcomes = await asyncio.gather(*(
+        _analyze_one(executor, code, language) for language, code in unique
+    ))
+
+    results = []
+    summary = BatchSummary()
+    for f, slot in zip(files, slots):
+        result = {"path": f["path"], **outcomes[slot]}
+        summary.add(result)
+        results.append(result)
+
+    return {
+        "status": "success",
+        "results": results,
+        "summary": summary.as_dict(unique_files=len(unique)),
+    }
+
+
+async def iter_batch(files: Iterable[Dict[str, str]], executor: AnalysisExecutor,
+                     window: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield {"index", "path", ...result} per file in completion order, then
+    a final {"summary": ...} record. Repeated contents are served by the
+    executor's result cache rather than kept here.
+    """
+    window = window or max(1, executor.workers) * 2
+    summary = BatchSummary()
+    in_flight = set()
+
+    async def run(index: int, f: Dict[str, str]) -> Dict[str, Any]:
+        result = await _analyze_one(executor, f["code"], normalize_language(f["language"]))
+        return {"index": index, "path": f["path"], **result}
+
+    for index, f in enumerate(files):
+        if len(in_flight) >= window:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                summary.add(result)
+                yield result
+        in_flight.add(asyncio.ensure_future(run(index, f)))
+
+    while in_flight:
+        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            result = task.result()
+            summary.add(result)
+            yield result
+
+    yield {"summary": summary.as_dict()}
+
+
+async def _analyze_one(executor: AnalysisExecutor, code: str, language: str) -> Dict[str, Any]:
+    try:
+        return await executor.analyze(code, language, wait=True)
+    except AnalysisTimeout as e:
+        return {
+            "status": "error",
+            "language": language,
+            "issues": [{
+                "type": "Analysis Timeout",
+                "detail": str(e),
+                "severity": "high"
+            }],
+            "issue_count": 1,
+            "meta": {"score": 0}
+        }
+
+
+class BatchSummary:
+    """Running aggregate of per-file results (constant memory per file)."""
+
+    def __init__(self):
+        self.files = 0
+        self.failed = 0
+        self.score_total = 0
+        self.min_score: Optional[int] = None
+        self.by_severity: Dict[str, int] = {}
+        self.by_type: Dict[str, int] = {}
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.files += 1
+        if result.get("status") != "success":
+            self.failed += 1
+
+        score = result.get("meta", {}).get("score", 0)
+        self.score_total += score
+        self.min_score = score if self.min_score is None else min(self.min_score, score)
+
+        for issue in result.get("issues", []):
+            sev = (issue.get("severity") or "info").lower()
+            self.by_severity[sev] = self.by_severity.get(sev, 0) + 1
+            self.by_type[issue.get("type", "")] = self.by_type.get(issue.get("type", ""), 0) + 1
+
+    def as_dict(self, unique_files: Optional[int] = None) -> Dict[str, Any]:
+        summary = {
+            "files": self.files,
+            "failed_files": self.failed,
+            "total_issues": sum(self.by_type.values()),
+            "issues_by_severity": self.by_severity,
+            "issues_by_type": self.by_type,
+            "average_score": round(self.score_total / self.files, 2) if self.files else 0,
+            "min_score": self.min_score or 0,
+        }
+        if unique_files is not None:
+            summary["unique_files"] = unique_files
+        return summary
@@ -0,0 +1,200 @@
+"""
+Resource budgets for one analysis.
+
+A pathological upload (a megabyte of generated code, a 100k-term
+expression, deeply nested literals) must cost its sender a
+"budget_exceeded" result, not a RecursionError traceback or a worker
+stuck for everyone else.
+
+Checked before any work (deterministic, so the result is cacheable):
+ - input size in bytes and lines                    check_input(code)
+ - AST depth and node count, right after parsing    check_tree(tree)
+   (the traversals are iterative, but rules such as ast.get_docstring
+   and the pattern checks still recurse into subexpressions)
+
+Enforced while the analysis runs, in worker processes only:
+ - CPU seconds per job: RLIMIT_CPU soft limit set to (used so far +
+   budget) around each job; the kernel's SIGXCPU is turned into
+   BudgetExceeded in the analysis (repeated every second until the job
+   gives up, so a rule swallowing exceptions cannot keep it alive)
+ - memory per worker: RLIMIT_AS, so a runaway allocation raises
+   MemoryError instead of pushing the host into swap or the OOM killer
+
+A worker stuck where neither applies (inside one C call) is killed and
+replaced by the executor when the job's wall-clock timeout expires.
+
+Entry:
+ - check_input(code) / check_tree(tree)     raise BudgetExceeded
+ - budget_result(language, error) -> Dict   structured "budget_exceeded" result
+ - limit_memory()                           worker initializer
+ - with cpu_budget(): ...                   around one job in a worker
+
+Config (environment):
+ - CODESENSE_MAX_INPUT_BYTES       bytes of source (default 1 MiB)
+ - CODESENSE_MAX_INPUT_LINES       lines of source (default 50000)
+ - CODESENSE_MAX_AST_DEPTH         nesting depth of the Python AST (default 300)
+ - CODESENSE_MAX_AST_NODES         nodes of the Python AST (default 500000)
+ - CODESENSE_JOB_CPU_SECONDS       CPU seconds per job in a worker (default 20, 0 = off)
+ - CODESENSE_WORKER_MAX_MEMORY_MB  address space per worker process (default 2048, 0 = off)
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import ast
+import os
+import signal
+import threading
+
+try:
+    import resource
+except ImportError:         # not on Windows: runtime limits are skipped
+    resource = None
+
+MAX_INPUT_BYTES = int(os.getenv("CODESENSE_MAX_INPUT_BYTES", str(1024 * 1024)))
+MAX_INPUT_LINES = int(os.getenv("CODESENSE_MAX_INPUT_LINES", "50000"))
+MAX_AST_DEPTH = int(os.getenv("CODESENSE_MAX_AST_DEPTH", "300"))
+MAX_AST_NODES = int(os.getenv("CODESENSE_MAX_AST_NODES", "500000"))
+JOB_CPU_SECONDS = float(os.getenv("CODESENSE_JOB_CPU_SECONDS", "20"))
+WORKER_MAX_MEMORY = int(os.getenv("CODESENSE_WORKER_MAX_MEMORY_MB", "2048")) * 1024 * 1024
+
+# limits that depend on the machine and load, not only on the input: never cached
+RUNTIME_LIMITS = frozenset({"cpu_seconds", "memory", "worker"})
+
+
+class BudgetExceeded(Exception):
+    """`limit` names the budget; `value` is the measured amount when known."""
+
+    def __init__(self, limit: str, maximum: Any, value: Any = None, detail: Optional[str] = None):
+        if detail is None:
+            measured = f" ({value})" if value is not None else ""
+            detail = f"Input exceeds the {limit} budget of {maximum}{measured}"
+        super().__init__(detail)
+        self.limit = limit
+        self.maximum = maximum
+        self.value = value
+
+    def __reduce__(self):
+        # raised in a pool worker and re-raised in the parent
+        return type(self), (self.limit, self.maximum, self.value, str(self))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"limit": self.limit, "max": self.maximum, "value": self.value}
+
+
+def budget_result(language: str, error: BudgetExceeded) -> Dict[str, Any]:
+    return {
+        "status": "budget_exceeded",
+        "language": language,
+        "issues": [{
+            "type": "Budget Exceeded",
+            "detail": str(error),
+            "severity": "high"
+        }],
+        "issue_count": 1,
+        "meta": {"score": 0, "budget": error.as_dict()}
+    }
+
+
+# -----------------------------------------------------
+# Static limits
+# -----------------------------------------------------
+def check_input(code: str, max_bytes: int = MAX_INPUT_BYTES, max_lines: int = MAX_INPUT_LINES) -> None:
+    # a str of n characters encodes to 1..4n bytes: only encode when it could matter
+    if len(code) > max_bytes:
+        raise BudgetExceeded("input_bytes", max_bytes, len(code))
+    if len(code) * 4 > max_bytes:
+        size = len(code.encode("utf-8", "surrogatepass"))
+        if size > max_bytes:
+            raise BudgetExceeded("input_bytes", max_bytes, size)
+    lines = code.count("\n") + 1
+    if lines > max_lines:
+        raise BudgetExceeded("input_lines", max_lines, lines)
+
+
+def check_tree(tree: ast.AST, max_depth: int = MAX_AST_DEPTH, max_nodes: int = MAX_AST_NODES) -> None:
+    """Level by level (no recursion), stopping at the first level past a limit."""
+    level = [tree]
+    depth = 0
+    nodes = 0
+    while level:
+        depth += 1
+        nodes += len(level)
+        if depth > max_depth:
+            raise BudgetExceeded("ast_depth", max_depth, f">{max_depth}")
+        if nodes > max_nodes:
+            raise BudgetExceeded("ast_nodes", max_nodes, f">{max_nodes}")
+        below = []
+        append = below.append
+        for node in level:
+            for field in _child_fields(node.__class__):
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    for item in value:
+                        if isinstance(item, ast.AST):
+                            append(item)
+                elif isinstance(value, ast.AST):
+                    append(value)
+        level = below
+
+
+_fields_by_class: Dict[type, tuple] = {}
+
+
+def _child_fields(cls) -> tuple:
+    # `ctx` only ever holds the shared Load/Store/Del leaves: not worth a level
+    fields = _fields_by_class.get(cls)
+    if fields is None:
+        fields = _fields_by_class[cls] = tuple(f for f in cls._fields if f != "ctx")
+    return fields
+
+
+# -----------------------------------------------------
+# Runtime limits (worker processes)
+# -----------------------------------------------------
+def limit_memory(max_bytes: int = WORKER_MAX_MEMORY) -> None:
+    """Cap this process's address space; allocations past it raise MemoryError."""
+    if resource is None or max_bytes <= 0:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+
+
+_cpu_job: Optional[float] = None
+
+
+def _on_xcpu(signum, frame) -> None:
+    # a SIGXCPU landing after the job ended (before the limit was restored) is ignored
+    if _cpu_job is not None:
+        raise BudgetExceeded("cpu_seconds", _cpu_job, detail=f"Analysis exceeded {_cpu_job:g}s of CPU time")
+
+
+@contextmanager
+def cpu_budget(seconds: float = JOB_CPU_SECONDS):
+    """
+    Raise BudgetExceeded in the body once it has used `seconds` of CPU.
+    Only in the main thread of a POSIX process (signals are delivered
+    there); elsewhere the body runs unbounded.
+    """
+    global _cpu_job
+    if (resource is None or seconds <= 0 or not hasattr(signal, "SIGXCPU")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    # RLIMIT_CPU counts whole seconds of the process's total CPU time
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    previous = signal.signal(signal.SIGXCPU, _on_xcpu)
+    _cpu_job = seconds
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        yield
+    finally:
+        _cpu_job = None
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+        signal.signal(signal.SIGXCPU, previous)
@@ -3,38 +3,91 @@ Integrated Code Analyzer service.
 
 Entry:
  - analyze(code: str, language: str) -> Dict
+ - iter_analyze(files: Iterable[Dict]) -> Iterator[Dict]   (one result per file, lazily)
+
+Results are served from an AnalysisCache when one is passed in; bump
+ANALYZER_VERSION whenever a rule changes so cached results are dropped.
+
+Every stage is timed into a Timings (see instrumentation); with
+profile=True the cache is bypassed and the per-stage / per-rule cost
+breakdown is returned in meta["profile"].
 
 Uses:
  - PythonLinter
  - JSLinter
  - CppLinter
- - ast_utils.add_parents
+ - AnalysisContext (single parse + single traversal for Python)
 """
 
-from typing import Dict, Any
-import traceback
-import ast
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
 from backend.services.python_linter import PythonLinter
 from backend.services.js_linter import JSLinter
 from backend.services.cpp_linter import CppLinter
-from backend.services.ast_utils import add_parents
+from backend.services.analysis_context import AnalysisContext
+from backend.services.lexer import lex
+from backend.services.result_cache import AnalysisCache
+from backend.services.instrumentation import Timings, get_metrics
+from backend.services.budget import (
+    BudgetExceeded, RUNTIME_LIMITS, MAX_AST_DEPTH, WORKER_MAX_MEMORY,
+    budget_result, check_input, check_tree,
+)
 
 # NEW
-from backend.analyzers.unused_imports import detect_unused_imports
-from backend.analyzers.cyclomatic_complexity import get_function_complexity
-from backend.analyzers.comment_density import get_comment_density
+from backend.analyzers.symbol_table import SymbolTable, SymbolTableBuilder
+from backend.analyzers.cyclomatic_complexity import ComplexityCollector
+from backend.analyzers.comment_density import count_lines
+
+# Rule-set version: part of every cache key.
+ANALYZER_VERSION = "4"
 
 
 class CodeAnalyzerService:
-    def __init__(self):
+    def __init__(self, cache: Optional[AnalysisCache] = None):
         self.py_linter = PythonLinter()
         self.js_linter = JSLinter()
         self.cpp_linter = CppLinter()
+        self.cache = cache
 
-    def analyze(self, code: str, language: str) -> Dict[str, Any]:
+    def analyze(self, code: str, language: str, profile: bool = False,
+                timings: Optional[Timings] = None) -> Dict[str, Any]:
+        """
+        `timings` lets the caller collect the stage costs (the executor
+        ships them from its workers to the parent); without one they are
+        recorded in this process's metrics registry.
+        """
         language = (language or "python").lower().strip()
+        record = timings is None
+        if timings is None:
+            timings = Timings.sampled(language, profile)
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(code, language)
+            cached = None if profile else self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self._analyze(code, language, timings)
+        if key is not None and is_cacheable(result):
+            self.cache.put(key, result)
+
+        if profile:
+            result["meta"]["profile"] = timings.breakdown()
+        if record:
+            get_metrics().record(timings.export())
+        return result
+
+    def iter_analyze(self, files: Iterable[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields {"path", ...analyze result} for each {"path", "code", "language"}
+        as soon as it is analyzed, so callers can stream results without
+        holding them all.
+        """
+        for f in files:
+            yield {"path": f.get("path"), **self.analyze(f["code"], f.get("language"))}
 
+    def _analyze(self, code: str, language: str, timings: Timings) -> Dict[str, Any]:
         result = {
             "status": "success",
             "language": language,
@@ -48,11 +101,17 @@ class CodeAnalyzerService:
         }
 
         try:
+            check_input(code)
+
             # -------- PYTHON --------
             if language == "python":
                 try:
-                    tree = ast.parse(code)
-                    add_parents(tree)
+                    with timings.stage("parse"):
+                        ctx = AnalysisContext.from_code(code)
+                        check_tree(ctx.tree)
+                except RecursionError:
+                    # the parser gives up on nesting deeper than the interpreter's recursion limit
+                    raise BudgetExceeded("ast_depth", MAX_AST_DEPTH, detail="Input is nested too deeply to parse")
                 except SyntaxError as e:
                     return {
                         "status": "error",
@@ -67,53 +126,29 @@ class CodeAnalyzerService:
                         "meta": {"score": 0}
                     }
 
-                issues = self.py_linter.lint(code)
-
-                # ---- Unused imports ----
-                for name in detect_unused_imports(code):
-                    issues.append({
-                        "type": "Unused Import",
-                        "detail": f"'{name}' imported but never used",
-                        "severity": "low"
-                    })
-
-                # ---- Cyclomatic complexity ----
-                complexities = get_function_complexity(code)
-                result["meta"]["cyclomatic_complexity"] = complexities
-
-                for item in complexities:
-                    cx = item["complexity"]
-                    if cx > 20:
-                        issues.append({
-                            "type": "High Cyclomatic Complexity",
-                            "detail": f"Function '{item['name']}' has complexity = {cx}",
-                            "severity": "high"
-                        })
-                    elif cx > 10:
-                        issues.append({
-                            "type": "Moderate Cyclomatic Complexity",
-                            "detail": f"Function '{item['name']}' has complexity = {cx}",
-                            "severity": "medium"
-                        })
-
-                # ---- Comment density ----
-                density = get_comment_density(code)
-                result["meta"]["comment_density"] = float(density)
-
-                if density < 0.05:  # <5%
-                    issues.append({
-                        "type": "Low Documentation",
-                        "detail": "Very few comments found — write documentation for clarity",
-                        "severity": "medium"
-                    })
+                issues = self._analyze_python(ctx, result["meta"], timings)
 
             # -------- JAVASCRIPT --------
             elif language in ("js", "javascript"):
-                issues = self.js_linter.lint(code)
+                with timings.stage("lex"):
+                    tokens = lex(code, "javascript")
+                with timings.stage("lint"):
+                    issues = self.js_linter.lint(code, tokens, timings)
+                with timings.stage("comment_density"):
+                    lines = count_lines(code, tokens)
+                result["meta"]["comment_density"] = lines.density
+                result["meta"]["line_counts"] = lines.as_dict()
 
             # -------- C++ --------
             elif language in ("cpp", "c++"):
-                issues = self.cpp_linter.lint(code)
+                with timings.stage("lex"):
+                    tokens = lex(code, "cpp")
+                with timings.stage("lint"):
+                    issues = self.cpp_linter.lint(code, tokens, timings)
+                with timings.stage("comment_density"):
+                    lines = count_lines(code, tokens)
+                result["meta"]["comment_density"] = lines.density
+                result["meta"]["line_counts"] = lines.as_dict()
 
             # -------- unsupported --------
             else:
@@ -125,29 +160,128 @@ class CodeAnalyzerService:
 
             result["issues"] = issues
             result["issue_count"] = len(issues)
+            result["meta"]["score"] = compute_score(issues)
 
-            # ---- scoring ----
-            score = 100
-            for item in issues:
-                lvl = item.get("severity", "").lower()
-                if lvl == "low":
-                    score -= 1
-                elif lvl == "medium":
-                    score -= 3
-                elif lvl == "high":
-                    score -= 7
-
-            result["meta"]["score"] = max(0, score)
-
+        except BudgetExceeded as e:
+            return budget_result(language, e)
+        except RecursionError:
+            return budget_result(language, BudgetExceeded(
+                "ast_depth", MAX_AST_DEPTH, detail="Input is nested too deeply to analyze"))
+        except MemoryError:
+            return budget_result(language, BudgetExceeded(
+                "memory", WORKER_MAX_MEMORY, detail="Analysis ran out of its memory budget"))
         except Exception as e:
+            # no traceback in the response: it goes to every caller
             result["status"] = "error"
             result["issues"] = [{
                 "type": "Analyzer Failure",
-                "detail": str(e),
-                "trace": traceback.format_exc(),
+                "detail": f"{type(e).__name__}: {e}",
                 "severity": "high"
             }]
             result["issue_count"] = 1
             result["meta"]["score"] = 0
 
         return result
+
+    # -----------------------------------------------------
+    # PYTHON PIPELINE
+    # -----------------------------------------------------
+    def run_python_rules(self, ctx: AnalysisContext,
+                         timings: Optional[Timings] = None) -> Tuple[List[Dict], SymbolTable, List[Dict]]:
+        """
+        Runs every Python rule over one shared tree in a single traversal.
+        Returns (linter issues, symbol table, per-function complexity).
+        """
+        if timings is None:
+            timings = Timings()
+        symbols = SymbolTableBuilder()
+        complexity = ComplexityCollector(ctx.tree)
+
+        self.py_linter.reset()
+        with timings.stage("traverse"):
+            ctx.run(self.py_linter, symbols, complexity, timings=timings)
+        with timings.stage("unused_variables"):
+            issues = self.py_linter.finish(symbols.table)
+        return issues, symbols.table, complexity.results
+
+    def _analyze_python(self, ctx: AnalysisContext, meta: Dict[str, Any], timings: Timings) -> List[Dict]:
+        """Turns the facts collected by run_python_rules into issues."""
+        issues, symbols, complexities = self.run_python_rules(ctx, timings)
+
+        # ---- Unused imports ----
+        with timings.stage("unused_imports"):
+            issues.extend(unused_import_issues(symbols.unused_imports()))
+
+        # ---- Cyclomatic complexity ----
+        meta["cyclomatic_complexity"] = complexities
+        issues.extend(complexity_issues(complexities))
+
+        # ---- Comment density ----
+        with timings.stage("comment_density"):
+            lines = count_lines(ctx.code, lex(ctx.code, "python"), ctx.tree)
+        meta["comment_density"] = lines.density
+        meta["line_counts"] = lines.as_dict()
+        issues.extend(documentation_issues(lines.density))
+
+        return issues
+
+
+# -----------------------------------------------------
+# Issue builders and scoring (shared with incremental analysis)
+# -----------------------------------------------------
+def unused_import_issues(names: Iterable[str]) -> List[Dict]:
+    return [{
+        "type": "Unused Import",
+        "detail": f"'{name}' imported but never used",
+        "severity": "low"
+    } for name in names]
+
+
+def complexity_issues(complexities: List[Dict]) -> List[Dict]:
+    issues = []
+    for item in complexities:
+        cx = item["complexity"]
+        if cx > 20:
+            issues.append({
+                "type": "High Cyclomatic Complexity",
+                "detail": f"Function '{item['name']}' has complexity = {cx}",
+                "severity": "high"
+            })
+        elif cx > 10:
+            issues.append({
+                "type": "Moderate Cyclomatic Complexity",
+                "detail": f"Function '{item['name']}' has complexity = {cx}",
+                "severity": "medium"
+            })
+    return issues
+
+
+def documentation_issues(density: float) -> List[Dict]:
+    if density < 0.05:  # <5%
+        return [{
+            "type": "Low Documentation",
+            "detail": "Very few comments or docstrings found — write documentation for clarity",
+            "severity": "medium"
+        }]
+    return []
+
+
+def compute_score(issues: List[Dict]) -> int:
+    score = 100
+    for item in issues:
+        lvl = (item.get("severity") or "").lower()
+        if lvl == "low":
+            score -= 1
+        elif lvl == "medium":
+            score -= 3
+        elif lvl == "high":
+            score -= 7
+    return max(0, score)
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """Analyzer crashes and runtime budget hits are not cached; they may be transient."""
+    budget = result.get("meta", {}).get("budget")
+    if budget is not None and budget["limit"] in RUNTIME_LIMITS:
+        return False
+    return not any(issue.get("type") == "Analyzer Failure" for issue in result.get("issues", []))
@@ -1,66 +1,76 @@
 """
 Simple C++ linter (pattern-based).
 Detects common issues like 'using namespace std', raw malloc/free, header guard problems.
+
+Line rules are compiled once at import and run by the shared RuleEngine
+over the lexer's code view (strings and comments blanked out); the
+header-guard and file-size checks look at the raw buffer as a whole.
 """
 
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-class CppLinter:
-    def __init__(self):
-        pass
+from backend.services.lexer import TokenStream, lex
+from backend.services.pattern_rules import PatternRule, RuleEngine, count_lines, head
 
-    def lint(self, code: str) -> List[Dict]:
-        issues = []
-        lines = code.splitlines()
+# Patterns start with a literal (word-boundary checks are lookbehinds) so
+# the regex engine can jump between candidate positions instead of
+# trying every offset of the buffer.
+POINTER_AFTER_WORD = "|".join(rf"(?<=\w[ \t]{{{n}}}\*)" for n in range(9))
 
-        # 1. using namespace std
-        for i, line in enumerate(lines, start=1):
-            if re.search(r'\busing\s+namespace\s+std\b', line):
-                issues.append({
-                    "type": "Using namespace std",
-                    "line": i,
-                    "detail": "Avoid 'using namespace std;' in headers or global scope."
-                })
+CPP_RULES = RuleEngine([
+    # 1. using namespace std
+    PatternRule(
+        "Using namespace std",
+        r"using(?<!\wusing)[ \t]+namespace[ \t]+std\b",
+        "Avoid 'using namespace std;' in headers or global scope."
+    ),
+    # 2. malloc/free or new/delete mismatches
+    PatternRule(
+        "C allocation",
+        r"alloc(?<=[mc]alloc)(?<!\w[mc]alloc)[ \t]*\(",
+        "Prefer new/delete or smart pointers (unique_ptr/shared_ptr) in modern C++."
+    ),
+    PatternRule(
+        "Free call",
+        r"free(?<!\wfree)[ \t]*\(",
+        "Ensure matching allocation/deallocation; prefer RAII."
+    ),
+    # 3. Raw pointer usage (heuristic): word, '*', word on one line
+    PatternRule(
+        "Raw pointer",
+        r"\*(?=[ \t]*\w)(?:" + POINTER_AFTER_WORD + ")",
+        "Consider using smart pointers instead of raw pointers.",
+        exclude=r"\b(std::unique_ptr|std::shared_ptr)\b"
+    ),
+])
 
-        # 2. malloc/free or new/delete mismatches
-        for i, line in enumerate(lines, start=1):
-            if re.search(r'\bmalloc\s*\(', line) or re.search(r'\bcalloc\s*\(', line):
-                issues.append({
-                    "type": "C allocation",
-                    "line": i,
-                    "detail": "Prefer new/delete or smart pointers (unique_ptr/shared_ptr) in modern C++."
-                })
-            if re.search(r'\bfree\s*\(', line):
-                issues.append({
-                    "type": "Free call",
-                    "line": i,
-                    "detail": "Ensure matching allocation/deallocation; prefer RAII."
-                })
+INCLUDE_GUARD = re.compile(r'#ifndef\s+\w+\s*\n#define\s+\w+')
 
-        # 3. Raw pointer usage (heuristic)
-        for i, line in enumerate(lines, start=1):
-            if re.search(r'\b\w+\s*\*\s*\w+', line) and not re.search(r'\b(std::unique_ptr|std::shared_ptr)\b', line):
-                issues.append({
-                    "type": "Raw pointer",
-                    "line": i,
-                    "detail": "Consider using smart pointers instead of raw pointers."
-                })
+class CppLinter:
+    def __init__(self):
+        pass
+
+    def lint(self, code: str, tokens: Optional[TokenStream] = None, timings=None) -> List[Dict]:
+        if tokens is None:
+            tokens = lex(code, "cpp")
+        issues = CPP_RULES.scan(tokens.code_view(), timings)
+        line_count = count_lines(code)
 
         # 4. Header guard / include-guard check (heuristic)
-        if len(lines) >= 10:
-            first_lines = "\n".join(lines[:20])
-            if '#pragma once' not in first_lines and not re.search(r'#ifndef\s+\w+\s*\n#define\s+\w+', first_lines):
+        if line_count >= 10:
+            first_lines = head(code, 20)
+            if '#pragma once' not in first_lines and not INCLUDE_GUARD.search(first_lines):
                 issues.append({
                     "type": "Header guard missing",
                     "detail": "Add `#pragma once` or include guards."
                 })
 
         # 5. Long file
-        if len(lines) > 2000:
+        if line_count > 2000:
             issues.append({
                 "type": "Large file",
-                "detail": f"File has {len(lines)} lines; consider splitting modules."
+                "detail": f"File has {line_count} lines; consider splitting modules."
             })
 
         return issues
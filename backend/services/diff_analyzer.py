@@ -0,0 +1,353 @@
+"""
+Diff-scoped analysis between two commits of a local git repository.
+
+For PR review only issues on changed lines matter. Instead of analyzing
+whole files, this reads both sides straight from the object store
+(`git cat-file --batch`, one long-lived process), maps every diff hunk
+to the top-level definitions it touches, and runs the analyzers on those
+definitions only:
+
+ - Python: the file is cut into top-level chunks (see incremental.split_chunks);
+   only chunks that overlap a hunk are parsed and linted
+ - JS / C++: the file is lexed once; the pattern rules run only over the
+   top-level brace blocks that overlap a hunk
+
+Issues are reported when they sit on an added or modified line, plus
+definition-level findings (cyclomatic complexity) of touched functions.
+The same definitions are analyzed on the base side, and the difference
+in severity penalties (the weights of compute_score) is the delta score;
+negative means the change made it worse. JS/C++ rules carry no severity,
+so their changes show up in the issue delta only.
+File-level findings (comment density, header guards, file size) are left
+to full scans. A file over the input budget, or a definition over the AST
+or CPU budget (see budget), is reported as one "Budget Exceeded" issue.
+
+Entry:
+ - analyze_diff(repo, base, head) -> Dict
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import ast
+import re
+import subprocess
+
+from backend.services.code_analyzer import CodeAnalyzerService, complexity_issues, unused_import_issues
+from backend.services.budget import BudgetExceeded, budget_result, check_input, cpu_budget
+from backend.services.incremental import analyze_chunk, split_chunks
+from backend.services.js_linter import JS_RULES
+from backend.services.cpp_linter import CPP_RULES
+from backend.services.lexer import lex
+from backend.services.repo_scanner import detect_language
+
+SEVERITY_PENALTY = {"low": 1, "medium": 3, "high": 7}
+
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_BRACES = re.compile(r"[{}]")
+_IMPORT_LINE = re.compile(r"^[ \t]*(?:from[ \t]+\S+[ \t]+)?import\b.*$", re.M)
+
+
+class GitError(Exception):
+    """Raised when a git command fails (bad repo path or unknown ref)."""
+
+
+# -----------------------------------------------------
+# Git plumbing
+# -----------------------------------------------------
+def _git(repo: str, *args: str) -> bytes:
+    try:
+        return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True).stdout
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+
+
+class BlobReader:
+    """Reads `<rev>:<path>` objects through one `git cat-file --batch` process."""
+
+    def __init__(self, repo: str):
+        self.proc = subprocess.Popen(
+            ["git", "-C", repo, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def read(self, rev: str, path: str) -> Optional[str]:
+        self.proc.stdin.write(f"{rev}:{path}\n".encode("utf-8", "surrogateescape"))
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            # "<spec> missing" / "ambiguous"
+            return None
+        size = int(header[2])
+        data = self.proc.stdout.read(size)
+        self.proc.stdout.read(1)  # trailing newline
+        return data.decode("utf-8", "replace")
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FileDiff:
+    __slots__ = ("old_path", "new_path", "added", "old_touched", "new_touched")
+
+    def __init__(self, old_path: Optional[str], new_path: Optional[str]):
+        self.old_path = old_path
+        self.new_path = new_path
+        # head lines added or modified (issues are reported on these)
+        self.added: Set[int] = set()
+        # lines whose definitions are affected, per side (includes deletion points)
+        self.old_touched: Set[int] = set()
+        self.new_touched: Set[int] = set()
+
+
+def _unquote(path: str) -> str:
+    # with core.quotepath=false git only C-quotes names with control chars, `"` or `\\`
+    if path.startswith('"') and path.endswith('"'):
+        return ast.literal_eval(path)
+    return path
+
+
+def parse_diff(text: str) -> Iterator[FileDiff]:
+    """Changed line sets per file from `git diff -U0` output."""
+    current: Optional[FileDiff] = None
+    old_path = None
+    for line in text.split("\n"):
+        if line.startswith("diff --git "):
+            if current is not None:
+                yield current
+            current = None
+        elif line.startswith("--- "):
+            old_path = None if line == "--- /dev/null" else _unquote(line[4:])[2:]
+        elif line.startswith("+++ "):
+            new_path = None if line == "+++ /dev/null" else _unquote(line[4:])[2:]
+            current = FileDiff(old_path, new_path)
+        elif line.startswith("@@") and current is not None:
+            m = _HUNK.match(line)
+            if not m:
+                continue
+            old_start, old_count = int(m.group(1)), int(m.group(2) or 1)
+            new_start, new_count = int(m.group(3)), int(m.group(4) or 1)
+            if new_count:
+                lines = range(new_start, new_start + new_count)
+                current.added.update(lines)
+                current.new_touched.update(lines)
+            else:
+                # pure deletion: the definition around the gap is affected
+                current.new_touched.add(max(1, new_start))
+            # a pure insertion touches no base line; the base side of the
+            # definition it lands in is matched by name (see analyze_diff)
+            if old_count:
+                current.old_touched.update(range(old_start, old_start + old_count))
+    if current is not None:
+        yield current
+
+
+# -----------------------------------------------------
+# Definition-scoped analysis
+# -----------------------------------------------------
+def _overlaps(start: int, end: int, lines: Set[int]) -> bool:
+    if end - start < len(lines):
+        return any(n in lines for n in range(start, end + 1))
+    return any(start <= n <= end for n in lines)
+
+
+def _header(text: str) -> str:
+    """The key matching a definition across both sides: its first non-decorator line."""
+    for line in text.split("\n"):
+        line = line.strip()
+        if line and not line.startswith("@"):
+            return line
+    return ""
+
+
+def _python_definitions(analyzer: CodeAnalyzerService, code: str, touched: Set[int],
+                        names: Set[str]) -> Tuple[List[Dict], List[Tuple[int, int]], Set[str]]:
+    """Issues of the top-level chunks overlapping `touched` or headed by `names`."""
+    issues: List[Dict] = []
+    spans = []
+    headers = set()
+    imported: List[str] = []
+    for offset, text in split_chunks(code):
+        start = offset + 1
+        end = offset + max(1, text.count("\n") + (0 if text.endswith("\n") else 1))
+        header = _header(text)
+        if not _overlaps(start, end, touched) and header not in names:
+            continue
+        facts = analyze_chunk(analyzer, text)
+        spans.append((start, end))
+        headers.add(header)
+        issues.extend({**issue, "line": issue["line"] + offset} for issue in facts.issues)
+        for item in complexity_issues(facts.complexity):
+            issues.append({**item, "line": start})
+        issues.extend({**item, "line": start} for item in unused_import_issues(facts.nested_unused_imports))
+        imported.extend(name for name, is_future in facts.module_imports.items() if not is_future)
+
+    if imported:
+        # whether a module-level import is used depends on the whole file; a
+        # name that appears on no line but import lines (strings count, for
+        # `__all__`) is unused. A regex over the file keeps this off the AST.
+        body = _IMPORT_LINE.sub("", code)
+        for name in imported:
+            if not re.search(rf"(?<![\w.]){re.escape(name)}\b", body):
+                line = _import_line(code, name)
+                issues.extend({**item, "line": line} for item in unused_import_issues([name]))
+    return issues, spans, headers
+
+
+def _import_line(code: str, name: str) -> Optional[int]:
+    m = re.search(rf"^[ \t]*(?:from|import)\b.*(?<![\w.]){re.escape(name)}\b", code, re.M)
+    return code.count("\n", 0, m.start()) + 1 if m else None
+
+
+def _brace_blocks(view: str) -> Iterator[Tuple[int, int, int, int]]:
+    """(start line, end line, start offset, end offset) of each top-level `{...}` block."""
+    depth = 0
+    block_start = 0
+    for m in _BRACES.finditer(view):
+        if m.group() == "{":
+            if depth == 0:
+                block_start = view.rfind("\n", 0, m.start()) + 1
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                end = view.find("\n", m.end())
+                end = len(view) if end < 0 else end
+                yield (view.count("\n", 0, block_start) + 1, view.count("\n", 0, end) + 1, block_start, end)
+
+
+def _pattern_definitions(code: str, language: str, touched: Set[int],
+                         names: Set[str]) -> Tuple[List[Dict], List[Tuple[int, int]], Set[str]]:
+    """Pattern-rule issues of the top-level blocks overlapping `touched` or headed by `names`."""
+    view = lex(code, language).code_view()
+    rules = JS_RULES if language == "javascript" else CPP_RULES
+    covered: Set[int] = set()
+    issues: List[Dict] = []
+    spans = []
+    headers = set()
+
+    for start, end, begin, stop in _brace_blocks(view):
+        header = _header(view[begin:stop])
+        if not _overlaps(start, end, touched) and header not in names:
+            continue
+        spans.append((start, end))
+        headers.add(header)
+        covered.update(range(start, end + 1))
+        for issue in rules.scan(view[begin:stop]):
+            issues.append({**issue, "line": issue["line"] + start - 1})
+
+    # touched lines outside any block (top-level statements) are linted alone
+    lines = None
+    for n in sorted(touched - covered):
+        if lines is None:
+            lines = view.split("\n")
+        if n <= len(lines):
+            spans.append((n, n))
+            issues.extend({**issue, "line": n} for issue in rules.scan(lines[n - 1]))
+    return issues, spans, headers
+
+
+def _penalty(issues: List[Dict]) -> int:
+    return sum(SEVERITY_PENALTY.get((i.get("severity") or "").lower(), 0) for i in issues)
+
+
+def _scoped(analyzer: CodeAnalyzerService, code: str, language: str,
+            touched: Set[int], names: Set[str] = frozenset()):
+    try:
+        check_input(code)
+        with cpu_budget():
+            if language == "python":
+                try:
+                    return _python_definitions(analyzer, code, touched, names)
+                except SyntaxError:
+                    # a chunk that doesn't parse alone: analyze the file, keep touched lines
+                    result = analyzer.analyze(code, language)
+                    return [i for i in result["issues"] if i.get("line") in touched], [], set()
+            return _pattern_definitions(code, language, touched, names)
+    except BudgetExceeded as e:
+        # reported on the file as a whole, like a full analysis would
+        return budget_result(language, e)["issues"], [], set()
+
+
+# -----------------------------------------------------
+# Entry
+# -----------------------------------------------------
+def analyze_diff(repo: str, base: str, head: str,
+                 analyzer: Optional[CodeAnalyzerService] = None) -> Dict[str, Any]:
+    analyzer = analyzer or CodeAnalyzerService()
+    base_sha = _git(repo, "rev-parse", "--verify", f"{base}^{{commit}}").decode().strip()
+    head_sha = _git(repo, "rev-parse", "--verify", f"{head}^{{commit}}").decode().strip()
+    diff = _git(repo, "-c", "core.quotepath=false", "diff", "--no-color", "--no-ext-diff",
+                "-U0", "-M", base_sha, head_sha).decode("utf-8", "replace")
+
+    files = []
+    total_issues = 0
+    total_delta = 0
+    total_issue_delta = 0
+    with BlobReader(repo) as blobs:
+        for fd in parse_diff(diff):
+            language = detect_language(fd.new_path or fd.old_path or "")
+            if language is None:
+                continue
+
+            head_issues: List[Dict] = []
+            head_spans: List[Tuple[int, int]] = []
+            headers: Set[str] = set()
+            head_penalty = base_penalty = 0
+            head_count = base_count = 0
+            if fd.new_path is not None:
+                code = blobs.read(head_sha, fd.new_path)
+                if code is not None:
+                    scoped, head_spans, headers = _scoped(analyzer, code, language, fd.new_touched)
+                    head_penalty = _penalty(scoped)
+                    head_count = len(scoped)
+                    # line findings only on changed lines; definition- and file-level ones always
+                    head_issues = [i for i in scoped
+                                   if i.get("line") in fd.added or i["type"].endswith("Cyclomatic Complexity")
+                                   or i["type"] == "Budget Exceeded"]
+            if fd.old_path is not None:
+                code = blobs.read(base_sha, fd.old_path)
+                if code is not None:
+                    # the same definitions on the base side: overlapping removed
+                    # lines, or carrying the header of a touched head definition
+                    scoped = _scoped(analyzer, code, language, fd.old_touched, headers)[0]
+                    base_penalty = _penalty(scoped)
+                    base_count = len(scoped)
+
+            delta = base_penalty - head_penalty
+            total_issues += len(head_issues)
+            total_delta += delta
+            total_issue_delta += base_count - head_count
+            files.append({
+                "path": fd.new_path or fd.old_path,
+                "old_path": fd.old_path,
+                "language": language,
+                "changed_lines": len(fd.added),
+                "definitions": [{"start": s, "end": e} for s, e in head_spans],
+                "issues": sorted(head_issues, key=lambda i: i.get("line") or 0),
+                "issue_count": len(head_issues),
+                "base_penalty": base_penalty,
+                "head_penalty": head_penalty,
+                "delta_score": delta,
+                "issue_delta": base_count - head_count,
+            })
+
+    return {
+        "status": "success",
+        "base": base_sha,
+        "head": head_sha,
+        "files": files,
+        "summary": {
+            "files": len(files),
+            "issues": total_issues,
+            "delta_score": total_delta,
+            "issue_delta": total_issue_delta,
+        },
+    }
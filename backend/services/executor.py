@@ -0,0 +1,338 @@
+"""
+Process pool for CPU-bound analysis.
+
+Async routes await `AnalysisExecutor.analyze()` instead of calling
+CodeAnalyzerService.analyze() on the event loop. Parsing and linting run
+in worker processes, so one large upload no longer stalls the worker's
+other requests and a single uvicorn worker can use every core.
+
+ - warm start: every worker process is spawned and has its analyzer
+   built before the first request arrives
+ - bounded queue: more than `max_pending` in-flight jobs -> ExecutorSaturated
+   (or, with wait=True, the caller waits for a free slot)
+ - per-job timeout: a job running longer than `timeout` -> AnalysisTimeout;
+   if it was running (not just queued) its worker is stuck, so the pool's
+   processes are killed and replaced, and the other jobs caught in the
+   killed pool are resubmitted once
+ - budgets (see budget): oversized input is answered in the parent
+   without dispatch; each worker runs under a memory cap and each job
+   under a CPU-time limit, both answered with a "budget_exceeded" result
+ - result cache lookups happen in the parent, before any dispatch; the
+   disk tier is read in a thread and written by the cache's writer
+   thread, never on the event loop
+ - code_metrics() runs the /metrics computation (see ode_metrics) on the
+   same pool, queue, timeout and budgets; its errors are raised, not
+   returned. run() does the same for any module-level job (editor
+   session chunks, see incremental)
+ - stage/rule timings come back from the worker with the result and are
+   recorded in the parent's metrics registry (see instrumentation)
+
+Config (environment):
+ - CODESENSE_WORKERS       worker processes (default: CPU count, 0 = run in a thread)
+ - CODESENSE_MAX_PENDING   max queued + running jobs (default: 4 x workers)
+ - CODESENSE_JOB_TIMEOUT   seconds per job (default 30)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+
+from backend.services.code_analyzer import CodeAnalyzerService, is_cacheable
+from backend.services.ode_metrics import METRICS_VERSION, CodeMetricsService
+from backend.services.result_cache import AnalysisCache, get_default_cache
+from backend.services.instrumentation import Timings, get_metrics
+from backend.services.budget import (
+    BudgetExceeded, MAX_AST_DEPTH, WORKER_MAX_MEMORY, budget_result, check_input, check_tree, cpu_budget, limit_memory,
+)
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the job queue is full."""
+
+
+class AnalysisTimeout(Exception):
+    """Raised when a job exceeds its time budget."""
+
+
+# -----------------------------------------------------
+# Worker process side
+# -----------------------------------------------------
+_worker_analyzer: Optional[CodeAnalyzerService] = None
+_thread_analyzers = threading.local()
+
+
+def worker_analyzer() -> CodeAnalyzerService:
+    """
+    The analyzer for a job run by the executor: the pool worker's own, or
+    one per thread when jobs run inline (an analyzer keeps per-run state).
+    """
+    if _worker_analyzer is not None:
+        return _worker_analyzer
+    analyzer = getattr(_thread_analyzers, "analyzer", None)
+    if analyzer is None:
+        analyzer = _thread_analyzers.analyzer = CodeAnalyzerService()
+    return analyzer
+
+
+def _init_worker():
+    global _worker_analyzer
+    limit_memory()
+    _worker_analyzer = CodeAnalyzerService()
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _run_analysis(code: str, language: str, profile: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    try:
+        with cpu_budget():
+            return _analyze_timed(_worker_analyzer, code, language, profile)
+    except BudgetExceeded as e:
+        # raised by SIGXCPU outside the analyzer's own handler (e.g. while timing)
+        return budget_result(language, e), Timings(language).export()
+
+
+def _analyze_timed(analyzer: CodeAnalyzerService, code: str, language: str,
+                   profile: bool) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(result, exported timings) so the parent can record the worker's costs."""
+    timings = Timings.sampled(language, profile)
+    result = analyzer.analyze(code, language, profile=profile, timings=timings)
+    return result, timings.export()
+
+
+def _run_metrics(code: str) -> Dict[str, Any]:
+    with cpu_budget():
+        return _code_metrics(code)
+
+
+def _code_metrics(code: str) -> Dict[str, Any]:
+    """CodeMetricsService(code).analyze(); SyntaxError and BudgetExceeded propagate."""
+    try:
+        service = CodeMetricsService(code)
+    except RecursionError:
+        raise BudgetExceeded("ast_depth", MAX_AST_DEPTH, detail="Input is nested too deeply to parse")
+    check_tree(service.tree)
+    try:
+        return service.analyze()
+    except RecursionError:
+        raise BudgetExceeded("ast_depth", MAX_AST_DEPTH, detail="Input is nested too deeply to analyze")
+    except MemoryError:
+        raise BudgetExceeded("memory", WORKER_MAX_MEMORY, detail="Analysis ran out of its memory budget")
+
+
+# -----------------------------------------------------
+# Parent side
+# -----------------------------------------------------
+class AnalysisExecutor:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 timeout: Optional[float] = None, cache: Optional[AnalysisCache] = None):
+        if workers is None:
+            workers = int(os.getenv("CODESENSE_WORKERS", str(os.cpu_count() or 1)))
+        if max_pending is None:
+            max_pending = int(os.getenv("CODESENSE_MAX_PENDING", str(max(1, workers) * 4)))
+        if timeout is None:
+            timeout = float(os.getenv("CODESENSE_JOB_TIMEOUT", "30"))
+
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.cache = cache
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # bumped whenever the pool is replaced; jobs remember the generation they ran on
+        self._generation = 0
+        self._inline: Optional[CodeAnalyzerService] = None
+        self._pending = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+        self.replaced = 0
+
+    # -----------------------------------------------------
+    # Lifecycle
+    # -----------------------------------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._pool is not None or self._inline is not None:
+                return
+            if self.workers <= 0:
+                self._inline = CodeAnalyzerService()
+                return
+
+            self._pool = self._new_pool()
+            # warm start: force every worker to spawn and import the analyzers now
+            warm = [self._pool.submit(_warm_up) for _ in range(self.workers)]
+            for future in warm:
+                future.result()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def _replace_pool(self, generation: int) -> None:
+        """
+        Kill the workers of pool `generation` and start a fresh pool (its
+        workers spawn on demand, so the event loop is not blocked). A no-op
+        if that pool was already replaced by another caller.
+        """
+        with self._lock:
+            if self._pool is None or generation != self._generation:
+                return
+            old = self._pool
+            self._pool = self._new_pool()
+            self._generation += 1
+            self.replaced += 1
+        # ProcessPoolExecutor cannot cancel a running call; its workers are in _processes
+        for proc in list((getattr(old, "_processes", None) or {}).values()):
+            proc.kill()
+        old.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._inline = None
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    async def analyze(self, code: str, language: str, wait: bool = False,
+                      profile: bool = False) -> Dict[str, Any]:
+        """
+        Analyze one source in the pool. When the queue is full, raise
+        ExecutorSaturated, or wait for a slot if `wait` is set (batch jobs).
+        `profile` bypasses the cache and adds meta["profile"].
+        """
+        language = (language or "python").lower().strip()
+        metrics = get_metrics()
+
+        try:
+            # before hashing or shipping a huge input anywhere
+            check_input(code)
+        except BudgetExceeded as e:
+            return budget_result(language, e)
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(code, language)
+            cached = None if profile else await self.cache.aget(key)
+            if cached is not None:
+                return cached
+
+        started = time.perf_counter()
+        try:
+            result, timings = await self._run(wait, _run_analysis, self._analyze_inline, code, language, profile)
+        except BudgetExceeded as e:
+            # the worker died on this input
+            result, timings = budget_result(language, e), Timings(language).export()
+
+        metrics.job_latency.observe(time.perf_counter() - started, language)
+        metrics.record(timings)
+
+        if key is not None and is_cacheable(result):
+            # the profile describes this run only
+            meta = {k: v for k, v in result.get("meta", {}).items() if k != "profile"}
+            self.cache.put(key, {**result, "meta": meta})
+        return result
+
+    async def code_metrics(self, code: str) -> Dict[str, Any]:
+        """
+        Code metrics of Python `code` in the pool (see ode_metrics), served
+        from the result cache when the same source was measured before.
+        Raises SyntaxError, BudgetExceeded, ExecutorSaturated or AnalysisTimeout.
+        """
+        check_input(code)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(code, "python", namespace=f"metrics/{METRICS_VERSION}")
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+
+        result = await self._run(False, _run_metrics, _code_metrics, code)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    async def run(self, job, *args):
+        """
+        Run a module-level `job(*args)` in the pool (in a thread without
+        workers) under analyze()'s queue bound and timeout. Its return
+        value and exceptions come back as they are.
+        """
+        return await self._run(False, job, job, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "timeout": self.timeout,
+            "replaced": self.replaced,
+        }
+
+    async def _run(self, wait: bool, job, inline_job, *args):
+        """Run `job(*args)` in the pool (`inline_job` without workers) once a queue slot is free."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        if self._slots.locked() and not wait:
+            get_metrics().rejected.inc()
+            raise ExecutorSaturated(f"{self._pending} analysis jobs already queued")
+
+        self.start()
+        async with self._slots:
+            self._pending += 1
+            try:
+                return await self._submit(job, inline_job, *args)
+            finally:
+                self._pending -= 1
+
+    def _analyze_inline(self, code: str, language: str, profile: bool):
+        return _analyze_timed(self._inline, code, language, profile)
+
+    async def _submit(self, job, inline_job, *args):
+        if self._pool is None:
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(inline_job, *args), self.timeout)
+            except asyncio.TimeoutError:
+                get_metrics().timeouts.inc()
+                raise AnalysisTimeout(f"Analysis exceeded {self.timeout:g}s")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        for attempt in range(2):
+            pool, generation = self._pool, self._generation
+            future = pool.submit(job, *args)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                get_metrics().timeouts.inc()
+                if future.running():
+                    # stuck inside one C call, past its CPU budget: only a kill stops it
+                    self._replace_pool(generation)
+                raise AnalysisTimeout(f"Analysis exceeded {self.timeout:g}s")
+            except BrokenProcessPool:
+                # a worker died: killed by a replace (retry on the new pool) or by this input
+                self._replace_pool(generation)
+        raise BudgetExceeded("worker", "1 crash", detail="The analysis worker died twice on this input")
+
+
+_default_executor: Optional[AnalysisExecutor] = None
+
+
+def get_executor() -> AnalysisExecutor:
+    """Process-wide executor configured from the environment."""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = AnalysisExecutor(cache=get_default_cache())
+    return _default_executor
@@ -0,0 +1,303 @@
+"""
+Analysis history: score and issue trends per file and per user.
+
+The analyze route hands every result to HistoryRecorder.record(), which
+reduces it to one compact analysis_history row (score, issue counts by
+severity, complexity summary, content hash) plus one analysis_issue_counts
+row per (issue type, severity) and appends those to an in-memory buffer;
+the result itself is not kept. A background thread drains the buffer
+every few seconds, or as soon as a batch is full, and writes the batch
+with bulk_insert() in one transaction. Nothing on the request path
+touches the database.
+
+History is best effort: when the database falls behind and the buffer
+is full, the oldest unwritten runs are dropped and counted, and a
+failed batch is counted and discarded. Runs still buffered when the
+process dies are lost.
+
+Queries read index ranges: (path | user_id, created_at) for trends, and
+(created_at, issue_type) for issue rankings, so their cost follows the
+rows in the requested window, not the size of the table.
+
+Entry:
+ - get_history_recorder().record(result, code, language, path, user_id)
+ - HistoryStore().score_trend(path=..., user_id=..., days, bucket) -> List[Dict]
+ - HistoryStore().top_issue_types(days, limit, user_id) -> List[Dict]
+ - HistoryStore().runs(path=..., user_id=..., limit) -> List[Dict]
+
+Config (environment):
+ - CODESENSE_HISTORY               record analyze results (default 1, 0 disables)
+ - CODESENSE_HISTORY_BATCH         runs per write (default 500)
+ - CODESENSE_HISTORY_INTERVAL      max seconds a run waits in the buffer (default 2)
+ - CODESENSE_HISTORY_MAX_PENDING   buffered runs before the oldest are dropped (default 50000)
+"""
+
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import desc, func, select
+
+from backend.database import SessionLocal, bulk_insert
+from backend.models.history import AnalysisIssueCount, AnalysisRecord
+
+BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def content_hash(code: str) -> str:
+    return hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def summarize(result: Dict[str, Any], digest: str, language: str, path: Optional[str],
+              user_id: Optional[int], created_at: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """(analysis_history row, analysis_issue_counts rows) for one analyze result."""
+    issues = result.get("issues") or []
+    meta = result.get("meta") or {}
+    by_severity = Counter((issue.get("severity") or "").lower() for issue in issues)
+    by_type = Counter((issue.get("type") or "Unknown", issue.get("severity")) for issue in issues)
+
+    complexities = [item["complexity"] for item in meta.get("cyclomatic_complexity") or ()]
+    record = {
+        "created_at": created_at,
+        "user_id": user_id,
+        "path": path,
+        "language": language,
+        "content_hash": digest,
+        "score": int(meta.get("score") or 0),
+        "issue_count": len(issues),
+        "high_issues": by_severity["high"],
+        "medium_issues": by_severity["medium"],
+        "low_issues": by_severity["low"],
+        "function_count": len(complexities) if language == "python" else None,
+        "max_complexity": max(complexities) if complexities else None,
+        "avg_complexity": round(sum(complexities) / len(complexities), 2) if complexities else None,
+        "issue_types": json.dumps(Counter(t for t, _ in by_type.elements()), separators=(",", ":")),
+    }
+    counts = [{
+        "created_at": created_at,
+        "user_id": user_id,
+        "issue_type": issue_type,
+        "severity": severity,
+        "count": count,
+    } for (issue_type, severity), count in by_type.items()]
+    return record, counts
+
+
+# -----------------------------------------------------
+# Writer
+# -----------------------------------------------------
+class HistoryRecorder:
+    def __init__(self, session_factory=SessionLocal, batch_size: Optional[int] = None,
+                 interval: Optional[float] = None, max_pending: Optional[int] = None):
+        if batch_size is None:
+            batch_size = int(os.getenv("CODESENSE_HISTORY_BATCH", "500"))
+        if interval is None:
+            interval = float(os.getenv("CODESENSE_HISTORY_INTERVAL", "2"))
+        if max_pending is None:
+            max_pending = int(os.getenv("CODESENSE_HISTORY_MAX_PENDING", "50000"))
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+
+        # (analysis_history row, analysis_issue_counts rows) per run
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.last_error: Optional[str] = None
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    def record(self, result: Dict[str, Any], code: str, language: str,
+               path: Optional[str] = None, user_id: Optional[int] = None) -> None:
+        """Buffer one run; never blocks on the database."""
+        # summarize now so the buffer holds a few scalars instead of the result and source
+        run = summarize(result, content_hash(code), language, path, user_id, int(time.time()))
+        with self._lock:
+            if len(self._buffer) >= self.max_pending:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(run)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread after writing what is still buffered."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write everything buffered now; returns the number of runs written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                try:
+                    written += self._write(batch)
+                except Exception as e:
+                    self.failed_batches += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "last_error": self.last_error,
+        }
+
+    # -----------------------------------------------------
+    # Writer thread
+    # -----------------------------------------------------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, batch) -> int:
+        records: List[Dict[str, Any]] = []
+        counts: List[Dict[str, Any]] = []
+        for record, issue_counts in batch:
+            records.append(record)
+            counts.extend(issue_counts)
+        with self.session_factory() as db:
+            bulk_insert(db, AnalysisRecord, records)
+            bulk_insert(db, AnalysisIssueCount, counts)
+            db.commit()
+        self.written += len(records)
+        return len(records)
+
+
+_default_recorder: Optional[HistoryRecorder] = None
+_default_lock = threading.Lock()
+
+
+def history_enabled() -> bool:
+    return os.getenv("CODESENSE_HISTORY", "1") != "0"
+
+
+def get_history_recorder() -> HistoryRecorder:
+    """Process-wide recorder configured from the environment."""
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = HistoryRecorder()
+        return _default_recorder
+
+
+# -----------------------------------------------------
+# Queries
+# -----------------------------------------------------
+class HistoryStore:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def score_trend(self, path: Optional[str] = None, user_id: Optional[int] = None,
+                    days: int = 90, bucket: str = "day") -> List[Dict[str, Any]]:
+        """Score per time bucket (avg/min/max and run count) for a file, a user or everything."""
+        seconds = BUCKETS[bucket]
+        since = int(time.time()) - days * 86400
+        slot = (AnalysisRecord.created_at // seconds).label("slot")
+        query = (
+            select(slot, func.count(), func.avg(AnalysisRecord.score),
+                   func.min(AnalysisRecord.score), func.max(AnalysisRecord.score))
+            .where(*self._scope(AnalysisRecord, path, user_id), AnalysisRecord.created_at >= since)
+            .group_by(slot)
+            .order_by(slot)
+        )
+        with self.session_factory() as db:
+            rows = db.execute(query).all()
+        return [{
+            "bucket_start": int(s) * seconds,
+            "runs": runs,
+            "avg_score": round(float(avg), 2),
+            "min_score": low,
+            "max_score": high,
+        } for s, runs, avg, low, high in rows]
+
+    def top_issue_types(self, days: int = 7, limit: int = 10,
+                        user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        since = int(time.time()) - days * 86400
+        total = func.sum(AnalysisIssueCount.count).label("total")
+        query = (
+            select(AnalysisIssueCount.issue_type, total)
+            .where(AnalysisIssueCount.created_at >= since)
+            .group_by(AnalysisIssueCount.issue_type)
+            .order_by(desc(total), AnalysisIssueCount.issue_type)
+            .limit(limit)
+        )
+        if user_id is not None:
+            query = query.where(AnalysisIssueCount.user_id == user_id)
+        with self.session_factory() as db:
+            rows = db.execute(query).all()
+        return [{"type": issue_type, "count": int(count)} for issue_type, count in rows]
+
+    def runs(self, path: Optional[str] = None, user_id: Optional[int] = None,
+             limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent runs, newest first."""
+        query = (
+            select(AnalysisRecord)
+            .where(*self._scope(AnalysisRecord, path, user_id))
+            .order_by(AnalysisRecord.created_at.desc(), AnalysisRecord.id.desc())
+            .limit(limit)
+        )
+        with self.session_factory() as db:
+            return [_record_dict(r) for r in db.execute(query).scalars()]
+
+    @staticmethod
+    def _scope(model, path: Optional[str], user_id: Optional[int]) -> list:
+        conditions = []
+        if path is not None:
+            conditions.append(model.path == path)
+        if user_id is not None:
+            conditions.append(model.user_id == user_id)
+        return conditions
+
+
+def _record_dict(r: AnalysisRecord) -> Dict[str, Any]:
+    return {
+        "id": r.id,
+        "created_at": r.created_at,
+        "user_id": r.user_id,
+        "path": r.path,
+        "language": r.language,
+        "content_hash": r.content_hash,
+        "score": r.score,
+        "issue_count": r.issue_count,
+        "issues_by_severity": {"high": r.high_issues, "medium": r.medium_issues, "low": r.low_issues},
+        "issue_types": json.loads(r.issue_types) if r.issue_types else {},
+        "complexity": {
+            "functions": r.function_count,
+            "max": r.max_complexity,
+            "avg": r.avg_complexity,
+        },
+    }
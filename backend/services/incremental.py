@@ -0,0 +1,297 @@
+"""
+Incremental re-analysis for editor sessions.
+
+An editor re-sends the whole file on every keystroke pause. Instead of
+starting over, a session keyed by document id keeps the facts of every
+top-level chunk of the last version, keyed by a hash of the chunk's text.
+On update only chunks whose text changed are parsed and run through the
+Python rules (PythonLinter, symbol table, complexity, comment density);
+the rest are reused and everything is merged into one result identical
+to CodeAnalyzerService.analyze().
+
+Entry:
+ - await IncrementalAnalyzer.update(document_id, code, language) -> Dict
+ - IncrementalAnalyzer.close(document_id) -> bool
+
+Sessions live in the API process; the changed chunks of an update are
+parsed and linted in the AnalysisExecutor's pool as one job, so a large
+document only holds its own request, and the job gets the executor's
+queue bound and wall-clock timeout. Other languages, and the fallback
+below, go through AnalysisExecutor.analyze().
+
+Chunks:
+A chunk starts at a column-0 `def`, `async def`, `class` or decorator
+line; decorators stay with the definition they decorate and module-level
+statements stay with the chunk above them. Every rule except unused
+imports is local to a top-level definition, so a chunk's issues depend
+only on its own text (line numbers are stored relative to the chunk).
+Unused imports are resolved at merge time from each chunk's module-level
+imports and the names it reads.
+
+A boundary that falls inside a string or a bracket leaves a chunk that
+does not parse on its own; the update then falls back to a full analysis.
+
+Budgets (see budget) apply as in a full analysis: input size on the whole
+document before any dispatch, AST depth and size on every parsed chunk.
+The chunk job runs on a pool worker's main thread, so it also gets the
+per-job CPU budget and the worker's memory cap; the executor's timeout
+kills a worker stuck past both. With CODESENSE_WORKERS=0 jobs run in a
+thread, where only the static limits and the timeout hold.
+
+Config (environment):
+ - CODESENSE_MAX_SESSIONS   editor sessions kept in memory (default 256)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast
+import hashlib
+import os
+import re
+import threading
+
+from backend.services.analysis_context import AnalysisContext
+from backend.services.code_analyzer import (
+    CodeAnalyzerService, complexity_issues, compute_score,
+    documentation_issues, unused_import_issues,
+)
+from backend.services.executor import AnalysisExecutor, get_executor, worker_analyzer
+from backend.services.lexer import lex
+from backend.services.budget import (
+    BudgetExceeded, MAX_AST_DEPTH, WORKER_MAX_MEMORY,
+    budget_result, check_input, check_tree, cpu_budget,
+)
+from backend.analyzers.comment_density import LineCounts, count_lines
+
+# a line that may open a new top-level chunk
+_CHUNK_START = re.compile(r"\n(?=@|def\b|async[ \t]+def\b|class\b)")
+
+
+class ChunkFacts:
+    """Everything the merge needs from one chunk, with chunk-relative lines."""
+
+    __slots__ = ("issues", "nested_unused_imports", "module_imports", "module_used",
+                 "exports", "complexity", "lines")
+
+    def __init__(self):
+        self.issues: List[Dict] = []
+        self.nested_unused_imports: List[str] = []
+        # module-level import name -> is a __future__ import
+        self.module_imports: Dict[str, bool] = {}
+        self.module_used: Set[str] = set()
+        self.exports: Set[str] = set()
+        self.complexity: List[Dict] = []
+        self.lines = LineCounts()
+
+
+class Session:
+    __slots__ = ("chunks", "updates")
+
+    def __init__(self):
+        self.chunks: Dict[bytes, ChunkFacts] = {}
+        self.updates = 0
+
+
+def split_chunks(code: str) -> List[Tuple[int, str]]:
+    """(first line - 1, text) for each top-level chunk; the texts concatenate to `code`."""
+    chunks = []
+    start = 0
+    line = 0
+    # True while the current chunk holds only decorators
+    decorating = code.startswith("@")
+
+    for m in _CHUNK_START.finditer(code):
+        pos = m.end()
+        is_decorator = code.startswith("@", pos)
+        if decorating:
+            if not is_decorator:
+                decorating = False
+            continue
+        chunks.append((line, code[start:pos]))
+        line += code.count("\n", start, pos)
+        start = pos
+        decorating = is_decorator
+
+    chunks.append((line, code[start:]))
+    return chunks
+
+
+def analyze_chunk(analyzer: CodeAnalyzerService, text: str) -> ChunkFacts:
+    """Parse one chunk on its own and collect its facts (raises SyntaxError, BudgetExceeded)."""
+    try:
+        ctx = AnalysisContext.from_code(text)
+    except RecursionError:
+        raise BudgetExceeded("ast_depth", MAX_AST_DEPTH, detail="Input is nested too deeply to parse")
+    check_tree(ctx.tree)
+    issues, symbols, complexities = analyzer.run_python_rules(ctx)
+
+    facts = ChunkFacts()
+    facts.issues = issues
+    facts.complexity = complexities
+    facts.exports = symbols.exported_names()
+
+    module = symbols.module
+    facts.module_used = module.used
+    for name, node in module.imports.items():
+        facts.module_imports[name] = isinstance(node, ast.ImportFrom) and node.module == "__future__"
+    for scope in symbols.scopes():
+        if scope is module:
+            continue
+        for name, node in scope.imports.items():
+            if name in scope.used:
+                continue
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                continue
+            facts.nested_unused_imports.append(name)
+
+    facts.lines = count_lines(text, lex(text, "python"), ctx.tree)
+    return facts
+
+
+def analyze_chunks(analyzer: CodeAnalyzerService, texts: List[str]) -> List[ChunkFacts]:
+    """ChunkFacts of each text (raises SyntaxError, BudgetExceeded)."""
+    try:
+        return [analyze_chunk(analyzer, text) for text in texts]
+    except RecursionError:
+        raise BudgetExceeded("ast_depth", MAX_AST_DEPTH, detail="Input is nested too deeply to analyze")
+    except MemoryError:
+        raise BudgetExceeded("memory", WORKER_MAX_MEMORY, detail="Analysis ran out of its memory budget")
+
+
+def _run_chunks(texts: List[str]) -> List[ChunkFacts]:
+    """Executor job: the changed chunks of one update, under the CPU budget."""
+    with cpu_budget():
+        return analyze_chunks(worker_analyzer(), texts)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _merge(chunks: List[Tuple[int, str, ChunkFacts]]) -> Dict[str, Any]:
+    issues: List[Dict] = []
+    module_imports: Dict[str, bool] = {}
+    used: Set[str] = set()
+    exported: Set[str] = set()
+    nested_unused: List[str] = []
+    complexities: List[Dict] = []
+    lines = LineCounts()
+
+    for offset, text, facts in chunks:
+        for issue in facts.issues:
+            issues.append({**issue, "line": issue["line"] + offset})
+        module_imports.update(facts.module_imports)
+        used |= facts.module_used
+        exported |= facts.exports
+        nested_unused.extend(facts.nested_unused_imports)
+        complexities.extend(facts.complexity)
+        lines += facts.lines
+
+    unused = [name for name, is_future in module_imports.items()
+              if name not in used and name not in exported and not is_future]
+    issues.extend(unused_import_issues(unused + nested_unused))
+    issues.extend(complexity_issues(complexities))
+
+    issues.extend(documentation_issues(lines.density))
+
+    return {
+        "status": "success",
+        "language": "python",
+        "issues": issues,
+        "issue_count": len(issues),
+        "meta": {
+            "cyclomatic_complexity": complexities,
+            "comment_density": lines.density,
+            "line_counts": lines.as_dict(),
+            "score": compute_score(issues),
+        }
+    }
+
+
+class IncrementalAnalyzer:
+    def __init__(self, executor: Optional[AnalysisExecutor] = None, max_sessions: Optional[int] = None):
+        if max_sessions is None:
+            max_sessions = int(os.getenv("CODESENSE_MAX_SESSIONS", "256"))
+        self.executor = executor or get_executor()
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        # guards the session table only; analysis runs in the executor, outside it
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    async def update(self, document_id: str, code: str, language: str) -> Dict[str, Any]:
+        """
+        Analyze the new version of a document, reusing unchanged chunks.
+        Raises ExecutorSaturated or AnalysisTimeout like the executor.
+        """
+        language = (language or "python").lower().strip()
+        if language != "python":
+            return await self.executor.analyze(code, language)
+        try:
+            check_input(code)
+        except BudgetExceeded as e:
+            return budget_result(language, e)
+
+        chunks = [(offset, text, _digest(text)) for offset, text in split_chunks(code)]
+        with self._lock:
+            session = self._session(document_id)
+            session.updates += 1
+            known = dict(session.chunks)
+
+        missing = {digest: text for _, text, digest in chunks if digest not in known}
+        if missing:
+            try:
+                analyzed = await self.executor.run(_run_chunks, list(missing.values()))
+            except SyntaxError:
+                # a chunk that doesn't parse alone: let the full pass report it
+                return await self.executor.analyze(code, language)
+            except BudgetExceeded as e:
+                return budget_result(language, e)
+            known.update(zip(missing, analyzed))
+
+        # only the current version is kept; a failed parse above leaves the old one
+        with self._lock:
+            session.chunks = {digest: known[digest] for _, _, digest in chunks}
+
+        result = _merge([(offset, text, known[digest]) for offset, text, digest in chunks])
+        result["meta"]["incremental"] = {"chunks": len(chunks), "reparsed": len(missing)}
+        return result
+
+    def close(self, document_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(document_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+            }
+
+    # -----------------------------------------------------
+    # Sessions
+    # -----------------------------------------------------
+    def _session(self, document_id: str) -> Session:
+        session = self._sessions.get(document_id)
+        if session is None:
+            session = self._sessions[document_id] = Session()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(document_id)
+        return session
+
+
+_default_incremental: Optional[IncrementalAnalyzer] = None
+_default_lock = threading.Lock()
+
+
+def get_incremental_analyzer() -> IncrementalAnalyzer:
+    """Process-wide session store configured from the environment."""
+    global _default_incremental
+    with _default_lock:
+        if _default_incremental is None:
+            _default_incremental = IncrementalAnalyzer()
+        return _default_incremental
@@ -0,0 +1,265 @@
+"""
+Hot-path timing and Prometheus metrics.
+
+Two halves:
+ - Timings: a per-analysis collector of stage and rule costs (wall and
+   CPU seconds). It is plain data, so a worker process can send it back
+   to the parent with the result.
+ - MetricsRegistry: process-wide counters, gauges and fixed-bucket
+   histograms, rendered in the Prometheus text exposition format by
+   GET /metrics.
+
+Stages (parse, traverse, lex, density, ...) are always timed: a handful
+of clock reads per analysis. Per-rule timing of Python traversal
+listeners wraps every handler call, so it only runs when a request asks
+for ?profile=1 or is picked by sampling; regex rules of the JS/C++
+linters run once per file and are always timed.
+
+Config (environment):
+ - CODESENSE_PROFILE_SAMPLE   fraction of analyses with per-rule timing (default 0.01)
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import os
+import random
+import threading
+import time
+
+PROFILE_SAMPLE = float(os.getenv("CODESENSE_PROFILE_SAMPLE", "0.01"))
+
+# seconds; analyses range from sub-millisecond to the job timeout
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Timings:
+    """Stage and rule costs of one analysis."""
+
+    __slots__ = ("language", "rules_enabled", "stages", "rules")
+
+    def __init__(self, language: str = "", rules: bool = False):
+        self.language = language
+        self.rules_enabled = rules
+        # stage -> [wall, cpu]
+        self.stages: Dict[str, List[float]] = {}
+        # rule -> [wall, cpu, calls]
+        self.rules: Dict[str, List[float]] = {}
+
+    @classmethod
+    def sampled(cls, language: str, profile: bool = False) -> "Timings":
+        return cls(language, rules=profile or random.random() < PROFILE_SAMPLE)
+
+    @contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_stage(self, name: str, wall: float, cpu: float) -> None:
+        entry = self.stages.setdefault(name, [0.0, 0.0])
+        entry[0] += wall
+        entry[1] += cpu
+
+    def add_rule(self, name: str, wall: float, cpu: float, calls: int = 1) -> None:
+        entry = self.rules.setdefault(name, [0.0, 0.0, 0])
+        entry[0] += wall
+        entry[1] += cpu
+        entry[2] += calls
+
+    def timed(self, name: str, fn: Callable) -> Callable:
+        """`fn` wrapped so every call is added to rule `name`."""
+        perf, cpu_time = time.perf_counter, time.process_time
+        entry = self.rules.setdefault(name, [0.0, 0.0, 0])
+
+        def wrapper(node):
+            wall, cpu = perf(), cpu_time()
+            fn(node)
+            entry[0] += perf() - wall
+            entry[1] += cpu_time() - cpu
+            entry[2] += 1
+
+        return wrapper
+
+    def export(self) -> Dict[str, Any]:
+        """Picklable form for crossing the process boundary."""
+        return {"language": self.language, "stages": self.stages, "rules": self.rules}
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Milliseconds per stage and rule, for `meta.profile`."""
+        def ms(value: float) -> float:
+            return round(value * 1000, 3)
+
+        return {
+            "total_wall_ms": ms(sum(w for w, _ in self.stages.values())),
+            "total_cpu_ms": ms(sum(c for _, c in self.stages.values())),
+            "stages": {name: {"wall_ms": ms(w), "cpu_ms": ms(c)}
+                       for name, (w, c) in self.stages.items()},
+            "rules": {name: {"wall_ms": ms(w), "cpu_ms": ms(c), "calls": calls}
+                      for name, (w, c, calls) in sorted(self.rules.items(), key=lambda kv: -kv[1][0])},
+        }
+
+
+# -----------------------------------------------------
+# Metric types
+# -----------------------------------------------------
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[slot] += 1
+            row[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(row)) for labels, row in self._values.items()]
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                yield (self.name + "_bucket",
+                       _labels(self.labelnames, labels, f'le="{bound:g}"'), cumulative)
+            cumulative += row[len(self.buckets)]
+            yield self.name + "_bucket", _labels(self.labelnames, labels, 'le="+Inf"'), cumulative
+            yield self.name + "_sum", _labels(self.labelnames, labels), row[-1]
+            yield self.name + "_count", _labels(self.labelnames, labels), cumulative
+
+
+class Gauge:
+    """Value read at scrape time from a callback returning {labels: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Iterable[str] = (), kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self._read = read
+
+    def samples(self):
+        for labels, value in self._read().items():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+# -----------------------------------------------------
+# Registry
+# -----------------------------------------------------
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+        self.requests = self.add(Counter(
+            "codesense_http_requests_total", "HTTP requests handled.", ("method", "route", "status")))
+        self.request_latency = self.add(Histogram(
+            "codesense_http_request_duration_seconds", "HTTP request latency.", ("method", "route")))
+
+        self.analyses = self.add(Counter(
+            "codesense_analyses_total", "Analyses run (cache misses).", ("language",)))
+        self.job_latency = self.add(Histogram(
+            "codesense_job_duration_seconds",
+            "Executor job latency, queueing included.", ("language",)))
+        self.rejected = self.add(Counter(
+            "codesense_executor_rejected_total", "Jobs refused because the queue was full."))
+        self.timeouts = self.add(Counter(
+            "codesense_executor_timeouts_total", "Jobs that exceeded the time budget."))
+
+        self.stage_wall = self.add(Histogram(
+            "codesense_stage_wall_seconds", "Wall time per analysis stage.", ("language", "stage")))
+        self.stage_cpu = self.add(Histogram(
+            "codesense_stage_cpu_seconds", "CPU time per analysis stage.", ("language", "stage")))
+        self.rule_wall = self.add(Histogram(
+            "codesense_rule_wall_seconds", "Wall time per lint rule and analysis.", ("language", "rule")))
+        self.rule_cpu = self.add(Histogram(
+            "codesense_rule_cpu_seconds", "CPU time per lint rule and analysis.", ("language", "rule")))
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    def record(self, timings: Dict[str, Any]) -> None:
+        """Add an exported Timings (see Timings.export) to the histograms."""
+        language = timings.get("language", "")
+        for stage, (wall, cpu) in timings["stages"].items():
+            self.stage_wall.observe(wall, language, stage)
+            self.stage_cpu.observe(cpu, language, stage)
+        for rule, (wall, cpu, _) in timings["rules"].items():
+            self.rule_wall.observe(wall, language, rule)
+            self.rule_cpu.observe(cpu, language, rule)
+        self.analyses.inc(language)
+
+    def render(self) -> str:
+        out = []
+        for metric in self._metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                out.append(f"{name}{labels} {value!r}")
+        return "\n".join(out) + "\n"
+
+
+_default_metrics: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry."""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = MetricsRegistry()
+        return _default_metrics
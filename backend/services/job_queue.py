@@ -0,0 +1,335 @@
+"""
+Durable analysis jobs backed by the SQLAlchemy database.
+
+Long scans don't fit in one HTTP request behind a proxy, so a client
+submits the files, gets a job id right away and polls for progress and
+results. Jobs and their files live in the `jobs` / `job_files` tables,
+so they outlive the API process and the workers.
+
+Entry:
+ - JobQueue.submit(files) -> str                 (job id)
+ - JobQueue.status(job_id) -> Optional[Dict]
+ - JobQueue.results(job_id, offset, limit) -> Optional[Dict]
+ - JobQueue.cancel(job_id) -> Optional[Dict]
+ - JobWorker(queue).run_once() -> bool           (process one job, if any)
+ - JobWorkerPool(processes).start() / .stop()
+
+Workers:
+ - claim a job with a lease (owner + expiry); a job whose lease expired
+   (worker crashed or was restarted) is claimed again by the next worker
+ - analyze the files still pending and checkpoint them in small groups:
+   each file's result is stored and its source dropped in the same
+   transaction that renews the lease, so a restarted job only redoes the
+   files of the last unfinished group
+ - stop at the next checkpoint once a job is cancelled
+ - give up on a job after MAX_ATTEMPTS leases expired without finishing
+ - analyze each file under the CPU and memory budgets of the analysis
+   workers (see budget); a file over budget gets a "budget_exceeded" result
+
+Config (environment):
+ - CODESENSE_JOB_WORKERS       worker processes started with the app (default 1, 0 = none)
+ - CODESENSE_JOB_LEASE         lease length in seconds (default 60)
+ - CODESENSE_JOB_CHECKPOINT    files per checkpoint (default 20)
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import or_, select, update
+
+from backend.database import SessionLocal, bulk_insert
+from backend.services.budget import BudgetExceeded, budget_result, cpu_budget, limit_memory
+from backend.models.job import (
+    Job, JobFile, QUEUED, RUNNING, DONE, FAILED, CANCELLED, PENDING, ANALYZED,
+)
+
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = float(os.getenv("CODESENSE_JOB_LEASE", "60"))
+CHECKPOINT_FILES = int(os.getenv("CODESENSE_JOB_CHECKPOINT", "20"))
+# a checkpoint is also written when this many seconds passed since the last one
+CHECKPOINT_SECONDS = 2.0
+
+
+class JobQueue:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    # -----------------------------------------------------
+    # Client side
+    # -----------------------------------------------------
+    def submit(self, files: List[Dict[str, str]]) -> str:
+        """Store a job and its files; returns the job id."""
+        job_id = uuid.uuid4().hex
+        with self.session_factory() as db:
+            db.add(Job(id=job_id, status=QUEUED, total_files=len(files)))
+            db.flush()
+            bulk_insert(db, JobFile, ({
+                "job_id": job_id,
+                "position": position,
+                "path": f["path"],
+                "language": (f.get("language") or "python").lower().strip(),
+                "code": f["code"],
+                "status": PENDING,
+            } for position, f in enumerate(files)))
+            db.commit()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            job = db.get(Job, job_id)
+            return _job_dict(job) if job else None
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> Optional[Dict[str, Any]]:
+        """A page of finished files (by submit order) plus the job status."""
+        with self.session_factory() as db:
+            job = db.get(Job, job_id)
+            if job is None:
+                return None
+            rows = db.execute(
+                select(JobFile.position, JobFile.path, JobFile.result)
+                .where(JobFile.job_id == job_id, JobFile.status == ANALYZED)
+                .order_by(JobFile.position)
+                .offset(offset).limit(limit)
+            ).all()
+            return {
+                **_job_dict(job),
+                "offset": offset,
+                "results": [{"index": position, "path": path, **json.loads(result)}
+                            for position, path, result in rows],
+            }
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        with self.session_factory() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_((QUEUED, RUNNING)))
+                .values(status=CANCELLED, lease_owner=None, lease_expires_at=None)
+            )
+            db.commit()
+            job = db.get(Job, job_id)
+            return _job_dict(job) if job else None
+
+    # -----------------------------------------------------
+    # Worker side
+    # -----------------------------------------------------
+    def claim(self, owner: str, lease: float = LEASE_SECONDS) -> Optional[str]:
+        """
+        Take the oldest queued job, or one whose lease expired. The
+        conditional UPDATE makes the claim safe between competing workers.
+        """
+        now = time.time()
+        claimable = or_(Job.status == QUEUED, (Job.status == RUNNING) & (Job.lease_expires_at < now))
+        with self.session_factory() as db:
+            candidates = db.execute(
+                select(Job.id, Job.attempts).where(claimable).order_by(Job.created_at, Job.id).limit(8)
+            ).all()
+            for job_id, attempts in candidates:
+                if attempts >= MAX_ATTEMPTS:
+                    db.execute(
+                        update(Job).where(Job.id == job_id, claimable)
+                        .values(status=FAILED, lease_owner=None, lease_expires_at=None,
+                                error=f"Gave up after {attempts} interrupted attempts")
+                    )
+                    db.commit()
+                    continue
+                claimed = db.execute(
+                    update(Job).where(Job.id == job_id, claimable)
+                    .values(status=RUNNING, lease_owner=owner, lease_expires_at=now + lease,
+                            attempts=Job.attempts + 1)
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id
+        return None
+
+    def pending_files(self, job_id: str, limit: int) -> List[Dict[str, Any]]:
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(JobFile.id, JobFile.path, JobFile.language, JobFile.code)
+                .where(JobFile.job_id == job_id, JobFile.status == PENDING)
+                .order_by(JobFile.position)
+                .limit(limit)
+            ).all()
+        return [{"id": i, "path": p, "language": lang, "code": code} for i, p, lang, code in rows]
+
+    def checkpoint(self, job_id: str, owner: str, results: Dict[int, Dict[str, Any]],
+                   lease: float = LEASE_SECONDS) -> bool:
+        """
+        Store finished files and renew the lease in one transaction.
+        Returns False (and stores nothing) if the job was cancelled or the
+        lease was lost to another worker.
+        """
+        with self.session_factory() as db:
+            renewed = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == owner)
+                .values(lease_expires_at=time.time() + lease, done_files=Job.done_files + len(results))
+            ).rowcount
+            if not renewed:
+                db.rollback()
+                return False
+            if results:
+                db.execute(update(JobFile), [{
+                    "id": file_id,
+                    "status": ANALYZED,
+                    "result": json.dumps(result, separators=(",", ":")),
+                    "code": None,
+                } for file_id, result in results.items()])
+            db.commit()
+            return True
+
+    def complete(self, job_id: str, owner: str) -> bool:
+        from backend.services.batch_service import BatchSummary
+
+        with self.session_factory() as db:
+            summary = BatchSummary()
+            rows = db.execute(
+                select(JobFile.result).where(JobFile.job_id == job_id, JobFile.status == ANALYZED)
+                .execution_options(yield_per=500)
+            )
+            for (result,) in rows:
+                summary.add(json.loads(result))
+
+            done = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == owner)
+                .values(status=DONE, lease_owner=None, lease_expires_at=None,
+                        summary=json.dumps(summary.as_dict()))
+            ).rowcount
+            db.commit()
+            return bool(done)
+
+    def fail(self, job_id: str, owner: str, error: str) -> None:
+        with self.session_factory() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == owner)
+                .values(status=FAILED, lease_owner=None, lease_expires_at=None, error=error)
+            )
+            db.commit()
+
+
+def _job_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total_files": job.total_files,
+        "done_files": job.done_files,
+        "attempts": job.attempts,
+        "error": job.error,
+        "summary": json.loads(job.summary) if job.summary else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+# -----------------------------------------------------
+# Worker
+# -----------------------------------------------------
+class JobWorker:
+    def __init__(self, queue: Optional[JobQueue] = None, analyzer=None, owner: Optional[str] = None,
+                 checkpoint_files: int = CHECKPOINT_FILES, lease: float = LEASE_SECONDS):
+        if analyzer is None:
+            from backend.services.code_analyzer import CodeAnalyzerService
+            from backend.services.result_cache import get_default_cache
+            analyzer = CodeAnalyzerService(cache=get_default_cache())
+        self.queue = queue or JobQueue()
+        self.analyzer = analyzer
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.checkpoint_files = checkpoint_files
+        self.lease = lease
+
+    def run_once(self) -> bool:
+        """Claim and process one job. Returns False when there was nothing to do."""
+        job_id = self.queue.claim(self.owner, self.lease)
+        if job_id is None:
+            return False
+        try:
+            if self._process(job_id):
+                self.queue.complete(job_id, self.owner)
+        except Exception as e:
+            self.queue.fail(job_id, self.owner, f"{type(e).__name__}: {e}")
+        return True
+
+    def run_forever(self, stop=None, poll_interval: float = 1.0) -> None:
+        while stop is None or not stop.is_set():
+            if not self.run_once():
+                if stop is not None:
+                    stop.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+
+    def _process(self, job_id: str) -> bool:
+        """Analyze the job's pending files; False if it was cancelled or taken over."""
+        while True:
+            files = self.queue.pending_files(job_id, self.checkpoint_files)
+            if not files:
+                return True
+
+            results: Dict[int, Dict[str, Any]] = {}
+            started = time.monotonic()
+            for f in files:
+                results[f["id"]] = self._analyze_file(f)
+                if time.monotonic() - started > CHECKPOINT_SECONDS:
+                    break
+            if not self.queue.checkpoint(job_id, self.owner, results, self.lease):
+                return False
+
+    def _analyze_file(self, f: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            with cpu_budget():
+                return self.analyzer.analyze(f["code"], f["language"])
+        except BudgetExceeded as e:
+            return budget_result(f["language"], e)
+
+
+def _worker_main(stop) -> None:
+    from backend.database import init_db
+
+    limit_memory()
+    init_db()
+    JobWorker().run_forever(stop)
+
+
+class JobWorkerPool:
+    """Background worker processes started with the API (see app startup)."""
+
+    def __init__(self, processes: Optional[int] = None):
+        if processes is None:
+            processes = int(os.getenv("CODESENSE_JOB_WORKERS", "1"))
+        self.processes = processes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._procs: List[Any] = []
+
+    def start(self) -> None:
+        if self._procs:
+            return
+        for _ in range(self.processes):
+            proc = self._ctx.Process(target=_worker_main, args=(self._stop,), daemon=True)
+            proc.start()
+            self._procs.append(proc)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+
+
+_default_pool: Optional[JobWorkerPool] = None
+
+
+def get_job_workers() -> JobWorkerPool:
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = JobWorkerPool()
+    return _default_pool
@@ -1,42 +1,42 @@
 """
 Simple JavaScript linter (pattern-based).
 Detects common bad practices such as var usage, missing semicolons, and unused variables.
-"""
 
-import re
+Rules are compiled once at import and run by the shared RuleEngine over
+the lexer's code view, so strings, template literals and comments never
+match a rule.
+"""
 
-class JSLinter:
-    def lint(self, code: str):
-        issues = []
-        lines = code.splitlines()
+from typing import Optional
 
-        # 1. Detect 'var'
-        for i, line in enumerate(lines, start=1):
-            if "var " in line:
-                issues.append({
-                    "type": "Use of var",
-                    "line": i,
-                    "detail": "Avoid 'var'. Use 'let' or 'const' instead."
-                })
+from backend.services.lexer import TokenStream, lex
+from backend.services.pattern_rules import PatternRule, LineEndRule, RuleEngine
 
-        # 2. Detect missing semicolons (very simple heuristic)
-        for i, line in enumerate(lines, start=1):
-            stripped = line.strip()
-            if stripped and not stripped.endswith(";") and stripped not in ["{", "}", ""]:
-                if not stripped.startswith("//") and not stripped.endswith("{") and not stripped.endswith("}"):
-                    issues.append({
-                        "type": "Missing semicolon",
-                        "line": i,
-                        "detail": "Possible missing semicolon at end of line."
-                    })
+JS_RULES = RuleEngine([
+    # 1. Detect 'var'
+    PatternRule(
+        "Use of var",
+        r"var(?<![\w$]var)(?=\s)",
+        "Avoid 'var'. Use 'let' or 'const' instead."
+    ),
+    # 2. Detect missing semicolons (very simple heuristic):
+    #    last non-blank code char is not ; { } (comment-only lines are blank in the view)
+    LineEndRule(
+        "Missing semicolon",
+        "Possible missing semicolon at end of line.",
+        terminators=";{}"
+    ),
+    # 3. Detect console.log usage
+    PatternRule(
+        "Debug log",
+        r"console(?<![\w$]console)\.log(?![\w$])",
+        "Avoid leaving console.log in production code."
+    ),
+])
 
-        # 3. Detect console.log usage
-        for i, line in enumerate(lines, start=1):
-            if "console.log" in line:
-                issues.append({
-                    "type": "Debug log",
-                    "line": i,
-                    "detail": "Avoid leaving console.log in production code."
-                })
 
-        return issues
+class JSLinter:
+    def lint(self, code: str, tokens: Optional[TokenStream] = None, timings=None):
+        if tokens is None:
+            tokens = lex(code, "javascript")
+        return JS_RULES.scan(tokens.code_view(), timings)
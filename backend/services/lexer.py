@@ -0,0 +1,186 @@
+"""
+Lightweight lexer for JavaScript, C++ and Python sources.
+
+lex(code, language) runs one master regex over the buffer and returns a
+TokenStream: parallel `array` columns (kind, start, end) that every
+JS/C++ rule and get_comment_density share, so a file is tokenized once
+per request.
+
+Token kinds:
+ - COMMENT   // line and /* block */ comments (Python: # comments)
+ - STRING    "..." and '...' literals (C++ raw strings R"d(...)d" too;
+             Python triple-quoted strings, whose prefix letters stay in
+             the CODE run before them; JavaScript /regex/ literals)
+ - TEMPLATE  JavaScript `template literals`; an unterminated one is
+             not a template, its backtick stays in the CODE run
+ - PREPROC   C++ preprocessor lines, including \\-continuations
+ - CODE      a run of identifiers, numbers, punctuation and whitespace
+
+Identifiers and punctuation are kept as CODE runs instead of one token
+each: rules match them through code_view(), where every string, template
+and comment is blanked out, so `var ` in a string or `*` in a comment no
+longer trigger a rule.
+
+JavaScript: a `/` that is not a comment opens a regex literal where an
+expression can start: at the beginning of the input, after an operator
+or opening punctuation, or after a keyword such as `return`/`typeof`.
+Anywhere else (after a name, a number, a literal or a closing bracket)
+it is division.
+"""
+
+from array import array
+from typing import Iterator, Set, Tuple
+import re
+
+CODE, COMMENT, STRING, TEMPLATE, PREPROC = range(5)
+
+_COMMENT = r"(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))"
+_STRING = r"(?P<string>\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?)"
+_TEMPLATE = r"(?P<template>`(?:\\.|[^`\\])*`)"
+_RAW_STRING = r"(?P<raw>R\"(?P<delim>[^()\\\s]{0,16})\(.*?\)(?P=delim)\")"
+# Python: triple-quoted strings first; a backslash escapes any character
+# (a newline too), which also holds for raw strings as far as finding the end goes
+_PY_STRING = (r"(?P<string>'''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*(?:'''|\Z)"
+              r'|"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*(?:"""|\Z)'
+              r"|\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?)")
+# a '#' that starts a line (or is the first thing in the file)
+_PREPROC = r"(?P<preproc>(?:\A|\n)[ \t]*\#(?:\\\n|[^\n])*)"
+
+_PATTERNS = {
+    "javascript": re.compile("|".join([
+        _COMMENT, _STRING, _TEMPLATE,
+        r"(?P<code>[^\"'`/]+|[/`])",
+    ]), re.DOTALL),
+    "cpp": re.compile("|".join([
+        _COMMENT, _RAW_STRING, _STRING, _PREPROC,
+        # a run stops before a newline that leads into a preprocessor line
+        r"(?P<code>(?:[^\"'/#\nR]+|R(?!\")|\n(?![ \t]*\#))+|/|\#)",
+    ]), re.DOTALL),
+    "python": re.compile("|".join([
+        r"(?P<comment>\#[^\n]*)", _PY_STRING,
+        r"(?P<code>[^\"'\#]+)",
+    ]), re.DOTALL),
+}
+_PATTERNS["js"] = _PATTERNS["javascript"]
+_PATTERNS["c++"] = _PATTERNS["cpp"]
+
+# JavaScript regex literals: a character class may hold an unescaped `/`
+_JS_REGEX = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*")
+# a `/` after code ending in one of these opens a regex literal
+_REGEX_AFTER_PUNCT = frozenset("(,=:[!&|?{};+-*/%<>~^")
+_REGEX_AFTER_WORD = re.compile(
+    r"(?:^|[^\w$])(?:return|typeof|instanceof|in|of|new|delete|void|throw|case|do|else|yield|await)\Z")
+
+_KINDS = {"code": CODE, "comment": COMMENT, "string": STRING, "raw": STRING,
+          "template": TEMPLATE, "preproc": PREPROC}
+_NOT_NEWLINE = re.compile(r"[^\n]")
+
+
+class TokenStream:
+    __slots__ = ("code", "kinds", "starts", "ends", "_view")
+
+    def __init__(self, code: str):
+        self.code = code
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self._view = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        return zip(self.kinds, self.starts, self.ends)
+
+    def code_view(self) -> str:
+        """
+        The source with comments, strings and template literals replaced
+        by spaces. Newlines and offsets are preserved, so line numbers
+        computed on the view match the original text.
+        """
+        if self._view is None:
+            code = self.code
+            pieces = []
+            pos = 0
+            for kind, start, end in self:
+                if kind in (COMMENT, STRING, TEMPLATE):
+                    pieces.append(code[pos:start])
+                    span = code[start:end]
+                    pieces.append(_NOT_NEWLINE.sub(" ", span) if "\n" in span else " " * len(span))
+                    pos = end
+            pieces.append(code[pos:])
+            self._view = "".join(pieces)
+        return self._view
+
+    def comment_lines(self) -> Set[int]:
+        """1-based numbers of the lines that hold comment text."""
+        code = self.code
+        lines = set()
+        line = 1
+        pos = 0
+        for kind, start, end in self:
+            if kind != COMMENT:
+                continue
+            line += code.count("\n", pos, start)
+            last = line + code.count("\n", start, end)
+            lines.update(range(line, last + 1))
+            line, pos = last, end
+        return lines
+
+
+def _regex_allowed(code: str, kinds, starts, ends) -> bool:
+    """Whether a `/` after the JavaScript tokens lexed so far opens a regex literal."""
+    for i in range(len(kinds) - 1, -1, -1):
+        kind = kinds[i]
+        if kind == CODE:
+            # the tail is enough unless it is all whitespace
+            start, end = starts[i], ends[i]
+            text = code[max(start, end - 32):end].rstrip() or code[start:end].rstrip()
+            if text:
+                # keywords are at most 10 characters: look at one more
+                return text[-1] in _REGEX_AFTER_PUNCT or _REGEX_AFTER_WORD.search(text[-11:]) is not None
+        elif kind != COMMENT:
+            # a string or template is a value: division
+            return False
+    return True
+
+
+def lex(code: str, language: str) -> TokenStream:
+    pattern = _PATTERNS[language]
+    stream = TokenStream(code)
+    kinds, starts, ends = stream.kinds, stream.starts, stream.ends
+    if pattern is _PATTERNS["javascript"]:
+        _lex_javascript(code, pattern, kinds, starts, ends)
+        return stream
+    for m in pattern.finditer(code):
+        kind = _KINDS[m.lastgroup]
+        start, end = m.span()
+        if kind == PREPROC and code[start] == "\n":
+            # the newline belongs to the previous line
+            start += 1
+        kinds.append(kind)
+        starts.append(start)
+        ends.append(end)
+    return stream
+
+
+def _lex_javascript(code: str, pattern, kinds, starts, ends) -> None:
+    pos = 0
+    while True:
+        for m in pattern.finditer(code, pos):
+            kind = _KINDS[m.lastgroup]
+            start, end = m.span()
+            if end - start == 1 and code[start] == "/" and _regex_allowed(code, kinds, starts, ends):
+                literal = _JS_REGEX.match(code, start)
+                if literal is not None:
+                    # restart the master pattern after the literal
+                    kind, pos = STRING, literal.end()
+                    kinds.append(kind)
+                    starts.append(start)
+                    ends.append(pos)
+                    break
+            kinds.append(kind)
+            starts.append(start)
+            ends.append(end)
+        else:
+            return
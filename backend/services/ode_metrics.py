@@ -1,43 +1,366 @@
+"""
+Code metrics for Python source: one AST traversal plus one tokenize pass.
+
+Per file, per function (methods and nested functions included) and per class:
+ - loc / sloc            lines from `lineno` to `end_lineno` / of those, lines
+                         holding code (not blank, not only a comment)
+ - cyclomatic_complexity 1 + decision points (same rules as cyclomatic_complexity,
+                         so a top-level function scores as in /analyze)
+ - cognitive_complexity  SonarSource-style: +1 per break in the linear flow
+                         (if / elif / else, loops, except, ternaries, boolean
+                         operator sequences, recursion), plus the nesting level
+                         for the nestable ones. A nested function's score is
+                         added to its parent's.
+ - halstead              from the token stream: operators are keywords and
+                         operator / delimiter tokens (a bracket pair counts
+                         once), operands are names, numbers and strings
+ - maintainability_index 0..100: (171 - 5.2 ln V - 0.23 CC - 16.2 ln SLOC) * 100 / 171
+
+The token stream is kept as line-sorted arrays, so a function's tokens
+and code lines are a slice and a prefix-sum difference, not a re-walk.
+
+Entry:
+ - CodeMetricsService(code).analyze() -> Dict
+   (raises SyntaxError for unparsable code)
+
+Results are cached by the executor under the "metrics/<METRICS_VERSION>"
+namespace; bump METRICS_VERSION whenever a metric changes.
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from token import COMMENT, DEDENT, ENDMARKER, INDENT, NAME, NEWLINE, NL, NUMBER, OP, STRING
+from typing import Any, Dict, List, Optional
 import ast
+import io
+import keyword
+import math
+import tokenize
+
+from backend.services.ast_utils import NodeDispatcher
+from backend.analyzers.cyclomatic_complexity import COMPLEXITY_NODES
+
+# part of the cache namespace of metrics results
+METRICS_VERSION = "1"
+
+# decision points counted by cyclomatic_complexity() (whole file)
+_BRANCH_NODES = (ast.If, ast.For, ast.While, ast.And, ast.Or, ast.Try, ast.ExceptHandler)
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+# keywords are operators, except the constants
+_KEYWORDS = frozenset(keyword.kwlist) - {"True", "False", "None"}
+_CLOSING = frozenset({")", "]", "}"})
+_NOT_CODE = frozenset({COMMENT, NL, NEWLINE, INDENT, DEDENT, ENDMARKER})
+
+
+def halstead(operators: List[str], operands: List[str]) -> Dict[str, float]:
+    n1, n2 = len(set(operators)), len(set(operands))
+    N1, N2 = len(operators), len(operands)
+    vocabulary = n1 + n2
+    volume = (N1 + N2) * math.log2(vocabulary) if vocabulary > 1 else 0.0
+    difficulty = (n1 / 2) * (N2 / n2) if n2 else 0.0
+    return {
+        "operators": n1,
+        "operands": n2,
+        "length": N1 + N2,
+        "vocabulary": vocabulary,
+        "volume": round(volume, 2),
+        "difficulty": round(difficulty, 2),
+        "effort": round(difficulty * volume, 2),
+    }
+
+
+def maintainability_index(volume: float, complexity: int, sloc: int) -> float:
+    if not volume or not sloc:
+        return 100.0
+    mi = (171 - 5.2 * math.log(volume) - 0.23 * complexity - 16.2 * math.log(sloc)) * 100 / 171
+    return round(min(100.0, max(0.0, mi)), 2)
+
+
+class _Tokens:
+    """The tokenize pass: Halstead tokens and line kinds, ordered by line."""
+
+    def __init__(self, code: str, total_lines: int):
+        self.lines: List[int] = []          # line of each Halstead token
+        self.texts: List[str] = []
+        self.is_operator: List[bool] = []
+        code_line = bytearray(total_lines + 2)
+        comment_line = bytearray(total_lines + 2)
+
+        lines, texts, is_operator = self.lines, self.texts, self.is_operator
+        for kind, text, (start, _), (end, _), _ in tokenize.generate_tokens(io.StringIO(code).readline):
+            if kind in _NOT_CODE:
+                if kind == COMMENT:
+                    comment_line[start] = 1
+                continue
+            if end == start:
+                code_line[start] = 1
+            else:
+                code_line[start:end + 1] = b"\x01" * (end - start + 1)
+
+            if kind == OP:
+                if text in _CLOSING:
+                    continue
+                operator = True
+            elif kind == NAME:
+                operator = text in _KEYWORDS
+            elif kind == NUMBER or kind == STRING:
+                operator = False
+            else:
+                continue
+            lines.append(start)
+            texts.append(text)
+            is_operator.append(operator)
+
+        del code_line[total_lines + 1:], comment_line[total_lines + 1:]
+        self.comment_lines = sum(comment_line)
+        self.blank_lines = total_lines - sum(map(max, code_line[1:], comment_line[1:]))
+        # lines 1..n holding code: sloc(m, n) = prefix[n] - prefix[m - 1]
+        self.code_prefix = list(accumulate(code_line))
+
+    def sloc(self, first: int, last: int) -> int:
+        last = min(last, len(self.code_prefix) - 1)
+        return self.code_prefix[last] - self.code_prefix[first - 1]
+
+    def halstead(self, first: int, last: int) -> Dict[str, float]:
+        lo = bisect_left(self.lines, first)
+        hi = bisect_right(self.lines, last)
+        operators, operands = [], []
+        for text, operator in zip(self.texts[lo:hi], self.is_operator[lo:hi]):
+            (operators if operator else operands).append(text)
+        return halstead(operators, operands)
+
+
+class _Frame:
+    """An open function (or the module): its result entry, counters and nesting level."""
+    __slots__ = ("name", "receiver", "entry", "cyclomatic", "cognitive", "nesting")
+
+    def __init__(self, name: str, entry: Optional[Dict[str, Any]] = None, cyclomatic: int = 1,
+                 receiver: Optional[str] = None):
+        self.name = name
+        self.receiver = receiver                # `self` / `cls` parameter of a method
+        self.entry = entry
+        self.cyclomatic = cyclomatic
+        self.cognitive = 0
+        self.nesting = 0
+
+
+class _MetricsCollector:
+    """
+    Traversal listener gathering the AST side of every metric in one walk.
+    Counters go to the innermost open function; a nested function's counts
+    are folded into its parent when it is left.
+    """
+
+    def __init__(self, tokens: _Tokens):
+        self.tokens = tokens
+        self.branches = 0
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.module = _Frame("")
+        self._frames = [self.module]            # innermost function last
+        self._names: List[str] = []             # enclosing class / function names
+        self._elifs = set()                     # ids of If nodes written as `elif`
+        self._continued = set()                 # ids of BoolOps continuing a sequence
+        self._methods = set()                   # ids of functions defined in a class body
+
+    def _entry(self, node) -> Dict[str, Any]:
+        first, last = node.lineno, node.end_lineno or node.lineno
+        return {
+            "name": ".".join(self._names + [node.name]),
+            "line": first,
+            "end_line": last,
+            "loc": last - first + 1,
+            "sloc": self.tokens.sloc(first, last),
+        }
+
+    # ---- scopes ----
+    def visit_FunctionDef(self, node):
+        entry = self._entry(node)
+        self.functions.append(entry)
+        self._names.append(node.name)
+        # 1 + the function itself, as in ComplexityCollector
+        self._frames.append(_Frame(node.name, entry, cyclomatic=2, receiver=self._receiver(node)))
+
+    def _receiver(self, node) -> Optional[str]:
+        """The parameter a method is called through (`self.name()`), if any."""
+        if id(node) not in self._methods:
+            return None
+        if any(d.__class__ is ast.Name and d.id == "staticmethod" for d in node.decorator_list):
+            return None
+        params = node.args.posonlyargs or node.args.args
+        return params[0].arg if params else None
+
+    def leave_FunctionDef(self, node):
+        frame = self._frames.pop()
+        self._names.pop()
+        parent = self._frames[-1]
+        parent.cyclomatic += frame.cyclomatic - 1
+        parent.cognitive += frame.cognitive
+
+        entry = frame.entry
+        entry["cyclomatic_complexity"] = frame.cyclomatic
+        entry["cognitive_complexity"] = frame.cognitive
+        entry["halstead"] = self.tokens.halstead(entry["line"], entry["end_line"])
+        entry["maintainability_index"] = maintainability_index(
+            entry["halstead"]["volume"], frame.cyclomatic, entry["sloc"])
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+    def visit_ClassDef(self, node):
+        entry = self._entry(node)
+        methods = [item for item in node.body if isinstance(item, _FUNCTIONS)]
+        self._methods.update(map(id, methods))
+        entry["methods"] = len(methods)
+        self.classes.append(entry)
+        self._names.append(node.name)
+
+    def leave_ClassDef(self, node):
+        self._names.pop()
+
+    # ---- cyclomatic ----
+    def _decision(self, node):
+        self._frames[-1].cyclomatic += 1
+
+    def _branch(self, node):
+        self.branches += 1
+
+    def _branch_decision(self, node):
+        self.branches += 1
+        self._frames[-1].cyclomatic += 1
+
+    # ---- cognitive ----
+    def _nest(self, node):
+        frame = self._frames[-1]
+        frame.cognitive += 1 + frame.nesting
+        frame.nesting += 1
+
+    def _unnest(self, node):
+        self._frames[-1].nesting -= 1
+
+    def _loop(self, node):
+        self._branch_decision(node)
+        self._nest(node)
+
+    def visit_If(self, node):
+        self._branch_decision(node)
+        frame = self._frames[-1]
+        orelse = node.orelse
+        # `elif` parses as an If alone in orelse, at the column of the `if`
+        if len(orelse) == 1 and orelse[0].__class__ is ast.If and orelse[0].col_offset == node.col_offset:
+            self._elifs.add(id(orelse[0]))
+        elif orelse:
+            frame.cognitive += 1                    # else
+        if id(node) in self._elifs:
+            frame.cognitive += 1                    # elif: flat, nests nothing more
+        else:
+            frame.cognitive += 1 + frame.nesting
+            frame.nesting += 1
+
+    def leave_If(self, node):
+        if id(node) in self._elifs:
+            self._elifs.discard(id(node))
+        else:
+            self._frames[-1].nesting -= 1
+
+    def visit_ExceptHandler(self, node):
+        self._branch_decision(node)
+        self._nest(node)
+
+    def visit_Lambda(self, node):
+        self._frames[-1].nesting += 1
+
+    def visit_BoolOp(self, node):
+        self._decision(node)
+        # `a and (b and c)` is one sequence of `and`s
+        op = node.op.__class__
+        for value in node.values:
+            if value.__class__ is ast.BoolOp and value.op.__class__ is op:
+                self._continued.add(id(value))
+        if id(node) in self._continued:
+            self._continued.discard(id(node))
+        else:
+            self._frames[-1].cognitive += 1
+
+    def visit_Call(self, node):
+        frame = self._frames[-1]
+        func = node.func
+        if frame.receiver is None:
+            recursive = func.__class__ is ast.Name and func.id == frame.name
+        else:
+            # a method recurses through its receiver: self.name(...) / cls.name(...)
+            recursive = (func.__class__ is ast.Attribute and func.attr == frame.name
+                         and func.value.__class__ is ast.Name and func.value.id == frame.receiver)
+        if recursive:
+            frame.cognitive += 1                    # recursion
+
+
+for _cls in (ast.For, ast.While):
+    setattr(_MetricsCollector, "visit_" + _cls.__name__, _MetricsCollector._loop)
+for _cls in (ast.AsyncFor, ast.IfExp):
+    setattr(_MetricsCollector, "visit_" + _cls.__name__, _MetricsCollector._nest)
+for _cls in (ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.IfExp, ast.Lambda):
+    setattr(_MetricsCollector, "leave_" + _cls.__name__, _MetricsCollector._unnest)
+# the remaining decision points: one handler per class, so every other node costs no call
+for _cls in set(COMPLEXITY_NODES) | set(_BRANCH_NODES):
+    if not hasattr(_MetricsCollector, "visit_" + _cls.__name__):
+        if _cls not in _BRANCH_NODES:
+            _handler = _MetricsCollector._decision
+        elif _cls in COMPLEXITY_NODES:
+            _handler = _MetricsCollector._branch_decision
+        else:
+            _handler = _MetricsCollector._branch
+        setattr(_MetricsCollector, "visit_" + _cls.__name__, _handler)
+del _cls, _handler
+
 
 class CodeMetricsService:
     def __init__(self, code: str):
         self.code = code
         self.tree = ast.parse(code)
         self.lines = code.count("\n") + 1
+        self._collected = None
+
+    def _metrics(self) -> _MetricsCollector:
+        if self._collected is None:
+            self._collected = _MetricsCollector(_Tokens(self.code, self.lines))
+            NodeDispatcher([self._collected]).walk(self.tree)
+        return self._collected
 
     def get_function_count(self):
-        return sum(isinstance(node, ast.FunctionDef) for node in ast.walk(self.tree))
+        return len(self._metrics().functions)
 
     def get_class_count(self):
-        return sum(isinstance(node, ast.ClassDef) for node in ast.walk(self.tree))
+        return len(self._metrics().classes)
 
     def get_average_function_length(self):
-        functions = [node for node in ast.walk(self.tree) if isinstance(node, ast.FunctionDef)]
+        functions = self._metrics().functions
         if not functions:
             return 0
-        lengths = []
-        for func in functions:
-            start = func.lineno
-            end = max((getattr(node, 'lineno', start) for node in ast.walk(func)))
-            lengths.append(end - start + 1)
-        return sum(lengths) / len(lengths)
+        return sum(f["loc"] for f in functions) / len(functions)
 
     def cyclomatic_complexity(self):
-        complexity_nodes = (
-            ast.If, ast.For, ast.While, ast.And, ast.Or, ast.Try, ast.ExceptHandler
-        )
-        count = 1
-        for node in ast.walk(self.tree):
-            if isinstance(node, complexity_nodes):
-                count += 1
-        return count
+        return 1 + self._metrics().branches
 
     def analyze(self):
+        collected = self._metrics()
+        tokens = collected.tokens
+        sloc = tokens.sloc(1, self.lines)
+        file_halstead = tokens.halstead(1, self.lines)
+        complexity = self.cyclomatic_complexity()
         return {
             "total_lines": self.lines,
+            "sloc": sloc,
+            "comment_lines": tokens.comment_lines,
+            "blank_lines": tokens.blank_lines,
             "function_count": self.get_function_count(),
             "class_count": self.get_class_count(),
             "average_function_length": round(self.get_average_function_length(), 2),
-            "cyclomatic_complexity": self.cyclomatic_complexity()
+            "cyclomatic_complexity": complexity,
+            "cognitive_complexity": collected.module.cognitive,
+            "halstead": file_halstead,
+            "maintainability_index": maintainability_index(file_halstead["volume"], complexity, sloc),
+            "functions": collected.functions,
+            "classes": collected.classes,
         }
@@ -0,0 +1,135 @@
+"""
+Pattern rule engine shared by the JS and C++ linters.
+
+Rules are declared once at import and compiled into regexes. scan() runs
+each rule over the whole buffer (no splitlines, no per-line Python loop),
+collects match offsets and turns them into line numbers by counting
+newlines between consecutive hits.
+
+A single alternation of all rules would drop overlapping hits (e.g. a
+`var` line that also lacks a semicolon), so rules are kept as a
+precompiled table instead.
+
+Rule kinds:
+ - PatternRule: a regex hit anywhere on the line
+ - LineEndRule: the line's last non-blank character is not a terminator
+"""
+
+import heapq
+import re
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+class PatternRule:
+    __slots__ = ("type", "pattern", "detail", "exclude")
+
+    def __init__(self, type: str, pattern: str, detail: str, exclude: Optional[str] = None, flags: int = 0):
+        self.type = type
+        self.pattern = re.compile(pattern, flags)
+        self.detail = detail
+        # skip a hit when its line also matches `exclude`
+        self.exclude = re.compile(exclude) if exclude else None
+
+    def offsets(self, code: str) -> Iterator[int]:
+        exclude = self.exclude
+        for m in self.pattern.finditer(code):
+            start = m.start()
+            if exclude is not None:
+                line_start = code.rfind("\n", 0, start) + 1
+                line_end = code.find("\n", start)
+                if line_end < 0:
+                    line_end = len(code)
+                if exclude.search(code, line_start, line_end):
+                    continue
+            yield start
+
+
+class LineEndRule:
+    """
+    Flags non-blank lines whose last non-blank character is not one of
+    `terminators`, unless the line starts with `skip_prefix`.
+
+    Only newline positions are candidates: the regexes start with a
+    literal "\\n" so the scan jumps from line end to line end.
+    """
+
+    __slots__ = ("type", "detail", "terminators", "skip_prefix", "_bare", "_padded")
+
+    def __init__(self, type: str, detail: str, terminators: str, skip_prefix: Optional[str] = None):
+        self.type = type
+        self.detail = detail
+        self.terminators = terminators
+        self.skip_prefix = skip_prefix
+        term = re.escape(terminators)
+        # line ends directly after a non-terminator
+        self._bare = re.compile(r"\n(?<=[^" + term + r"\s]\n)")
+        # line ends in trailing whitespace: decided after stripping
+        self._padded = re.compile(r"\n(?<=[^\S\n]\n)")
+
+    def offsets(self, code: str) -> Iterator[int]:
+        bare = (m.start() for m in self._bare.finditer(code))
+        padded = (m.start() for m in self._padded.finditer(code))
+        for end in heapq.merge(bare, padded):
+            if self._flagged(code, code.rfind("\n", 0, end) + 1, end):
+                yield end
+
+        # last line has no trailing newline
+        start = code.rfind("\n") + 1
+        if start < len(code) and self._flagged(code, start, len(code)):
+            yield start
+
+    def _flagged(self, code: str, start: int, end: int) -> bool:
+        line = code[start:end].strip()
+        if not line or line[-1] in self.terminators:
+            return False
+        return not (self.skip_prefix and line.startswith(self.skip_prefix))
+
+
+class RuleEngine:
+    def __init__(self, rules: List):
+        self.rules = rules
+
+    def scan(self, code: str, timings=None) -> List[Dict]:
+        """
+        One issue per rule per matching line, grouped by rule order.
+        `timings` (optional Timings) gets each rule's wall and CPU time.
+        """
+        issues = []
+        for rule in self.rules:
+            if timings is not None:
+                wall, cpu = time.perf_counter(), time.process_time()
+            line = 1
+            pos = 0
+            last_line = 0
+            for offset in rule.offsets(code):
+                line += code.count("\n", pos, offset)
+                pos = offset
+                if line == last_line:
+                    continue
+                last_line = line
+                issues.append({
+                    "type": rule.type,
+                    "line": line,
+                    "detail": rule.detail
+                })
+            if timings is not None:
+                timings.add_rule(rule.type, time.perf_counter() - wall, time.process_time() - cpu)
+        return issues
+
+
+def count_lines(code: str) -> int:
+    """Number of lines as str.splitlines() would count them for "\\n" endings."""
+    if not code:
+        return 0
+    return code.count("\n") + (0 if code.endswith("\n") else 1)
+
+
+def head(code: str, lines: int) -> str:
+    """First `lines` lines of the buffer, without splitting the rest."""
+    end = -1
+    for _ in range(lines):
+        end = code.find("\n", end + 1)
+        if end < 0:
+            return code
+    return code[:end]
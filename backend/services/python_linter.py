@@ -1,56 +1,79 @@
 import ast
 
-class PythonLinter(ast.NodeVisitor):
-    """Performs AST-based linting for Python code."""
+from backend.services.analysis_context import AnalysisContext
+from backend.analyzers.symbol_table import SymbolTable, SymbolTableBuilder
+
+
+class PythonLinter:
+    """
+    Performs AST-based linting for Python code.
+
+    The visit_* methods are traversal listeners: CodeAnalyzerService runs
+    them in the same walk as the other analyzers via AnalysisContext.run.
+    Checks that need the whole file (unused variables) run in finish(),
+    against the SymbolTable built during that walk.
+    """
 
     def __init__(self):
         self.issues = []
         self.current_function = None
+        self._functions = []
 
     # -----------------------------------------------------
-    # PUBLIC METHOD
+    # PUBLIC METHODS
     # -----------------------------------------------------
     def lint(self, code: str):
-        self.issues = []
-
         try:
-            tree = ast.parse(code)
+            ctx = AnalysisContext.from_code(code)
         except SyntaxError as e:
-            self.issues.append({
+            self.issues = [{
                 "type": "Syntax Error",
                 "line": e.lineno,
                 "detail": e.msg
-            })
+            }]
             return self.issues
 
-        self.visit(tree)
+        return self.lint_context(ctx)
+
+    def lint_context(self, ctx: AnalysisContext):
+        self.reset()
+        symbols = SymbolTableBuilder()
+        ctx.run(self, symbols)
+        return self.finish(symbols.table)
+
+    def finish(self, symbols: SymbolTable):
+        self.check_unused_assignments(symbols)
+        self.issues.sort(key=lambda issue: issue.get("line") or 0)
         return self.issues
 
+    def reset(self):
+        self.issues = []
+        self.current_function = None
+        self._functions = []
+
     # -----------------------------------------------------
     # AST VISITORS
     # -----------------------------------------------------
 
     def visit_FunctionDef(self, node):
+        self._functions.append(node.name)
         self.current_function = node.name
         self.check_function_length(node)
         self.check_missing_docstring(node)
-        self.generic_visit(node)
+
+    def leave_FunctionDef(self, node):
+        # back to the enclosing function (or module level) after a nested def
+        self._functions.pop()
+        self.current_function = self._functions[-1] if self._functions else None
 
     def visit_If(self, node):
         self.check_complex_condition(node)
-        self.generic_visit(node)
 
     def visit_For(self, node):
         self.check_for_loop(node)
-        self.generic_visit(node)
 
     def visit_While(self, node):
         self.check_while_loop(node)
-        self.generic_visit(node)
-
-    def visit_Assign(self, node):
-        self.check_unused_assignment(node)
-        self.generic_visit(node)
 
     # -----------------------------------------------------
     # CHECKS
@@ -98,28 +121,10 @@ class PythonLinter(ast.NodeVisitor):
                 "detail": "While True loop detected."
             })
 
-    def check_unused_assignment(self, node):
-        targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
-
-        for var in targets:
-            if not self._is_used_later(node, var):
-                self.issues.append({
-                    "type": "Unused Variable",
-                    "line": node.lineno,
-                    "detail": f"Variable '{var}' is assigned but never used."
-                })
-
-    # -----------------------------------------------------
-    # Helper Functions
-    # -----------------------------------------------------
-    def _is_used_later(self, node, var):
-        parent = node.parent
-        if not parent:
-            return False
-
-        for sibling in parent.body:
-            if hasattr(sibling, 'value') and isinstance(sibling.value, ast.Name):
-                if sibling.value.id == var:
-                    return True
-
-        return False
+    def check_unused_assignments(self, symbols: SymbolTable):
+        for var, node in symbols.unused_assignments():
+            self.issues.append({
+                "type": "Unused Variable",
+                "line": node.lineno,
+                "detail": f"Variable '{var}' is assigned but never used."
+            })
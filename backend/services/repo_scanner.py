@@ -0,0 +1,429 @@
+"""
+Local repository scanner.
+
+Walks a directory (or the tracked files of a git checkout), detects each
+file's language by extension and analyzes it with CodeAnalyzerService in
+a process pool, without going through the HTTP API.
+
+Entry:
+ - scan(root, ...) -> ScanReport
+
+ - ignore patterns: built-in defaults, `.codesenseignore` at the root and
+   extra patterns (fnmatch, matched against the relative path and the
+   file or directory name)
+ - work is handed to the pool in chunks (`chunksize`), so per-task IPC is
+   amortized over many small files
+ - a manifest (SQLite) keeps mtime, size, content hash and the result of
+   every file: unchanged files are skipped without reading them, touched
+   but identical files are skipped after hashing, and only the rest are
+   analyzed. The manifest is reset when ANALYZER_VERSION changes.
+ - with `duplicates=True`, Python functions are fingerprinted (see
+   analyzers.duplicates) and matched through an LSH index as results
+   arrive; fingerprints are kept in the manifest next to the results.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import ast
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import time
+
+from backend.services.code_analyzer import ANALYZER_VERSION, CodeAnalyzerService
+from backend.services.batch_service import BatchSummary
+from backend.analyzers.duplicates import DEFAULT_THRESHOLD, DuplicateFinder, Fingerprint, fingerprint_functions
+
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".js": "javascript", ".mjs": "javascript", ".cjs": "javascript", ".jsx": "javascript",
+    ".cpp": "cpp", ".cc": "cpp", ".cxx": "cpp", ".c++": "cpp",
+    ".hpp": "cpp", ".hh": "cpp", ".hxx": "cpp", ".h": "cpp",
+}
+
+DEFAULT_IGNORES = [
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", "*.egg-info",
+]
+IGNORE_FILE = ".codesenseignore"
+MANIFEST_NAME = ".codesense-manifest.db"
+MANIFEST_COMMIT_EVERY = 500
+
+
+def detect_language(path: str) -> Optional[str]:
+    return LANGUAGE_BY_EXTENSION.get(os.path.splitext(path)[1].lower())
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# -----------------------------------------------------
+# File discovery
+# -----------------------------------------------------
+class IgnoreRules:
+    def __init__(self, patterns: List[str]):
+        # a trailing "/" is dropped: patterns match files and directories alike
+        self.patterns = [p.rstrip("/") for p in patterns if p and not p.startswith("#")]
+
+    @classmethod
+    def for_root(cls, root: str, extra: Optional[List[str]] = None) -> "IgnoreRules":
+        patterns = list(DEFAULT_IGNORES)
+        ignore_file = os.path.join(root, IGNORE_FILE)
+        if os.path.exists(ignore_file):
+            with open(ignore_file) as f:
+                patterns += [line.strip() for line in f]
+        return cls(patterns + list(extra or []))
+
+    def ignored(self, relpath: str) -> bool:
+        name = relpath.rsplit("/", 1)[-1]
+        return any(fnmatch(name, p) or fnmatch(relpath, p) for p in self.patterns)
+
+
+def walk_files(root: str, rules: IgnoreRules) -> Iterator[str]:
+    """Relative posix paths of analyzable files, pruning ignored directories."""
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = list(os.scandir(os.path.join(root, rel_dir)))
+        except OSError:
+            continue
+        for entry in sorted(entries, key=lambda e: e.name):
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if rules.ignored(rel):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(rel)
+            elif entry.is_file(follow_symlinks=False) and detect_language(entry.name):
+                yield rel
+
+
+def git_files(root: str, rules: IgnoreRules) -> Optional[List[str]]:
+    """Tracked and untracked-but-not-ignored files of a git checkout, or None."""
+    try:
+        out = subprocess.run(
+            ["git", "-C", root, "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            check=True, capture_output=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    paths = [p for p in out.decode("utf-8", "surrogateescape").split("\0") if p]
+    return [p for p in paths
+            if detect_language(p) and not any(rules.ignored(part) for part in _prefixes(p))]
+
+
+def _prefixes(path: str) -> Iterator[str]:
+    parts = path.split("/")
+    for i in range(1, len(parts) + 1):
+        yield "/".join(parts[:i])
+
+
+# -----------------------------------------------------
+# Manifest
+# -----------------------------------------------------
+class Manifest:
+    """Per-file (mtime, size, hash, result) from previous scans."""
+
+    def __init__(self, path: str, version: str = ANALYZER_VERSION):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,"
+            " digest TEXT, result TEXT)"
+        )
+        # functions = JSON [[name, line, end line], ...], signatures = their concatenated MinHashes
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints (path TEXT PRIMARY KEY, functions TEXT, signatures BLOB)"
+        )
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            # results of another rule-set version are stale
+            self.db.execute("DELETE FROM files")
+            self.db.execute("DELETE FROM fingerprints")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        self.db.commit()
+
+    def entries(self) -> Dict[str, Tuple[int, int, str]]:
+        return {path: (mtime, size, digest) for path, mtime, size, digest
+                in self.db.execute("SELECT path, mtime_ns, size, digest FROM files")}
+
+    def result(self, path: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT result FROM files WHERE path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, path: str, mtime_ns: int, size: int, digest: str, result: Dict[str, Any]) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, digest, json.dumps(result, separators=(",", ":")))
+        )
+
+    def fingerprints(self, path: str) -> Optional[List[Fingerprint]]:
+        row = self.db.execute("SELECT functions, signatures FROM fingerprints WHERE path = ?",
+                              (path,)).fetchone()
+        if row is None:
+            return None
+        functions = json.loads(row[0])
+        if not functions:
+            return []
+        signatures = array("I")
+        signatures.frombytes(row[1])
+        n = len(signatures) // len(functions)
+        return [Fingerprint(name, line, end, signatures[i * n:(i + 1) * n])
+                for i, (name, line, end) in enumerate(functions)]
+
+    def fingerprinted(self) -> set:
+        return {path for (path,) in self.db.execute("SELECT path FROM fingerprints")}
+
+    def put_fingerprints(self, path: str, fingerprints: List[Fingerprint]) -> None:
+        signatures = array("I")
+        for fp in fingerprints:
+            signatures.extend(fp.signature)
+        self.db.execute(
+            "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?)",
+            (path, json.dumps([[fp.name, fp.line, fp.end_line] for fp in fingerprints]),
+             signatures.tobytes())
+        )
+
+    def touch(self, path: str, mtime_ns: int, size: int) -> None:
+        self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", (mtime_ns, size, path))
+
+    def forget_missing(self, present: set) -> int:
+        gone = [p for p in self.entries() if p not in present]
+        self.db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in gone])
+        self.db.executemany("DELETE FROM fingerprints WHERE path = ?", [(p,) for p in gone])
+        return len(gone)
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+
+# -----------------------------------------------------
+# Worker process side
+# -----------------------------------------------------
+_worker_analyzer: Optional[CodeAnalyzerService] = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = CodeAnalyzerService()
+
+
+def _analyze_file(task: Tuple[str, str, str, Optional[str], bool]):
+    """
+    (relpath, digest, result, fingerprints). Reads and hashes the file in
+    the worker; result is None when the content matches the manifest's
+    digest, fingerprints is None unless asked for (Python files only).
+    """
+    relpath, abspath, language, known_digest, fingerprint = task
+    with open(abspath, "rb") as f:
+        data = f.read()
+    digest = file_digest(data)
+    if digest == known_digest:
+        return relpath, digest, None, None
+    code = data.decode("utf-8", "replace")
+    result = _worker_analyzer.analyze(code, language)
+    fingerprints = None
+    if fingerprint and language == "python":
+        try:
+            fingerprints = fingerprint_functions(ast.parse(code))
+        except (SyntaxError, ValueError):
+            fingerprints = []
+    return relpath, digest, result, fingerprints
+
+
+# -----------------------------------------------------
+# Scan
+# -----------------------------------------------------
+class ScanReport:
+    def __init__(self, root: str):
+        self.root = root
+        self.summary = BatchSummary()
+        self.by_language: Dict[str, int] = {}
+        self.analyzed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.errors: List[Dict[str, str]] = []
+        self.files: List[Dict[str, Any]] = []
+        self.duplicates: Optional[List[Dict[str, Any]]] = None
+        self.elapsed = 0.0
+
+    def add(self, path: str, result: Dict[str, Any]) -> None:
+        self.summary.add(result)
+        language = result.get("language", "unknown")
+        self.by_language[language] = self.by_language.get(language, 0) + 1
+        self.files.append({
+            "path": path,
+            "language": language,
+            "score": result.get("meta", {}).get("score", 0),
+            "issue_count": result.get("issue_count", 0),
+        })
+
+    def as_dict(self, top: int = 20) -> Dict[str, Any]:
+        worst = sorted(self.files, key=lambda f: (f["score"], -f["issue_count"], f["path"]))[:top]
+        data = {
+            "root": self.root,
+            "analyzer_version": ANALYZER_VERSION,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "files_analyzed": self.analyzed,
+            "files_unchanged": self.unchanged,
+            "files_removed": self.removed,
+            "files_by_language": self.by_language,
+            "read_errors": self.errors,
+            "summary": self.summary.as_dict(),
+            "worst_files": worst,
+        }
+        if self.duplicates is not None:
+            data["duplicates"] = self.duplicates
+        return data
+
+
+def scan(root: str, workers: Optional[int] = None, ignore: Optional[List[str]] = None,
+         manifest_path: Optional[str] = None, use_git: Optional[bool] = None,
+         chunksize: Optional[int] = None, on_result=None, duplicates: bool = False,
+         similarity: float = DEFAULT_THRESHOLD) -> ScanReport:
+    """
+    Analyze every supported file under `root`. `on_result(path, result)`
+    is called for each file (analyzed or reused) as results arrive.
+    `manifest_path=""` disables the manifest. With `duplicates`, near-
+    duplicate Python functions (estimated similarity >= `similarity`) are
+    listed in report.duplicates as "Duplicate Code" issues.
+    """
+    root = os.path.abspath(root)
+    started = time.perf_counter()
+    rules = IgnoreRules.for_root(root, ignore)
+
+    paths = None
+    if use_git is not False and os.path.exists(os.path.join(root, ".git")):
+        paths = git_files(root, rules)
+    if paths is None:
+        paths = list(walk_files(root, rules))
+
+    if manifest_path is None:
+        manifest_path = os.path.join(root, MANIFEST_NAME)
+    manifest = Manifest(manifest_path) if manifest_path else None
+    known = manifest.entries() if manifest else {}
+    finder = DuplicateFinder(similarity) if duplicates else None
+    # files whose fingerprints are already in the manifest
+    fingerprinted = manifest.fingerprinted() if manifest and finder else set()
+
+    report = ScanReport(root)
+    tasks = []
+    stats: Dict[str, Tuple[int, int]] = {}
+
+    for rel in paths:
+        abspath = os.path.join(root, rel)
+        try:
+            st = os.stat(abspath)
+        except OSError as e:
+            report.errors.append({"path": rel, "error": str(e)})
+            continue
+        stats[rel] = (st.st_mtime_ns, st.st_size)
+        language = detect_language(rel)
+        prev = known.get(rel)
+        if finder and language == "python" and rel not in fingerprinted:
+            # scanned before without fingerprints: analyze again
+            prev = None
+        if prev is not None and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+            # unchanged since the last scan: not even read
+            _reuse(report, manifest, rel, on_result, finder)
+            continue
+        tasks.append((rel, abspath, language, prev[2] if prev else None, finder is not None))
+
+    if manifest:
+        report.removed = manifest.forget_missing(set(stats))
+
+    for rel, digest, result, fingerprints in run_tasks(tasks, workers, chunksize, report.errors):
+        mtime, size = stats[rel]
+        if result is None:
+            if manifest:
+                manifest.touch(rel, mtime, size)
+            _reuse(report, manifest, rel, on_result, finder)
+            continue
+        report.analyzed += 1
+        report.add(rel, result)
+        if fingerprints is not None:
+            finder.add(rel, fingerprints)
+        if manifest:
+            manifest.put(rel, mtime, size, digest, result)
+            if fingerprints is not None:
+                manifest.put_fingerprints(rel, fingerprints)
+            if report.analyzed % MANIFEST_COMMIT_EVERY == 0:
+                # an interrupted scan keeps what it already analyzed
+                manifest.commit()
+        if on_result:
+            on_result(rel, result)
+
+    if manifest:
+        manifest.close()
+    if finder:
+        report.duplicates = finder.issues()
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _reuse(report: ScanReport, manifest: "Manifest", rel: str, on_result, finder=None) -> None:
+    result = manifest.result(rel)
+    report.unchanged += 1
+    report.add(rel, result)
+    if finder:
+        finder.add(rel, manifest.fingerprints(rel) or [])
+    if on_result:
+        on_result(rel, result)
+
+
+def run_tasks(tasks, workers: Optional[int], chunksize: Optional[int], errors: List[Dict[str, str]],
+              fn=None, initializer=None):
+    """
+    Yield `fn(task)` for every task, in a spawn process pool when there is
+    more than one worker. Outcomes that are dicts are read errors and go
+    to `errors` instead. Defaults to analyzing files for scan().
+    """
+    fn = fn or _safe_analyze_file
+    initializer = initializer or _init_worker
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not tasks:
+        return
+
+    if workers <= 1 or len(tasks) < 2:
+        initializer()
+        outcomes = map(fn, tasks)
+        pool = None
+    else:
+        if chunksize is None:
+            # ~4 chunks per worker keeps the pool balanced without per-file IPC
+            chunksize = max(1, min(64, len(tasks) // (workers * 4)))
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=initializer)
+        outcomes = pool.map(fn, tasks, chunksize=chunksize)
+
+    try:
+        for outcome in outcomes:
+            if isinstance(outcome, dict):
+                errors.append(outcome)
+            else:
+                yield outcome
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _safe_analyze_file(task):
+    try:
+        return _analyze_file(task)
+    except OSError as e:
+        return {"path": task[0], "error": str(e)}
@@ -0,0 +1,291 @@
+"""
+Content-addressed cache for analysis results.
+
+Keys are a hash of (rule-set version, namespace, language, code), so a
+result is reused only for byte-identical input analyzed by the same rules.
+
+Tiers:
+ - in-memory LRU bounded by the size of the stored payloads (bytes)
+ - optional SQLite file (WAL mode) that survives restarts and is shared
+   by every uvicorn worker pointing at the same path
+
+Disk I/O never runs on the event loop or under the memory tier's lock:
+aget() checks memory inline and reads the file in a thread, and put()
+stores in memory and queues the disk write for a writer thread, which
+commits queued rows in batches. When the writer falls behind, or the
+file stays locked by another process, disk writes are dropped; the
+memory tier still has the result.
+
+The disk tier holds at most `max_rows` results: after each batch the
+writer deletes the oldest rows past the limit. Rows of another rule-set
+version never match a key of the current one and age out the same way,
+so workers of two versions sharing the file during a rolling deploy
+don't wipe each other's results.
+
+Config (environment):
+ - CODESENSE_CACHE_BYTES   max bytes held in memory (default 64 MiB, 0 disables)
+ - CODESENSE_CACHE_DB      path of the SQLite tier (unset = memory only)
+ - CODESENSE_CACHE_DB_ROWS max results kept in the SQLite tier (default 100000)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ROWS = 100_000
+# disk writes waiting for the writer thread before new ones are dropped
+DEFAULT_MAX_PENDING_WRITES = 1000
+# rows per disk transaction
+WRITE_BATCH = 256
+
+
+def make_key(code: str, language: str, version: str, namespace: str = "analyze") -> str:
+    h = hashlib.sha256()
+    h.update(f"{version}\0{namespace}\0{language}\0".encode())
+    h.update(code.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, version: str, max_bytes: int = DEFAULT_MAX_BYTES, db_path: Optional[str] = None,
+                 max_rows: int = DEFAULT_MAX_ROWS, max_pending_writes: int = DEFAULT_MAX_PENDING_WRITES):
+        self.version = version
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.max_rows = max(1, max_rows)
+
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        # memory tier and counters only: never held across a disk call
+        self._lock = threading.Lock()
+        # one read connection per thread; the writer thread has its own
+        self._readers = threading.local()
+        self._writes: "queue.Queue[Tuple[str, str, bytes, float]]" = queue.Queue(max(1, max_pending_writes))
+        self._writer: Optional[threading.Thread] = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.dropped_writes = 0
+
+        if db_path:
+            self._create_table()
+
+    # -----------------------------------------------------
+    # PUBLIC METHODS
+    # -----------------------------------------------------
+    def key(self, code: str, language: str, namespace: str = "analyze") -> str:
+        return make_key(code, language, self.version, namespace)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memory tier, then disk tier. Reads SQLite in the calling thread: use aget() on the event loop."""
+        value = self._memory_get(key)
+        if value is None and self.db_path:
+            value = self._disk_get(key)
+        if value is None:
+            self._miss()
+        return value
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() for the event loop: the memory tier inline, the disk tier in a thread."""
+        value = self._memory_get(key)
+        if value is None and self.db_path:
+            value = await asyncio.to_thread(self._disk_get, key)
+        if value is None:
+            self._miss()
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store in memory now; the disk write is queued for the writer thread."""
+        payload = json.dumps(value, separators=(",", ":")).encode()
+        with self._lock:
+            self._remember(key, payload)
+        if self.db_path:
+            self._queue_write(key, payload)
+
+    def flush(self) -> None:
+        """Wait until every queued disk write is done."""
+        if self._writer is not None:
+            self._writes.join()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.db_path:
+            self.flush()
+            db = self._connect()
+            try:
+                db.execute("DELETE FROM results")
+                db.commit()
+            finally:
+                db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_tier": bool(self.db_path),
+                "pending_writes": self._writes.qsize(),
+                "dropped_writes": self.dropped_writes,
+            }
+
+    # -----------------------------------------------------
+    # Memory tier
+    # -----------------------------------------------------
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(payload)
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+
+        self._entries[key] = payload
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    # -----------------------------------------------------
+    # Disk tier
+    # -----------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5.0)
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _create_table(self) -> None:
+        db = self._connect()
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " version TEXT NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)")
+            db.commit()
+        finally:
+            db.close()
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        db = getattr(self._readers, "db", None)
+        if db is None:
+            db = self._readers.db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT payload FROM results WHERE key = ? AND version = ?",
+                (key, self.version)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # locked past the timeout: treat as a miss
+            return None
+        if row is None:
+            return None
+        payload = row[0]
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, payload)
+        return json.loads(payload)
+
+    def _queue_write(self, key: str, payload: bytes) -> None:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="result-cache-writer",
+                                                    daemon=True)
+                    self._writer.start()
+        try:
+            self._writes.put_nowait((key, self.version, payload, time.time()))
+        except queue.Full:
+            # the disk is behind; the memory tier still has it
+            with self._lock:
+                self.dropped_writes += 1
+
+    def _write_loop(self) -> None:
+        db = self._connect()
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                db.executemany(
+                    "INSERT OR REPLACE INTO results (key, version, payload, created_at) VALUES (?, ?, ?, ?)",
+                    batch
+                )
+                self._evict(db)
+                db.commit()
+            except sqlite3.Error:
+                # another worker held the write lock past the timeout; the memory tier still has it
+                db.rollback()
+                with self._lock:
+                    self.dropped_writes += len(batch)
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Delete the oldest rows past `max_rows` (any version)."""
+        (rows,) = db.execute("SELECT COUNT(*) FROM results").fetchone()
+        if rows > self.max_rows:
+            db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY created_at LIMIT ?)",
+                (rows - self.max_rows,)
+            )
+
+
+_default_cache: Optional[AnalysisCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> AnalysisCache:
+    """Process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            from backend.services.code_analyzer import ANALYZER_VERSION
+
+            _default_cache = AnalysisCache(
+                version=ANALYZER_VERSION,
+                max_bytes=int(os.getenv("CODESENSE_CACHE_BYTES", str(DEFAULT_MAX_BYTES))),
+                db_path=os.getenv("CODESENSE_CACHE_DB") or None,
+                max_rows=int(os.getenv("CODESENSE_CACHE_DB_ROWS", str(DEFAULT_MAX_ROWS))),
+            )
+        return _default_cache
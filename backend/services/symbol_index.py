@@ -0,0 +1,492 @@
+"""
+Persistent cross-file symbol index for Python repositories.
+
+The per-file analyzers see one string at a time, so they can't tell
+whether a function is called from another module or an import is
+re-exported. This index keeps, per module, what it defines, imports,
+references and lists in `__all__`, in a SQLite file next to the scan
+manifest. Building it parses every file once; later updates re-parse
+only files whose content hash changed and replace just their rows.
+
+Entry:
+ - SymbolIndex(path).update(root, ...) -> Dict      (files indexed / unchanged / removed)
+ - SymbolIndex.is_used(qualified_name) -> bool
+ - SymbolIndex.references(qualified_name) -> List[Dict]
+ - SymbolIndex.unused_imports(module) -> List[Dict]
+ - SymbolIndex.dead_code() -> List[Dict]
+
+Names are qualified by module (`pkg.mod.func`); a module's name is its
+path from the root (minus a leading `src/`), so namespace packages
+without `__init__.py` resolve too. A reference is recorded under the name it resolves to
+through the module's imports, so `from pkg import mod; mod.f()` counts
+as a use of `pkg.mod.f`; a re-export (`from .impl import f` in
+`pkg/__init__.py`) makes `pkg.f` an alias of `pkg.impl.f`. Aliases are
+followed when answering lookups.
+
+Limits (it is a static, name-based index): calls through `getattr`,
+dynamic imports and attribute access on instances are not resolved, so
+only module-level functions and classes are reported as dead code;
+decorated ones (routes, fixtures, registrations) and modules pulled in
+with `import *` are skipped.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast
+import os
+import sqlite3
+import time
+
+from backend.services.ast_utils import NodeDispatcher
+from backend.services.repo_scanner import IgnoreRules, file_digest, git_files, run_tasks, walk_files
+
+INDEX_VERSION = "1"
+INDEX_NAME = ".codesense-symbols.db"
+COMMIT_EVERY = 500
+
+# module-level names the import system or test runners use by convention
+IMPLICIT_NAMES = {"main", "setup", "teardown", "setUpModule", "tearDownModule"}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS files ("
+    " path TEXT PRIMARY KEY, module TEXT, mtime_ns INTEGER, size INTEGER, digest TEXT, error TEXT)",
+    # module-level functions, classes and assignments; methods as Class.method
+    "CREATE TABLE IF NOT EXISTS definitions ("
+    " path TEXT, module TEXT, name TEXT, kind TEXT, line INTEGER, decorated INTEGER)",
+    # name = local binding ("*" for star imports), target = qualified name it refers to
+    "CREATE TABLE IF NOT EXISTS imports (path TEXT, module TEXT, name TEXT, target TEXT, line INTEGER)",
+    # name = first segment as written in the source, target = resolved qualified name
+    "CREATE TABLE IF NOT EXISTS refs (path TEXT, module TEXT, name TEXT, target TEXT)",
+    "CREATE TABLE IF NOT EXISTS exports (path TEXT, module TEXT, name TEXT)",
+    "CREATE INDEX IF NOT EXISTS ix_files_module ON files (module)",
+    "CREATE INDEX IF NOT EXISTS ix_definitions_path ON definitions (path)",
+    "CREATE INDEX IF NOT EXISTS ix_definitions_module ON definitions (module, name)",
+    "CREATE INDEX IF NOT EXISTS ix_imports_path ON imports (path)",
+    "CREATE INDEX IF NOT EXISTS ix_imports_target ON imports (target)",
+    "CREATE INDEX IF NOT EXISTS ix_imports_module ON imports (module, name)",
+    "CREATE INDEX IF NOT EXISTS ix_refs_path ON refs (path)",
+    "CREATE INDEX IF NOT EXISTS ix_refs_target ON refs (target)",
+    "CREATE INDEX IF NOT EXISTS ix_refs_module ON refs (module, name)",
+    "CREATE INDEX IF NOT EXISTS ix_exports_path ON exports (path)",
+    "CREATE INDEX IF NOT EXISTS ix_exports_module ON exports (module, name)",
+)
+
+_SYMBOL_TABLES = ("definitions", "imports", "refs", "exports")
+
+# every name that `?` is an alias of or is re-exported as (recursively)
+_ALIASES = """
+WITH RECURSIVE names(q) AS (
+    SELECT ?
+    UNION
+    SELECT i.module || '.' || i.name FROM imports i JOIN names ON i.target = names.q
+    WHERE i.name != '*'
+)
+"""
+
+
+# -----------------------------------------------------
+# Extraction
+# -----------------------------------------------------
+class ModuleSymbolCollector:
+    """Traversal listener gathering one module's rows (see `symbols()` after the walk)."""
+
+    def __init__(self, module: str, is_package: bool):
+        self.module = module
+        self.is_package = is_package
+        # (name, kind, line, decorated)
+        self.definitions: List[Tuple[str, str, int, bool]] = []
+        # local name -> (target, line)
+        self.imports: Dict[str, Tuple[str, int]] = {}
+        self.star_imports: List[Tuple[str, int]] = []
+        self.exports: Set[str] = set()
+        self.loads: Set[str] = set()
+        # dotted attribute chains rooted at a Name, e.g. ("mod", "f")
+        self.chains: Set[Tuple[str, ...]] = set()
+        self._depth = 0
+        # names of the classes enclosing the current node, innermost last
+        self._classes: List[str] = []
+
+    # ---- definitions ----
+    def visit_FunctionDef(self, node):
+        if self._depth == 0:
+            self.definitions.append((node.name, "function", node.lineno, bool(node.decorator_list)))
+        elif self._depth == 1 and self._classes:
+            # at depth 1 the only open class is a top-level one
+            self.definitions.append((f"{self._classes[-1]}.{node.name}", "method", node.lineno,
+                                     bool(node.decorator_list)))
+        self._depth += 1
+
+    def leave_FunctionDef(self, node):
+        self._depth -= 1
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+    def visit_ClassDef(self, node):
+        if self._depth == 0:
+            self.definitions.append((node.name, "class", node.lineno, bool(node.decorator_list)))
+        self._classes.append(node.name)
+        self._depth += 1
+
+    def leave_ClassDef(self, node):
+        self._depth -= 1
+        self._classes.pop()
+
+    def visit_Assign(self, node):
+        if self._depth:
+            return
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.definitions.append((target.id, "variable", node.lineno, False))
+                if target.id == "__all__":
+                    self._add_exports(node.value)
+
+    def visit_AugAssign(self, node):
+        if self._depth == 0 and isinstance(node.target, ast.Name) and node.target.id == "__all__":
+            self._add_exports(node.value)
+
+    def visit_AnnAssign(self, node):
+        if self._depth == 0 and isinstance(node.target, ast.Name):
+            self.definitions.append((node.target.id, "variable", node.lineno, False))
+
+    def _add_exports(self, value):
+        if isinstance(value, (ast.List, ast.Tuple)):
+            for elt in value.elts:
+                if isinstance(elt, ast.Constant) and isinstance(elt.value, str):
+                    self.exports.add(elt.value)
+
+    # ---- imports ----
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.asname:
+                self.imports[alias.asname] = (alias.name, node.lineno)
+            else:
+                # `import a.b` binds `a`; `a.b.f` then resolves through the chain
+                root = alias.name.split(".", 1)[0]
+                self.imports.setdefault(root, (root, node.lineno))
+
+    def visit_ImportFrom(self, node):
+        base = self._resolve_from(node.module, node.level)
+        if base is None:
+            return
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_imports.append((base, node.lineno))
+                continue
+            self.imports[alias.asname or alias.name] = (f"{base}.{alias.name}", node.lineno)
+
+    def _resolve_from(self, module: Optional[str], level: int) -> Optional[str]:
+        if not level:
+            return module
+        parts = self.module.split(".") if self.module else []
+        if not self.is_package:
+            parts = parts[:-1]
+        if level > 1:
+            if level - 1 > len(parts):
+                return None
+            parts = parts[:len(parts) - (level - 1)]
+        if module:
+            parts.append(module)
+        return ".".join(parts) or None
+
+    # ---- references ----
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.loads.add(node.id)
+
+    def visit_Attribute(self, node):
+        chain = []
+        value = node
+        while isinstance(value, ast.Attribute):
+            chain.append(value.attr)
+            value = value.value
+        if isinstance(value, ast.Name):
+            chain.append(value.id)
+            self.chains.add(tuple(reversed(chain)))
+
+    # ---- result ----
+    def symbols(self) -> Dict[str, Any]:
+        defined = {name for name, kind, _, _ in self.definitions if kind != "method"}
+        refs: Set[Tuple[str, str]] = set()
+
+        def resolve(name: str) -> Optional[str]:
+            if name in self.imports:
+                return self.imports[name][0]
+            if name in defined:
+                return f"{self.module}.{name}"
+            return None
+
+        for name in self.loads:
+            target = resolve(name)
+            if target is not None:
+                refs.add((name, target))
+        for chain in self.chains:
+            target = resolve(chain[0])
+            if target is None:
+                continue
+            for i in range(1, len(chain)):
+                target += "." + chain[i]
+                refs.add((chain[0], target))
+
+        imports = [(name, target, line) for name, (target, line) in self.imports.items()]
+        imports += [("*", target, line) for target, line in self.star_imports]
+        return {
+            "definitions": self.definitions,
+            "imports": imports,
+            "refs": sorted(refs),
+            "exports": sorted(self.exports),
+        }
+
+
+def module_name(relpath: str) -> Tuple[str, bool]:
+    """(dotted module name, is a package) of a .py file relative to the root."""
+    parts = relpath[:-3].split("/")
+    if parts[0] == "src" and len(parts) > 1:
+        parts.pop(0)
+    is_package = parts[-1] == "__init__"
+    if is_package:
+        parts.pop()
+    return ".".join(parts), is_package
+
+
+def extract_symbols(code: str, module: str, is_package: bool = False) -> Dict[str, Any]:
+    """Definitions, imports, references and exports of one module (raises SyntaxError)."""
+    tree = ast.parse(code)
+    collector = ModuleSymbolCollector(module, is_package)
+    NodeDispatcher([collector]).walk(tree)
+    return collector.symbols()
+
+
+def _init_worker():
+    pass
+
+
+def _index_file(task: Tuple[str, str, str, bool, Optional[str]]):
+    """(relpath, digest, symbols or None if unchanged, parse error)."""
+    relpath, abspath, module, is_package, known_digest = task
+    try:
+        with open(abspath, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return {"path": relpath, "error": str(e)}
+    digest = file_digest(data)
+    if digest == known_digest:
+        return relpath, digest, None, None
+    try:
+        symbols = extract_symbols(data.decode("utf-8", "replace"), module, is_package)
+    except (SyntaxError, ValueError) as e:
+        return relpath, digest, {"definitions": [], "imports": [], "refs": [], "exports": []}, str(e)
+    return relpath, digest, symbols, None
+
+
+# -----------------------------------------------------
+# Index
+# -----------------------------------------------------
+class SymbolIndex:
+    def __init__(self, path: str, version: str = INDEX_VERSION):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self.db.execute(statement)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            for table in ("files",) + _SYMBOL_TABLES:
+                self.db.execute(f"DELETE FROM {table}")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------------------------------
+    # Building
+    # -----------------------------------------------------
+    def update(self, root: str, workers: Optional[int] = 1, ignore: Optional[List[str]] = None,
+               use_git: Optional[bool] = None) -> Dict[str, Any]:
+        """Bring the index in line with the Python files under `root`."""
+        root = os.path.abspath(root)
+        started = time.perf_counter()
+        rules = IgnoreRules.for_root(root, ignore)
+        paths = None
+        if use_git is not False and os.path.exists(os.path.join(root, ".git")):
+            paths = git_files(root, rules)
+        if paths is None:
+            paths = list(walk_files(root, rules))
+        paths = [p for p in paths if p.endswith(".py")]
+
+        known = {path: (mtime, size, digest) for path, mtime, size, digest
+                 in self.db.execute("SELECT path, mtime_ns, size, digest FROM files")}
+        present = set(paths)
+        removed = [p for p in known if p not in present]
+        for path in removed:
+            self._forget(path)
+
+        stats: Dict[str, Tuple[int, int, str]] = {}
+        tasks = []
+        errors: List[Dict[str, str]] = []
+        unchanged = 0
+        for rel in paths:
+            try:
+                st = os.stat(os.path.join(root, rel))
+            except OSError as e:
+                errors.append({"path": rel, "error": str(e)})
+                continue
+            module, is_package = module_name(rel)
+            stats[rel] = (st.st_mtime_ns, st.st_size, module)
+            prev = known.get(rel)
+            if prev is not None and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+                unchanged += 1
+                continue
+            tasks.append((rel, os.path.join(root, rel), module, is_package, prev[2] if prev else None))
+
+        indexed = 0
+        parse_errors = 0
+        for rel, digest, symbols, error in run_tasks(tasks, workers, None, errors,
+                                                     fn=_index_file, initializer=_init_worker):
+            mtime, size, module = stats[rel]
+            if symbols is None:
+                unchanged += 1
+                self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", (mtime, size, rel))
+                continue
+            self._put(rel, module, mtime, size, digest, symbols, error)
+            indexed += 1
+            parse_errors += error is not None
+            if indexed % COMMIT_EVERY == 0:
+                self.db.commit()
+        self.db.commit()
+
+        return {
+            "root": root,
+            "files": len(stats),
+            "indexed": indexed,
+            "unchanged": unchanged,
+            "removed": len(removed),
+            "parse_errors": parse_errors,
+            "read_errors": errors,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def put_source(self, path: str, code: str, module: str, is_package: bool = False) -> None:
+        """Index one in-memory module (replaces the rows of `path`)."""
+        try:
+            symbols, error = extract_symbols(code, module, is_package), None
+        except SyntaxError as e:
+            symbols, error = {"definitions": [], "imports": [], "refs": [], "exports": []}, str(e)
+        digest = file_digest(code.encode("utf-8", "surrogatepass"))
+        self._put(path, module, None, None, digest, symbols, error)
+        self.db.commit()
+
+    def _put(self, path: str, module: str, mtime: Optional[int], size: Optional[int],
+             digest: str, symbols: Dict[str, Any], error: Optional[str]) -> None:
+        self._forget(path)
+        self.db.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)", (path, module, mtime, size, digest, error))
+        self.db.executemany("INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?)",
+                            [(path, module, *row) for row in symbols["definitions"]])
+        self.db.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?)",
+                            [(path, module, *row) for row in symbols["imports"]])
+        self.db.executemany("INSERT INTO refs VALUES (?, ?, ?, ?)",
+                            [(path, module, *row) for row in symbols["refs"]])
+        self.db.executemany("INSERT INTO exports VALUES (?, ?, ?)",
+                            [(path, module, name) for name in symbols["exports"]])
+
+    def _forget(self, path: str) -> None:
+        self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+        for table in _SYMBOL_TABLES:
+            self.db.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+
+    # -----------------------------------------------------
+    # Lookups
+    # -----------------------------------------------------
+    def definitions(self, name: str) -> List[Dict[str, Any]]:
+        """Where a (short or Class.method) name is defined."""
+        rows = self.db.execute(
+            "SELECT module, path, kind, line FROM definitions WHERE name = ? ORDER BY module", (name,))
+        return [{"module": m, "path": p, "kind": k, "line": line} for m, p, k, line in rows]
+
+    def references(self, qualified: str) -> List[Dict[str, Any]]:
+        """Modules referencing `qualified`, directly or through a re-export."""
+        rows = self.db.execute(
+            _ALIASES + "SELECT DISTINCT r.module, r.path, r.target FROM refs r "
+                       "WHERE r.target IN (SELECT q FROM names) ORDER BY r.module",
+            (qualified,))
+        return [{"module": m, "path": p, "as": target} for m, p, target in rows]
+
+    def is_used(self, qualified: str) -> bool:
+        module, _, name = qualified.rpartition(".")
+        row = self.db.execute(
+            _ALIASES + "SELECT 1 FROM refs WHERE target IN (SELECT q FROM names) "
+                       "UNION ALL SELECT 1 FROM exports WHERE module = ? AND name = ? LIMIT 1",
+            (qualified, module, name)).fetchone()
+        return row is not None
+
+    def is_reexported(self, module: str, name: str) -> bool:
+        """True if `module.name` is listed in `__all__` or imported from `module` elsewhere."""
+        qualified = f"{module}.{name}"
+        row = self.db.execute(
+            "SELECT 1 FROM exports WHERE module = ? AND name = ? "
+            "UNION ALL SELECT 1 FROM imports WHERE target = ? AND module != ? LIMIT 1",
+            (module, name, qualified, module)).fetchone()
+        return row is not None
+
+    def unused_imports(self, module: str) -> List[Dict[str, Any]]:
+        """Imports of `module` it never reads and no other module re-imports from it."""
+        rows = self.db.execute(
+            "SELECT i.name, i.target, i.line FROM imports i "
+            "WHERE i.module = ? AND i.name != '*' "
+            "AND NOT EXISTS (SELECT 1 FROM refs r WHERE r.module = i.module AND r.name = i.name) "
+            "AND NOT EXISTS (SELECT 1 FROM exports e WHERE e.module = i.module AND e.name = i.name) "
+            "AND NOT EXISTS (SELECT 1 FROM imports o WHERE o.target = i.module || '.' || i.name) "
+            "ORDER BY i.line", (module,))
+        return [{"name": n, "target": t, "line": line} for n, t, line in rows]
+
+    def dead_code(self, include_private: bool = True) -> List[Dict[str, Any]]:
+        """
+        Module-level functions and classes nothing refers to: no reference
+        (through any alias chain), not exported, not under a star import.
+        Resolves aliases for the whole repo in one pass instead of a query
+        per definition.
+        """
+        used = {target for (target,) in self.db.execute("SELECT DISTINCT target FROM refs")}
+        used.update(f"{m}.{n}" for m, n in self.db.execute("SELECT module, name FROM exports"))
+        # an alias is used -> what it points to is used
+        aliases: Dict[str, List[str]] = {}
+        for module, name, target in self.db.execute("SELECT module, name, target FROM imports WHERE name != '*'"):
+            aliases.setdefault(f"{module}.{name}", []).append(target)
+        stack = [q for q in used if q in aliases]
+        while stack:
+            for target in aliases.pop(stack.pop(), ()):
+                if target not in used:
+                    used.add(target)
+                    if target in aliases:
+                        stack.append(target)
+        starred = {target for (target,) in self.db.execute("SELECT target FROM imports WHERE name = '*'")}
+
+        dead = []
+        for module, path, name, kind, line in self.db.execute(
+                "SELECT module, path, name, kind, line FROM definitions "
+                "WHERE kind IN ('function', 'class') AND NOT decorated ORDER BY path, line"):
+            if module in starred or f"{module}.{name}" in used:
+                continue
+            if name in IMPLICIT_NAMES or name.startswith(("test", "Test", "__")):
+                continue
+            if not include_private and name.startswith("_"):
+                continue
+            dead.append({"module": module, "path": path, "name": name, "kind": kind, "line": line})
+        return dead
+
+    def stats(self) -> Dict[str, int]:
+        counts = {table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("files",) + _SYMBOL_TABLES}
+        counts["parse_errors"] = self.db.execute(
+            "SELECT COUNT(*) FROM files WHERE error IS NOT NULL").fetchone()[0]
+        return counts
+
@@ -0,0 +1,65 @@
+"""
+Benchmark: fused single-parse Python pipeline vs. per-analyzer parsing.
+
+The "separate" variant calls each analyzer's standalone entry point, which
+parses (and walks) the source on its own — this is what
+CodeAnalyzerService.analyze used to do for every Python request.
+
+Run:
+    python -m benchmarks.bench_pipeline [--lines 3000] [--repeat 20]
+"""
+
+import argparse
+import ast
+import statistics
+import time
+
+from backend.analyzers.comment_density import get_comment_density
+from backend.analyzers.cyclomatic_complexity import get_function_complexity
+from backend.analyzers.unused_imports import detect_unused_imports
+from backend.services.code_analyzer import CodeAnalyzerService
+from backend.services.python_linter import PythonLinter
+from benchmarks.corpus import make_source
+
+
+def separate_pipeline(code: str):
+    ast.parse(code)
+    PythonLinter().lint(code)
+    detect_unused_imports(code)
+    get_function_complexity(code)
+    get_comment_density(code)
+
+
+def fused_pipeline(service: CodeAnalyzerService, code: str):
+    service.analyze(code, "python")
+
+
+def measure(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        samples.append(time.process_time() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    code = make_source(args.lines)
+    service = CodeAnalyzerService()
+
+    separate = measure(lambda: separate_pipeline(code), args.repeat)
+    fused = measure(lambda: fused_pipeline(service, code), args.repeat)
+
+    print(f"source lines     : {code.count(chr(10)) + 1}")
+    print(f"separate parses  : {separate * 1000:8.2f} ms CPU (median of {args.repeat})")
+    print(f"fused pipeline   : {fused * 1000:8.2f} ms CPU (median of {args.repeat})")
+    print(f"speedup          : {separate / fused:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
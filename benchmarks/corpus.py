@@ -0,0 +1,190 @@
+"""
+Synthetic, deterministic benchmark corpus.
+
+Every generator is seeded, so the same name always produces the same
+source and timings stay comparable across runs and machines.
+
+Entry:
+ - build_corpus(scale: float = 1.0) -> Dict[str, Sample]
+ - make_source(lines: int) -> str   (plain Python module, kept for bench_pipeline)
+"""
+
+from typing import Dict, NamedTuple
+import random
+
+
+class Sample(NamedTuple):
+    name: str
+    language: str
+    code: str
+
+    @property
+    def lines(self) -> int:
+        return self.code.count("\n") + 1
+
+
+FUNCTION_TEMPLATE = '''
+def handler_{i}(items, limit={i}):
+    """Process batch {i}."""
+    total = 0
+    for item in items:
+        if item > limit and item % 2 == 0 or item < 0:
+            total += item
+        elif item == limit:
+            total -= 1
+    while total > 1000:
+        total //= 2
+    result = [x * 2 for x in items if x]
+    return total + len(result)
+'''
+
+CLASS_TEMPLATE = '''
+
+class Service{i}:
+    # cached lookups for service {i}
+    def __init__(self, store):
+        self.store = store
+        self.cache = {{}}
+
+    def get(self, key):
+        unused = key * 2
+        if key in self.cache:
+            return self.cache[key]
+        value = self.store.load(key)
+        self.cache[key] = value
+        return value
+
+    async def refresh(self, keys):
+        for key in keys:
+            try:
+                self.cache[key] = await self.store.fetch(key)
+            except KeyError:
+                continue
+'''
+
+
+def make_source(lines: int) -> str:
+    header = "import os\nimport sys\nimport json\n# generated benchmark module\n"
+    block_lines = FUNCTION_TEMPLATE.count("\n")
+    blocks = max(1, lines // block_lines)
+    return header + "".join(FUNCTION_TEMPLATE.format(i=i) for i in range(blocks))
+
+
+def python_mixed(lines: int, seed: int = 1) -> str:
+    """Functions and classes in random order, with a few unused imports."""
+    rnd = random.Random(seed)
+    parts = ["import os\nimport re\nimport json\nfrom typing import Dict, List\n"]
+    size = 0
+    i = 0
+    while size < lines:
+        block = (CLASS_TEMPLATE if rnd.random() < 0.3 else FUNCTION_TEMPLATE).format(i=i)
+        parts.append(block)
+        size += block.count("\n")
+        i += 1
+    return "".join(parts)
+
+
+def python_deep(depth: int, width: int = 4) -> str:
+    """
+    Deeply nested control flow: `width` functions, each `depth` blocks
+    deep, exercising recursive walkers and scope tracking.
+    """
+    parts = ["import itertools\n"]
+    for f in range(width):
+        lines = [f"def nested_{f}(data, n):"]
+        indent = "    "
+        for level in range(depth):
+            kind = level % 4
+            if kind == 0:
+                lines.append(f"{indent}if n > {level} and data or n < -{level}:")
+            elif kind == 1:
+                lines.append(f"{indent}for i{level} in range(n):")
+            elif kind == 2:
+                lines.append(f"{indent}while data:")
+            else:
+                lines.append(f"{indent}with open(str(n)) as fh{level}:")
+            indent += "    "
+            lines.append(f"{indent}v{level} = [x for x in data if x > {level}]")
+        lines.append(f"{indent}return n")
+        parts.append("\n".join(lines) + "\n\n")
+    return "".join(parts)
+
+
+def js_minified(kb: int, seed: int = 2) -> str:
+    """A bundle-like file: long lines of statements with strings and templates."""
+    rnd = random.Random(seed)
+    statements = [
+        'var a{i}=function(e,t){{return e+t}};',
+        'let b{i}="str;ing {i} // not a comment";',
+        'const c{i}=`tmpl ${{a{i}(1,2)}} var x`;',
+        'if(a{i}){{console.log("dbg",{i})}}',
+        'for(var k{i}=0;k{i}<10;k{i}++){{b{i}+=k{i}}}',
+        '/* block {i} */var d{i}={{x:{i},y:"}}"}};',
+        'function f{i}(n){{return n>1?f{i}(n-1)*n:1}}',
+    ]
+    out = []
+    size = 0
+    line = []
+    i = 0
+    while size < kb * 1024:
+        stmt = rnd.choice(statements).format(i=i)
+        line.append(stmt)
+        size += len(stmt)
+        i += 1
+        if len(line) >= 40:
+            out.append("".join(line))
+            line = []
+    out.append("".join(line))
+    return "\n".join(out)
+
+
+def cpp_large(lines: int, seed: int = 3) -> str:
+    """A single large translation unit with the constructs the C++ rules look for."""
+    rnd = random.Random(seed)
+    parts = [
+        "#include <iostream>\n#include <vector>\n#include <memory>\n#include <cstdlib>\n",
+        "using namespace std;\n\n",
+    ]
+    bodies = [
+        "    int* buf{i} = (int*) malloc(n * sizeof(int));\n"
+        "    for (int k = 0; k < n; ++k) {{ buf{i}[k] = k * {i}; }}\n"
+        "    free(buf{i});\n",
+        "    std::unique_ptr<Node> node{i}(new Node({i}));\n"
+        "    const char* label = \"ptr * in string {i}\";\n"
+        "    cout << label << node{i}->value << endl;\n",
+        "    // raw pointer walk {i}\n"
+        "    Node *cur = head;\n"
+        "    while (cur != nullptr) {{\n"
+        "        total += cur->value; /* sum * values */\n"
+        "        cur = cur->next;\n"
+        "    }}\n",
+        "    vector<int> values{i}(n, {i});\n"
+        "    for (auto& v : values{i}) {{\n"
+        "        if (v % 2 == 0 && v > {i}) {{ total += v; }}\n"
+        "    }}\n",
+    ]
+    parts.append("struct Node {\n    int value;\n    Node* next;\n    explicit Node(int v) : value(v), next(nullptr) {}\n};\n\n")
+    size = sum(p.count("\n") for p in parts)
+    i = 0
+    while size < lines:
+        body = "".join(rnd.choice(bodies).format(i=i + k) for k in range(3))
+        block = f"int compute_{i}(Node* head, int n) {{\n    int total = 0;\n{body}    return total;\n}}\n\n"
+        parts.append(block)
+        size += block.count("\n")
+        i += 1
+    return "".join(parts)
+
+
+def build_corpus(scale: float = 1.0) -> Dict[str, Sample]:
+    """All benchmark inputs; `scale` shrinks or grows them (e.g. 0.1 for a smoke run)."""
+    def n(value: int) -> int:
+        return max(1, int(value * scale))
+
+    samples = [
+        Sample("python_small", "python", python_mixed(n(200))),
+        Sample("python_large", "python", python_mixed(n(5000))),
+        Sample("python_deep", "python", python_deep(min(90, max(8, n(60))))),
+        Sample("js_minified", "javascript", js_minified(n(256))),
+        Sample("cpp_large", "cpp", cpp_large(n(5000))),
+    ]
+    return {s.name: s for s in samples}
@@ -0,0 +1,282 @@
+"""
+Analyzer benchmark suite with a regression gate.
+
+Runs every analyzer over the synthetic corpus (benchmarks/corpus.py) and
+reports, per case:
+ - latency percentiles (p50 / p90 / p99, wall clock)
+ - throughput in source lines per second (at p50)
+ - peak memory allocated during one run (tracemalloc)
+
+Baselines are stored as JSON. `--check` compares a run with the stored
+baseline and exits with status 1 when a case got slower or allocates
+more than the thresholds allow. Latencies are normalized by a fixed
+calibration workload timed in the same run, so a baseline recorded on a
+faster or slower machine still gives a usable comparison; re-record it
+(`--save`) after intentional changes.
+
+Run:
+    python -m benchmarks.runner                       # report only
+    python -m benchmarks.runner --save                # record baselines
+    python -m benchmarks.runner --check               # fail on regressions
+    python -m benchmarks.runner --only analyze/ --repeat 5
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import argparse
+import ast
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from backend.services.code_analyzer import CodeAnalyzerService
+from backend.services.python_linter import PythonLinter
+from backend.services.js_linter import JSLinter
+from backend.services.cpp_linter import CppLinter
+from backend.services.ode_metrics import CodeMetricsService
+from backend.services.review_service import ReviewService
+from benchmarks.corpus import Sample, build_corpus
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines.json")
+BASELINE_FORMAT = 1
+
+
+class Case(NamedTuple):
+    name: str
+    sample: Sample
+    run: Callable[[], Any]
+
+
+# -----------------------------------------------------
+# Cases
+# -----------------------------------------------------
+def build_cases(scale: float = 1.0) -> List[Case]:
+    corpus = build_corpus(scale)
+    analyzer = CodeAnalyzerService()
+    reviewer = ReviewService()
+    cases = []
+
+    for sample in corpus.values():
+        cases.append(Case(f"analyze/{sample.name}", sample,
+                          lambda s=sample: analyzer.analyze(s.code, s.language)))
+
+    py = corpus["python_large"]
+    deep = corpus["python_deep"]
+    js = corpus["js_minified"]
+    cpp = corpus["cpp_large"]
+    cases += [
+        Case("python_linter/python_large", py, lambda: PythonLinter().lint(py.code)),
+        Case("python_linter/python_deep", deep, lambda: PythonLinter().lint(deep.code)),
+        Case("js_linter/js_minified", js, lambda: JSLinter().lint(js.code)),
+        Case("cpp_linter/cpp_large", cpp, lambda: CppLinter().lint(cpp.code)),
+        Case("code_metrics/python_large", py, lambda: CodeMetricsService(py.code).analyze()),
+        Case("code_metrics/python_deep", deep, lambda: CodeMetricsService(deep.code).analyze()),
+    ]
+
+    for sample in (py, cpp):
+        analysis = analyzer.analyze(sample.code, sample.language)
+        analysis["meta"]["code"] = sample.code
+        cases.append(Case(f"review/{sample.name}", sample,
+                          lambda a=analysis: reviewer.build_review(a)))
+    return cases
+
+
+# -----------------------------------------------------
+# Measurement
+# -----------------------------------------------------
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def time_runs(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """
+    Wall-clock seconds of `repeat` runs after one warm-up run. Like timeit,
+    the cyclic GC is paused while timing so collections triggered by
+    garbage from earlier cases don't land on this one.
+    """
+    fn()  # warm-up: imports, regex compilation, lazy caches
+    gc.collect()
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    """Peak bytes allocated while running `fn` once."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+_CALIBRATION_SOURCE = "\n".join(
+    f"def f{i}(x):\n    return [y * {i} for y in range(x) if y % 3]" for i in range(200)
+)
+
+
+def calibrate(repeat: int = 15) -> float:
+    """
+    Fastest of `repeat` runs of a fixed parse-and-walk workload: the
+    minimum is the sample least disturbed by other load on the machine.
+    """
+    def workload():
+        for _ in range(5):
+            sum(1 for _ in ast.walk(ast.parse(_CALIBRATION_SOURCE)))
+
+    return min(time_runs(workload, repeat))
+
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    samples = time_runs(case.run, repeat)
+    p50 = percentile(samples, 50)
+    return {
+        "lines": case.sample.lines,
+        "p50_ms": round(p50 * 1000, 3),
+        "p90_ms": round(percentile(samples, 90) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "lines_per_sec": round(case.sample.lines / p50) if p50 else None,
+        "peak_kib": round(peak_memory(case.run) / 1024, 1),
+    }
+
+
+def run_suite(scale: float = 1.0, repeat: int = 15, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    # machine speed is sampled before and after the suite and averaged,
+    # so a load change halfway through a run skews the comparison less
+    calibration = calibrate()
+    results = {}
+    for case in build_cases(scale):
+        if only and not any(pattern in case.name for pattern in only):
+            continue
+        results[case.name] = measure(case, repeat)
+    return {
+        "format": BASELINE_FORMAT,
+        "python": platform.python_version(),
+        "scale": scale,
+        "repeat": repeat,
+        "calibration_ms": round((calibration + calibrate()) / 2 * 1000, 3),
+        "results": results,
+    }
+
+
+# -----------------------------------------------------
+# Regression gate
+# -----------------------------------------------------
+def compare(run: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25,
+            memory_threshold: float = 0.10, min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Human-readable regressions of `run` against `baseline` (empty = pass).
+    Slowdowns smaller than `min_delta_ms` are timer noise and never fail.
+    """
+    if baseline.get("scale") != run["scale"]:
+        return [f"baseline was recorded at scale {baseline.get('scale')}, run is at {run['scale']}"]
+
+    speed = run["calibration_ms"] / baseline["calibration_ms"]
+    regressions = []
+    for name, current in run["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+
+        expected = base["p50_ms"] * speed
+        if current["p50_ms"] > max(expected * (1 + threshold), expected + min_delta_ms):
+            regressions.append(
+                f"{name}: p50 {current['p50_ms']:.2f} ms vs {expected:.2f} ms expected "
+                f"(+{current['p50_ms'] / expected - 1:.0%}, limit +{threshold:.0%})"
+            )
+        if current["peak_kib"] > base["peak_kib"] * (1 + memory_threshold):
+            regressions.append(
+                f"{name}: peak memory {current['peak_kib']:.0f} KiB vs {base['peak_kib']:.0f} KiB "
+                f"(+{current['peak_kib'] / base['peak_kib'] - 1:.0%}, limit +{memory_threshold:.0%})"
+            )
+    return regressions
+
+
+def print_report(run: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    speed = run["calibration_ms"] / baseline["calibration_ms"] if baseline else None
+    print(f"python {run['python']}  scale {run['scale']}  repeat {run['repeat']}  "
+          f"calibration {run['calibration_ms']:.2f} ms")
+    header = f"{'case':34} {'lines':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'lines/s':>10} {'peak KiB':>9}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    for name, r in run["results"].items():
+        row = (f"{name:34} {r['lines']:>6} {r['p50_ms']:>9.2f} {r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+               f"{r['lines_per_sec'] or 0:>10} {r['peak_kib']:>9.0f}")
+        base = baseline["results"].get(name) if baseline else None
+        if base:
+            row += f" {r['p50_ms'] / (base['p50_ms'] * speed) - 1:>+8.0%}"
+        print(row)
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("format") != BASELINE_FORMAT:
+        return None
+    return baseline
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size factor")
+    parser.add_argument("--only", action="append", help="run cases whose name contains this (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown (fraction)")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="allowed peak memory growth (fraction)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns below this many ms")
+    args = parser.parse_args(argv)
+    if args.save and args.only:
+        parser.error("--save records the whole suite; drop --only")
+
+    run = run_suite(args.scale, args.repeat, args.only)
+    baseline = load_baseline(args.baseline)
+    print_report(run, baseline if baseline and baseline.get("scale") == run["scale"] else None)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    if args.check:
+        if baseline is None:
+            print(f"no baseline at {args.baseline}; run with --save first", file=sys.stderr)
+            return 1
+        regressions = compare(run, baseline, args.threshold, args.memory_threshold, args.min_delta_ms)
+        if regressions:
+            print("\nREGRESSIONS:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import ast
+import asyncio
+import pickle
+import signal
+import threading
+
+import pytest
+
+from backend.services import budget, incremental
+from backend.services.budget import BudgetExceeded, check_input, check_tree, cpu_budget
+from backend.services.code_analyzer import CodeAnalyzerService, is_cacheable
+from backend.services.diff_analyzer import _scoped
+from backend.services.executor import AnalysisExecutor
+from backend.services.incremental import IncrementalAnalyzer
+
+TOO_MANY_LINES = "x = 1\n" * (budget.MAX_INPUT_LINES + 1)
+TOO_DEEP = "x = " + "not " * (budget.MAX_AST_DEPTH + 100) + "y\n"
+
+
+def test_check_input_limits_bytes_and_lines():
+    check_input("x = 1\n")
+    with pytest.raises(BudgetExceeded) as e:
+        check_input("é" * 600, max_bytes=1000)
+    assert e.value.limit == "input_bytes" and e.value.value == 1200
+    with pytest.raises(BudgetExceeded) as e:
+        check_input("a\nb\nc", max_lines=2)
+    assert e.value.limit == "input_lines"
+
+
+def test_check_tree_limits_depth_and_nodes():
+    tree = ast.parse("x = [1, 2, 3]")
+    check_tree(tree)
+    with pytest.raises(BudgetExceeded) as e:
+        check_tree(tree, max_nodes=5)
+    assert e.value.limit == "ast_nodes"
+    with pytest.raises(BudgetExceeded) as e:
+        check_tree(ast.parse(TOO_DEEP))
+    assert e.value.limit == "ast_depth"
+
+
+@pytest.mark.parametrize("code, limit", [
+    (TOO_MANY_LINES, "input_lines"),
+    (TOO_DEEP, "ast_depth"),
+    ("x = " + " + ".join(["1"] * 150000), "ast_depth"),
+])
+def test_analyzer_answers_with_a_budget_result(code, limit):
+    result = CodeAnalyzerService().analyze(code, "python")
+    assert result["status"] == "budget_exceeded"
+    assert result["meta"]["budget"]["limit"] == limit
+    assert result["issues"][0]["type"] == "Budget Exceeded"
+    # a static limit depends only on the input: the result may be cached
+    assert is_cacheable(result)
+
+
+def test_runtime_budget_results_are_not_cached():
+    result = budget.budget_result("python", BudgetExceeded("cpu_seconds", 20))
+    assert not is_cacheable(result)
+
+
+@pytest.mark.parametrize("code, limit", [(TOO_MANY_LINES, "input_lines"), (TOO_DEEP, "ast_depth")])
+def test_session_updates_apply_the_budgets(code, limit):
+    analyzer = IncrementalAnalyzer(AnalysisExecutor(workers=0))
+    result = asyncio.run(analyzer.update("doc", code, "python"))
+    assert result["status"] == "budget_exceeded"
+    assert result["meta"]["budget"]["limit"] == limit
+
+
+def test_diff_scope_reports_an_oversized_file_as_one_issue():
+    issues, spans, headers = _scoped(CodeAnalyzerService(), TOO_MANY_LINES, "python", {1})
+    assert [i["type"] for i in issues] == ["Budget Exceeded"]
+    assert spans == [] and headers == set()
+
+
+@pytest.mark.skipif(budget.resource is None or not hasattr(signal, "SIGXCPU"),
+                    reason="RLIMIT_CPU / SIGXCPU not available")
+def test_cpu_budget_interrupts_a_busy_loop():
+    assert threading.current_thread() is threading.main_thread()
+    with pytest.raises(BudgetExceeded) as e:
+        with cpu_budget(0.5):
+            while True:
+                pass
+    assert e.value.limit == "cpu_seconds"
+    # the previous limit is restored: plain work runs on unbounded
+    sum(range(1000))
+
+
+def test_budget_errors_survive_pickling():
+    # raised in a pool worker, re-raised in the parent
+    error = pickle.loads(pickle.dumps(BudgetExceeded("ast_depth", 300, detail="too deep")))
+    assert (error.limit, error.maximum, str(error)) == ("ast_depth", 300, "too deep")
+
+
+def test_session_chunk_job_runs_under_the_cpu_budget(monkeypatch):
+    # the job runs on a pool worker's main thread, like this test
+    seen = []
+    monkeypatch.setattr(incremental, "analyze_chunks", lambda analyzer, texts: seen.append(budget._cpu_job))
+    incremental._run_chunks(["x = 1\n"])
+    enforced = budget.resource is not None and hasattr(signal, "SIGXCPU") and budget.JOB_CPU_SECONDS > 0
+    expected = budget.JOB_CPU_SECONDS if enforced else None
+    assert seen == [expected]
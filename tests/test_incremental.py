@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from backend.services.code_analyzer import CodeAnalyzerService
+from backend.services.executor import AnalysisExecutor, AnalysisTimeout
+from backend.services.incremental import IncrementalAnalyzer, split_chunks
+
+SOURCE = '''"""Module doc."""
+import os
+import sys
+
+X = 1
+
+
+@decorator
+def first(a):
+    # comment
+    if a:
+        return os.path.join(a)
+    return None
+
+
+class Second:
+    def method(self):
+        unused = 1
+        return self
+'''
+
+
+def full_result(code):
+    return CodeAnalyzerService().analyze(code, "python")
+
+
+def new_analyzer(**executor_options):
+    return IncrementalAnalyzer(AnalysisExecutor(workers=0, **executor_options))
+
+
+def update(analyzer, document_id, code):
+    return asyncio.run(analyzer.update(document_id, code, "python"))
+
+
+def incremental_result(analyzer, document_id, code):
+    result = update(analyzer, document_id, code)
+    result["meta"].pop("incremental")
+    return result
+
+
+def test_split_chunks_concatenate_to_the_source():
+    chunks = split_chunks(SOURCE)
+    assert "".join(text for _, text in chunks) == SOURCE
+    for offset, text in chunks:
+        assert SOURCE.split("\n")[offset] == text.split("\n")[0]
+
+
+def test_decorators_stay_with_their_definition():
+    headers = [text.split("\n")[0] for _, text in split_chunks(SOURCE)]
+    assert headers == ['"""Module doc."""', "@decorator", "class Second:"]
+
+
+def test_merge_matches_full_analysis():
+    analyzer = new_analyzer()
+    assert incremental_result(analyzer, "doc", SOURCE) == full_result(SOURCE)
+
+
+def test_update_reparses_only_changed_chunks():
+    analyzer = new_analyzer()
+    update(analyzer, "doc", SOURCE)
+    edited = SOURCE.replace("unused = 1", "unused = 2")
+
+    result = update(analyzer, "doc", edited)
+    assert result["meta"]["incremental"] == {"chunks": 3, "reparsed": 1}
+    result["meta"].pop("incremental")
+    assert result == full_result(edited)
+
+
+def test_import_used_in_a_later_chunk_is_not_unused():
+    analyzer = new_analyzer()
+    details = [i["detail"] for i in update(analyzer, "doc", SOURCE)["issues"]
+               if i["type"] == "Unused Import"]
+    assert details == ["'sys' imported but never used"]
+
+
+def test_chunk_that_does_not_parse_alone_falls_back_to_full_analysis():
+    code = 'TEXT = """\ndef inside_a_string():\n    pass\n"""\n'
+    analyzer = new_analyzer()
+    assert update(analyzer, "doc", code) == full_result(code)
+
+
+def test_expression_too_deep_to_parse_is_a_budget_result():
+    code = "x = " + " + ".join(["1"] * 150000) + "\n"
+    result = update(new_analyzer(), "doc", code)
+    assert result["status"] == "budget_exceeded"
+    assert result["meta"]["budget"]["limit"] == "ast_depth"
+
+
+def test_sessions_keep_their_own_chunks():
+    analyzer = new_analyzer()
+    update(analyzer, "a", SOURCE)
+    other = "def other():\n    return 1\n"
+    assert update(analyzer, "b", other)["meta"]["incremental"] == {"chunks": 1, "reparsed": 1}
+    assert update(analyzer, "a", SOURCE)["meta"]["incremental"] == {"chunks": 3, "reparsed": 0}
+
+
+def test_update_is_bounded_by_the_executor_timeout():
+    code = "".join(f"def f{i}(a):\n    return a + {i}\n" for i in range(3000))
+    with pytest.raises(AnalysisTimeout):
+        update(new_analyzer(timeout=0.01), "doc", code)
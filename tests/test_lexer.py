@@ -0,0 +1,45 @@
+import pytest
+
+from backend.services.js_linter import JSLinter
+from backend.services.lexer import CODE, STRING, TEMPLATE, lex
+
+
+def literals(code):
+    return [(kind, code[start:end]) for kind, start, end in lex(code, "javascript") if kind != CODE]
+
+
+@pytest.mark.parametrize("code, expected", [
+    ('const re = /"/;', [(STRING, '/"/')]),
+    ("const re = /`/;", [(STRING, "/`/")]),
+    ("return /[/]+/g.test(s);", [(STRING, "/[/]+/g")]),
+    ("if (typeof /x/ === 'object') {}", [(STRING, "/x/"), (STRING, "'object'")]),
+    ("/^a/.test(s)", [(STRING, "/^a/")]),
+    ("x = a / b / c;", []),
+    ("y = (a) / 2 + 's' / 3;", [(STRING, "'s'")]),
+    ("t = `a ${b} c`;", [(TEMPLATE, "`a ${b} c`")]),
+])
+def test_javascript_regex_literals_and_division(code, expected):
+    assert literals(code) == expected
+
+
+def test_unterminated_template_is_code():
+    code = "let t = `abc\nvar q = 1\n"
+    assert literals(code) == []
+    assert lex(code, "javascript").code_view() == code
+
+
+def test_tokens_cover_the_source():
+    code = 'a = /"/; b = `x`; // c\nd = e / f; /* g */ "h"\n'
+    tokens = lex(code, "javascript")
+    assert "".join(code[start:end] for _, start, end in tokens) == code
+
+
+@pytest.mark.parametrize("code", [
+    'const re = /"/;\n',
+    "const re = /`/;\nvar a = 1\nvar b = 2\n",
+])
+def test_regex_literals_do_not_hide_or_invent_issues(code):
+    issues = {(i["type"], i["line"]) for i in JSLinter().lint(code)}
+    assert ("Missing semicolon", 1) not in issues
+    if "var a" in code:
+        assert {("Missing semicolon", 2), ("Missing semicolon", 3)} <= issues
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from backend.services.budget import BudgetExceeded
+from backend.services.executor import AnalysisExecutor
+from backend.services.ode_metrics import CodeMetricsService
+from backend.services.result_cache import AnalysisCache
+
+RECURSIVE = '''
+def fact(n):
+    return n * fact(n - 1)
+
+
+class Tree:
+    def walk(self, node):
+        return self.walk(node.left)
+
+    @classmethod
+    def build(cls, depth):
+        return cls.build(depth - 1)
+
+    def other(self):
+        return walk(self)
+'''
+
+
+def cognitive(code):
+    return {f["name"]: f["cognitive_complexity"] for f in CodeMetricsService(code).analyze()["functions"]}
+
+
+def test_recursion_through_name_self_and_cls_is_counted():
+    assert cognitive(RECURSIVE) == {"fact": 1, "Tree.walk": 1, "Tree.build": 1, "Tree.other": 0}
+
+
+def test_executor_computes_metrics_inline():
+    result = asyncio.run(AnalysisExecutor(workers=0).code_metrics("def f(a):\n    return a\n"))
+    assert [f["name"] for f in result["functions"]] == ["f"]
+
+
+@pytest.mark.parametrize("code, error", [
+    ("def (:\n", SyntaxError),
+    ("x = " + " + ".join(["1"] * 150000), BudgetExceeded),
+])
+def test_executor_raises_metrics_errors(code, error):
+    with pytest.raises(error):
+        asyncio.run(AnalysisExecutor(workers=0).code_metrics(code))
+
+
+def test_executor_serves_repeated_metrics_from_the_cache():
+    cache = AnalysisCache("1")
+    executor = AnalysisExecutor(workers=0, cache=cache)
+    code = "def f(a):\n    return a\n"
+    first = asyncio.run(executor.code_metrics(code))
+    assert asyncio.run(executor.code_metrics(code)) == first
+    assert cache.stats()["hits"] == 1
+    # analyze results for the same source live under another key
+    assert cache.key(code, "python") != cache.key(code, "python", namespace="metrics/1")
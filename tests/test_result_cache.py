@@ -0,0 +1,73 @@
+import asyncio
+import sqlite3
+import time
+
+from backend.services.result_cache import AnalysisCache
+
+RESULT = {"status": "success", "issues": [], "meta": {"score": 100}}
+
+
+def test_memory_tier_is_an_lru_bounded_by_bytes():
+    cache = AnalysisCache("1", max_bytes=120)
+    for name in ("a", "b", "c"):
+        cache.put(name, {**RESULT, "name": name})
+    assert cache.get("a") is None
+    assert cache.get("c")["name"] == "c"
+    assert cache.stats()["bytes"] <= 120
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = AnalysisCache("1", db_path=path)
+    first.put("k", RESULT)
+    first.flush()
+
+    second = AnalysisCache("1", db_path=path)
+    assert asyncio.run(second.aget("k")) == RESULT
+    assert second.stats()["disk_hits"] == 1
+    # promoted to memory
+    assert second.get("k") == RESULT and second.stats()["hits"] == 1
+
+
+def test_other_versions_never_match(tmp_path):
+    path = str(tmp_path / "cache.db")
+    old = AnalysisCache("1", db_path=path)
+    old.put("k", RESULT)
+    old.flush()
+    assert AnalysisCache("2", db_path=path).get("k") is None
+
+
+def test_put_does_not_wait_for_a_locked_file(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = AnalysisCache("1", db_path=path)
+    other = sqlite3.connect(path)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        started = time.perf_counter()
+        cache.put("k", RESULT)
+        assert time.perf_counter() - started < 1.0
+        assert asyncio.run(cache.aget("k")) == RESULT
+    finally:
+        other.rollback()
+        other.close()
+    cache.flush()
+
+
+def test_disk_tier_keeps_the_newest_rows(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = AnalysisCache("1", max_bytes=0, db_path=path, max_rows=3)
+    for i in range(5):
+        cache.put(f"k{i}", RESULT)
+        cache.flush()
+    rows = sqlite3.connect(path).execute("SELECT key FROM results ORDER BY created_at").fetchall()
+    assert [key for key, in rows] == ["k2", "k3", "k4"]
+
+
+def test_opening_the_file_keeps_rows_of_other_versions(tmp_path):
+    # workers of two versions share the file during a rolling deploy
+    path = str(tmp_path / "cache.db")
+    old = AnalysisCache("1", db_path=path)
+    old.put("k", RESULT)
+    old.flush()
+    AnalysisCache("2", db_path=path)
+    assert AnalysisCache("1", db_path=path).get("k") == RESULT
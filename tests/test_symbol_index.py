@@ -0,0 +1,21 @@
+from backend.services.symbol_index import extract_symbols
+
+
+def definition_names(code):
+    return [name for name, _, _, _ in extract_symbols(code, "m")["definitions"]]
+
+
+def test_methods_after_a_nested_class_are_indexed():
+    code = (
+        "class Outer:\n"
+        "    def a(self): pass\n"
+        "    class Inner:\n"
+        "        def c(self): pass\n"
+        "    def b(self): pass\n"
+    )
+    assert definition_names(code) == ["Outer", "Outer.a", "Outer.b"]
+
+
+def test_methods_of_a_class_inside_a_function_are_not_indexed():
+    code = "def f():\n    class C:\n        def m(self): pass\n"
+    assert definition_names(code) == ["f"]
@@ -0,0 +1,80 @@
+import ast
+
+import pytest
+
+from backend.analyzers.symbol_table import SymbolTableBuilder
+from backend.analyzers.unused_imports import detect_unused_imports
+from backend.services.ast_utils import NodeDispatcher
+from backend.services.code_analyzer import CodeAnalyzerService
+
+
+def build(code):
+    symbols = SymbolTableBuilder()
+    NodeDispatcher([symbols]).walk(ast.parse(code))
+    return symbols.table
+
+
+def unused_variables(code):
+    return sorted(name for name, _ in build(code).unused_assignments())
+
+
+def test_unread_local_is_reported():
+    assert unused_variables("def f():\n    a = 1\n    b = 2\n    return b\n") == ["a"]
+
+
+def test_read_in_a_nested_function_counts_as_used():
+    code = "def f():\n    a = 1\n    def g():\n        return a\n    return g\n"
+    assert unused_variables(code) == []
+
+
+def test_rebinding_in_a_nested_function_does_not_use_the_outer_name():
+    code = "def f():\n    a = 1\n    def g():\n        a = 2\n        return a\n    return g\n"
+    assert unused_variables(code) == ["a"]
+
+
+def test_class_body_is_not_a_closure():
+    code = "def f():\n    a = 1\n    class C:\n        a = 2\n        x = a\n    return C\n"
+    assert unused_variables(code) == ["a"]
+
+
+@pytest.mark.parametrize("code", [
+    # defaults run where the function is defined
+    "def f(a):\n    b = 1\n    def g(b=b):\n        return b\n    return g\n",
+    "def f():\n    b = 1\n    def g(*, b=b):\n        return b\n    return g\n",
+    "def f(items):\n    fs = []\n    for i in items:\n        j = i\n        fs.append(lambda j=j: j)\n    return fs\n",
+    # decorators and annotations too
+    "def f():\n    deco = wrap\n    @deco\n    def g():\n        pass\n    return g\n",
+    "def f():\n    T = int\n    def g(x: T) -> T:\n        return x\n    return g\n",
+    # and the first iterable of a comprehension
+    "def f():\n    rows = load()\n    return [r for r in rows]\n",
+    "def f():\n    rows = load()\n    return {r: [c for c in r] for r in rows}\n",
+    # a lambda in a default opens its scope in the enclosing function
+    "def f():\n    k = 1\n    def g(key=lambda x: x + k):\n        return key\n    return g\n",
+    # class bases
+    "def f():\n    Base = object\n    class C(Base):\n        Base = None\n    return C\n",
+])
+def test_names_evaluated_in_the_enclosing_scope_are_used_there(code):
+    assert unused_variables(code) == []
+
+
+def test_default_does_not_read_the_parameter_it_shadows():
+    table = build("def f(a):\n    b = 1\n    def g(b=b):\n        return b\n    return g\n")
+    g = next(s for s in table.scopes() if s.name == "g")
+    assert "b" in g.parent.loads
+    assert g.loads == {"b"} and "b" in g.bindings
+
+
+def test_analyzer_reports_no_unused_variable_for_default_capture():
+    code = "def f(a):\n    b = 1\n\n    def g(b=b):\n        return b\n    return g\n"
+    issues = CodeAnalyzerService().analyze(code, "python")["issues"]
+    assert not [i for i in issues if i["type"] == "Unused Variable"]
+
+
+def test_unused_imports_honour_all_and_future():
+    code = (
+        "from __future__ import annotations\n"
+        "import os\nimport sys\nimport json\n"
+        "__all__ = ['json']\n"
+        "def f(x=os.sep):\n    return x\n"
+    )
+    assert detect_unused_imports(code) == ["sys"]